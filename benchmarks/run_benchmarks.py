@@ -0,0 +1,255 @@
+"""
+Offline benchmark suite
+Times the main entry points against the synthetic market data provider and
+compares wall time and peak memory with stored baselines
+
+Each case is timed over several runs and the median is kept, and a case
+only counts as a regression when it is both over the tolerance and slower
+by more than an absolute noise floor, so millisecond-scale cases do not
+fail on scheduler jitter. Re-record the baselines (--save) in any commit
+that changes a measured code path.
+
+Usage:
+    python benchmarks/run_benchmarks.py                   # run and compare
+    python benchmarks/run_benchmarks.py --save            # record new baselines
+    python benchmarks/run_benchmarks.py --sizes 10 1000 --latency 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import market_data  # noqa: E402
+from synthetic_provider import (  # noqa: E402
+    SyntheticProvider,
+    synthetic_portfolio,
+    synthetic_symbols,
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_SIZES = [10, 1000, 10000]
+
+# Timed runs per case; the median is reported
+DEFAULT_REPEATS = 5
+
+# Differences below these are treated as noise, whatever the ratio
+TIME_NOISE_FLOOR_S = 0.05
+MEMORY_NOISE_FLOOR_MB = 1.0
+
+
+def _cases(size, workdir):
+    """(name, setup, run) triples; setup output is passed to run and not timed"""
+    from Earnings_Reports import get_upcoming_earnings
+    from Stocks_Performance import get_stock_performance
+    from portfolio_analysis import analyze_portfolio, export_to_excel
+
+    def analyzed():
+        return analyze_portfolio(
+            synthetic_portfolio(size),
+            max_workers=8,
+            batch_size=market_data.DEFAULT_BATCH_SIZE,
+        )
+
+    return [
+        (
+            "analyze_portfolio",
+            lambda: synthetic_portfolio(size),
+            lambda portfolio: analyze_portfolio(
+                portfolio, max_workers=8, batch_size=market_data.DEFAULT_BATCH_SIZE
+            ),
+        ),
+        (
+            "get_stock_performance",
+            lambda: synthetic_symbols(size),
+            get_stock_performance,
+        ),
+        (
+            "get_upcoming_earnings",
+            lambda: synthetic_symbols(size),
+            lambda symbols: get_upcoming_earnings(symbols, max_workers=8),
+        ),
+        (
+            "export_to_excel",
+            analyzed,
+            lambda results: export_to_excel(
+                results, os.path.join(workdir, f"portfolio_{size}.xlsx")
+            ),
+        ),
+    ]
+
+
+def _measure(setup, run, memory=True, repeats=DEFAULT_REPEATS):
+    """Median wall time over `repeats` runs, then peak traced memory of one more"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        walls = []
+        for _ in range(max(1, repeats)):
+            data = setup()
+            start = time.perf_counter()
+            run(data)
+            walls.append(time.perf_counter() - start)
+        wall = statistics.median(walls)
+
+        peak_mb = None
+        if memory:
+            data = setup()
+            tracemalloc.start()
+            run(data)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+    return wall, peak_mb
+
+
+def run_benchmarks(
+    sizes=DEFAULT_SIZES, latency=0.0, memory=True, only=None, repeats=DEFAULT_REPEATS
+):
+    """
+    Run every benchmark case against a fresh SyntheticProvider
+
+    Returns:
+        dict: "<case>@<size>" -> {"wall_s": float, "peak_mb": float or None}
+    """
+    results = {}
+    previous = market_data.set_provider(SyntheticProvider(latency=latency))
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for size in sizes:
+                for name, setup, run in _cases(size, workdir):
+                    if only and name not in only:
+                        continue
+                    wall, peak_mb = _measure(setup, run, memory=memory, repeats=repeats)
+                    key = f"{name}@{size}"
+                    results[key] = {
+                        "wall_s": round(wall, 4),
+                        "peak_mb": None if peak_mb is None else round(peak_mb, 2),
+                    }
+                    memory_text = "-" if peak_mb is None else f"{peak_mb:.1f} MB"
+                    print(f"{key:<32} {wall:>9.3f} s {memory_text:>12}")
+    finally:
+        market_data.set_provider(previous)
+    return results
+
+
+def _regressed(value, baseline, tolerance, floor):
+    """True if `value` exceeds baseline x tolerance and baseline + floor"""
+    return value > baseline * tolerance and value - baseline > floor
+
+
+def compare(
+    results,
+    baselines,
+    time_tolerance=1.5,
+    memory_tolerance=1.25,
+    time_floor=TIME_NOISE_FLOOR_S,
+    memory_floor=MEMORY_NOISE_FLOOR_MB,
+):
+    """
+    List regressions: cases slower or larger than baseline x tolerance, by
+    more than the absolute noise floor
+
+    Returns:
+        list: human-readable regression messages (empty if none)
+    """
+    regressions = []
+    for key, result in results.items():
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        if _regressed(result["wall_s"], baseline["wall_s"], time_tolerance, time_floor):
+            regressions.append(
+                f"{key}: {result['wall_s']:.3f} s vs baseline {baseline['wall_s']:.3f} s"
+            )
+        if (
+            result["peak_mb"] is not None
+            and baseline.get("peak_mb") is not None
+            and _regressed(
+                result["peak_mb"], baseline["peak_mb"], memory_tolerance, memory_floor
+            )
+        ):
+            regressions.append(
+                f"{key}: {result['peak_mb']:.1f} MB vs baseline {baseline['peak_mb']:.1f} MB"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="simulated seconds per request"
+    )
+    parser.add_argument("--only", nargs="+", help="run only these cases")
+    parser.add_argument("--no-memory", action="store_true", help="skip peak memory")
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=DEFAULT_REPEATS,
+        help="timed runs per case (median kept)",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="store results as baselines"
+    )
+    parser.add_argument("--baselines", default=BASELINE_PATH)
+    parser.add_argument("--time-tolerance", type=float, default=1.5)
+    parser.add_argument("--memory-tolerance", type=float, default=1.25)
+    parser.add_argument(
+        "--time-floor",
+        type=float,
+        default=TIME_NOISE_FLOOR_S,
+        help="seconds of slowdown always treated as noise",
+    )
+    parser.add_argument(
+        "--memory-floor",
+        type=float,
+        default=MEMORY_NOISE_FLOOR_MB,
+        help="MB of growth always treated as noise",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.sizes,
+        args.latency,
+        memory=not args.no_memory,
+        only=args.only,
+        repeats=args.repeats,
+    )
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+
+    if args.save:
+        baselines.update(results)
+        with open(args.baselines, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"\nBaselines written to {args.baselines}")
+        return 0
+
+    regressions = compare(
+        results,
+        baselines,
+        args.time_tolerance,
+        args.memory_tolerance,
+        args.time_floor,
+        args.memory_floor,
+    )
+    if regressions:
+        print("\nRegressions:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print("\nNo regressions against baselines")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
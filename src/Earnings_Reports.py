@@ -1,7 +1,9 @@
-import yfinance as yf
 from datetime import datetime
 import pandas as pd
-import time  # Import the time module
+
+from instrumentation import metrics
+from market_data import fetch_calendars
+from ttl_cache import TTLCache
 
 """
 Verify:
@@ -11,47 +13,51 @@ https://www.nasdaq.com/market-activity/earnings
 """
 
 
-def get_upcoming_earnings(symbols):
+def get_upcoming_earnings(symbols, max_workers=None, cache=None, cache_only=False):
     """
     Get upcoming earnings dates for a list of company symbols
 
     Args:
         symbols (list): List of stock symbols (e.g., ['AAPL', 'MSFT', 'GOOGL'])
+        max_workers (int): Concurrent requests, within the provider's rate limit
+        cache (TTLCache): Optional per-symbol cache; only stale or missing
+            calendars are fetched
+        cache_only (bool): Answer from `cache` alone, without any request
 
     Returns:
         DataFrame: Sorted earnings calendar with company symbols and dates
     """
     earnings_dates = []
 
-    for symbol in symbols:
-        try:
-            # Get stock info
-            stock = yf.Ticker(symbol)
-
-            # Get next earnings date
-            next_earnings = stock.calendar
+    with metrics.timer("stage.fetch", command="earnings"):
+        calendars, errors = fetch_calendars(
+            symbols, max_workers=max_workers, cache=cache, cache_only=cache_only
+        )
 
-            if next_earnings is not None and "Earnings Date" in next_earnings:
-                earnings_date = next_earnings["Earnings Date"]
+    for symbol in symbols:
+        if symbol in errors:
+            print(f"Error processing {symbol}: {errors[symbol]}")
+            continue
 
-                # Handle both single date and date range cases
-                if isinstance(earnings_date, pd.DatetimeIndex):
-                    earnings_date = earnings_date[0]
+        # Get next earnings date
+        next_earnings = calendars.get(symbol)
 
-                earnings_dates.append(
-                    {
-                        "Symbol": symbol,
-                        "Earnings Date": earnings_date,
-                    }
-                )
-                # print(f"Found earnings date for {symbol}: {earnings_date}")
-            else:
-                print(f"Not found for {symbol}")
+        if next_earnings is not None and "Earnings Date" in next_earnings:
+            earnings_date = next_earnings["Earnings Date"]
 
-            time.sleep(1)  # Add a 1-second delay between each request
+            # Handle both single date and date range cases
+            if isinstance(earnings_date, pd.DatetimeIndex):
+                earnings_date = earnings_date[0]
 
-        except Exception as e:
-            print(f"Error processing {symbol}: {str(e)}")
+            earnings_dates.append(
+                {
+                    "Symbol": symbol,
+                    "Earnings Date": earnings_date,
+                }
+            )
+            # print(f"Found earnings date for {symbol}: {earnings_date}")
+        else:
+            print(f"Not found for {symbol}")
 
     # Create DataFrame and sort by date
     if earnings_dates:
@@ -99,7 +105,7 @@ if __name__ == "__main__":
     ]
 
     print("Fetching upcoming earnings dates...")
-    earnings_calendar = get_upcoming_earnings(symbols)
+    earnings_calendar = get_upcoming_earnings(symbols, cache=TTLCache())
 
     if not earnings_calendar.empty:
         print("\nUpcoming Earnings Calendar:")
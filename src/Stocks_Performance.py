@@ -1,7 +1,49 @@
-import yfinance as yf
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 
+from history_cache import HistoryCache
+from instrumentation import metrics
+from market_data import DEFAULT_BATCH_SIZE, download_histories, now
+from price_panel import PricePanel
+from price_panel import fill_backward as _fill_backward
+from price_panel import fill_forward as _fill_forward
+
+# Lookback horizons in calendar days
+TIME_PERIODS = {
+    "1d": 1,
+    "3d": 3,
+    "5d": 5,
+    "15d": 15,
+    "1m": 30,
+    "2m": 60,
+    "3m": 90,
+    "6m": 180,
+    "1y": 365,
+    "2y": 730,
+    # '3y': 1095,
+    # '5y': 1825,
+    # '10y': 3650
+}
+
+# Column order of the performance table
+PERFORMANCE_COLUMNS = [
+    "Symbol",
+    "Current Price",
+    "1d",
+    "3d",
+    "5d",
+    "15d",
+    "1m",
+    "2m",
+    "3m",
+    "6m",
+    "YTD",
+    "1y",
+    "2y",
+]
+
+
 def calculate_price_change(current_price, historical_price):
     """
     Calculate percentage change between current and historical price
@@ -10,101 +52,176 @@ def calculate_price_change(current_price, historical_price):
         return 0
     return ((current_price - historical_price) / historical_price) * 100
 
-def get_stock_performance(ticker_symbols):
+
+def build_close_matrix(histories):
+    """
+    Align per-symbol close prices onto one shared date index
+
+    Args:
+        histories (dict): symbol -> DataFrame with a 'Close' column and naive date index
+
+    Returns:
+        tuple: (symbols, dates, closes) - closes is a float64 symbols x dates
+        array with NaN where a symbol has no bar on that date
+    """
+    panel = PricePanel.from_histories(histories)
+    return panel.symbols, panel.dates, panel.values
+
+
+def compute_horizon_returns(
+    symbols, dates, closes, current_prices, end_date, time_periods=TIME_PERIODS
+):
+    """
+    Percentage change from every horizon's anchor close to the current price
+
+    The anchor for a horizon is the last close on or before end_date - days,
+    and for YTD the first close on or after 1 January. All anchors are found
+    with a single searchsorted over the shared date index.
+
+    Args:
+        symbols (list): Row labels of `closes`
+        dates (numpy.ndarray): Sorted datetime64 column labels of `closes`
+        closes (numpy.ndarray): symbols x dates close-price matrix (NaN = no bar)
+        current_prices (array-like): Current price per symbol
+        end_date (datetime): Date the horizons are measured back from
+        time_periods (dict): horizon name -> calendar days
+
+    Returns:
+        pandas.DataFrame: float64 % changes indexed by symbol, NaN where the
+        history does not reach back far enough
+    """
+    current = np.asarray(current_prices, dtype=float)[:, None]
+    names = list(time_periods) + ["YTD"]
+    anchors = np.array(
+        [end_date - timedelta(days=days) for days in time_periods.values()]
+        + [datetime(end_date.year, 1, 1)],
+        dtype="datetime64[ns]",
+    )
+    n_dates = len(dates)
+    n_periods = len(time_periods)
+
+    positions = np.searchsorted(dates, anchors, side="right")
+    positions[:n_periods] -= 1  # last bar on or before the anchor
+    positions[n_periods:] = np.searchsorted(dates, anchors[n_periods:], side="left")
+    valid = (positions >= 0) & (positions < n_dates)
+    clipped = np.clip(positions, 0, max(n_dates - 1, 0))
+
+    past = np.full((len(symbols), len(names)), np.nan)
+    if n_dates:
+        past[:, :n_periods] = _fill_forward(closes)[:, clipped[:n_periods]]
+        past[:, n_periods:] = _fill_backward(closes)[:, clipped[n_periods:]]
+    past[:, ~valid] = np.nan
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        changes = np.where(past == 0, 0.0, (current - past) / past * 100)
+
+    return pd.DataFrame(changes, index=pd.Index(symbols, name="Symbol"), columns=names)
+
+
+def format_performance(df):
+    """Render numeric % change columns as display strings ('12.34%' / 'N/A')"""
+    df = df.copy()
+    for column in df.columns:
+        if column in ("Symbol", "Current Price"):
+            continue
+        values = df[column].to_numpy(float)
+        df[column] = np.where(
+            np.isnan(values), "N/A", pd.Series(values).map("{:.2f}%".format).to_numpy()
+        )
+    return df
+
+
+def get_stock_performance(
+    ticker_symbols,
+    cache=None,
+    numeric=False,
+    batch_size=DEFAULT_BATCH_SIZE,
+    cache_only=False,
+):
     """
     Get comprehensive stock performance for a list of symbols
-    
+
     Args:
         ticker_symbols (list): List of stock ticker symbols (e.g., ['NVDA', 'AAPL'])
-    
+        cache (HistoryCache): Optional on-disk history store; when given only
+            bars missing since the last stored date are downloaded
+        numeric (bool): Return float64 % changes instead of formatted strings
+        batch_size (int): Symbols per multi-ticker download request
+        cache_only (bool): Answer from `cache` alone, without any download
+
     Returns:
         pandas.DataFrame: Performance metrics for each stock
+
+    Raises:
+        ValueError: cache_only is set without a cache
     """
-    results = []
-    
+    if cache_only and cache is None:
+        raise ValueError("cache_only=True needs a cache to read from")
+
+    # Get historical data
+    end_date = now()
+    start_date = end_date - timedelta(days=3650)  # 10 years
+
+    with metrics.timer("stage.fetch", command="performance"):
+        if cache_only:
+            fetched = {s: cache.load(s, start_date, end_date) for s in ticker_symbols}
+        elif cache is not None:
+            fetched = cache.get_histories(ticker_symbols, start_date, end_date)
+        else:
+            fetched = download_histories(
+                ticker_symbols, start=start_date, end=end_date, batch_size=batch_size
+            )
+
+    histories = {}
+
     for symbol in ticker_symbols:
-        try:
-            # Create ticker object
-            stock = yf.Ticker(symbol)
-            
-            # Get current data
-            current_data = stock.info
-            current_price = current_data.get('regularMarketPrice', 0)
-            
-            # Get historical data
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=3650)  # 10 years
-            hist = stock.history(start=start_date, end=end_date)
-            
-            # Convert index to naive datetime for consistent comparison
-            hist.index = hist.index.tz_localize(None)
-            
-            # Calculate all the required timeframes
-            time_periods = {
-                '1d': 1,
-                '3d': 3,
-                '5d': 5,
-                '15d': 15,
-                '1m': 30,
-                '2m': 60,
-                '3m': 90,
-                '6m': 180,
-                '1y': 365,
-                '2y': 730,
-                # '3y': 1095,
-                # '5y': 1825,
-                # '10y': 3650
-            }
-            
-            changes = {'Symbol': symbol, 'Current Price': current_price}
-            
-            # Calculate YTD change
-            ytd_start = datetime(end_date.year, 1, 1)
-            ytd_data = hist[hist.index >= ytd_start]
-            if not ytd_data.empty:
-                ytd_change = calculate_price_change(current_price, ytd_data.iloc[0]['Close'])
-                changes['YTD'] = f"{ytd_change:.2f}%"
-            
-            # Calculate changes for all periods
-            for period_name, days in time_periods.items():
-                try:
-                    historical_data = hist[hist.index <= (end_date - timedelta(days=days))]
-                    if not historical_data.empty:
-                        historical_price = historical_data.iloc[-1]['Close']
-                        change = calculate_price_change(current_price, historical_price)
-                        changes[period_name] = f"{change:.2f}%"
-                    else:
-                        changes[period_name] = "N/A"
-                except Exception:
-                    changes[period_name] = "N/A"
-            
-            results.append(changes)
-            
-        except Exception as e:
-            print(f"Error processing {symbol}: {str(e)}")
+        hist = fetched.get(symbol)
+        if hist is None or hist.empty:
+            print(f"Error processing {symbol}: no price history")
             continue
-    
-    # Create DataFrame from results
-    df = pd.DataFrame(results)
-    
+        histories[symbol] = hist
+
+    # Resolve every horizon for every symbol in one pass over a close panel;
+    # the per-symbol OHLCV frames are not needed after it is built
+    with metrics.timer("stage.compute", command="performance"):
+        panel = PricePanel.from_histories(histories)
+        del fetched, histories
+        # The latest daily bar carries the current price
+        current_prices = panel.last()
+        changes = compute_horizon_returns(
+            panel.symbols, panel.dates, panel.values, current_prices, end_date
+        )
+    changes.insert(0, "Current Price", current_prices)
+
     # Reorder columns to match requested format
-    columns = ['Symbol', 'Current Price', '1d', '3d', '5d', '15d', '1m', '2m', '3m', 
-              '6m', 'YTD', '1y', '2y']
-    df = df[columns]
-    
-    return df
+    df = changes.reset_index()[PERFORMANCE_COLUMNS]
+
+    return df if numeric else format_performance(df)
+
 
 # Example usage:
 if __name__ == "__main__":
     # Example stock list
-    stocks = ['CRM', 'ASML','INTC' , 'BBAI', 'SMCI', 'NVDA', 'PLTR', 'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META']
-    
+    stocks = [
+        "CRM",
+        "ASML",
+        "INTC",
+        "BBAI",
+        "SMCI",
+        "NVDA",
+        "PLTR",
+        "AAPL",
+        "MSFT",
+        "GOOGL",
+        "AMZN",
+        "META",
+    ]
+
     # Get performance data
-    performance_df = get_stock_performance(stocks)
-    
+    performance_df = get_stock_performance(stocks, cache=HistoryCache())
+
     # Display results
-    pd.set_option('display.max_columns', None)
-    pd.set_option('display.width', None)
+    pd.set_option("display.max_columns", None)
+    pd.set_option("display.width", None)
     print("\nStock Performance Summary:")
     print(performance_df)
-
@@ -0,0 +1,127 @@
+"""
+Historical mark-to-market backtest
+Values the book on every trading day since its first purchase by multiplying
+a cumulative-shares matrix with the aligned close-price matrix, so the whole
+history is valued in a few array operations
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from holdings import Holdings
+from market_data import download_histories, now
+from price_panel import PricePanel
+
+# Start date used when no lot has a purchase date
+DEFAULT_LOOKBACK_DAYS = 365
+
+
+def _lot_events(holdings, symbols, dates, values):
+    """
+    symbols x dates matrix with each lot's `values` placed on its purchase day
+
+    Lots without a purchase date count from the first date; lots bought
+    after the last date, or in a symbol without history, are left out.
+    """
+    row_of = {symbol: i for i, symbol in enumerate(symbols)}
+    rows = np.array([row_of.get(symbol, -1) for symbol in holdings.symbols])
+    lot_rows = rows[holdings.codes]
+    purchase_dates = holdings.purchase_dates
+    columns = np.searchsorted(dates, purchase_dates, side="left")
+    columns[np.isnat(purchase_dates)] = 0
+
+    keep = (lot_rows >= 0) & (columns < len(dates))
+    events = np.zeros((len(symbols), len(dates)))
+    np.add.at(events, (lot_rows[keep], columns[keep]), values[keep])
+    return events
+
+
+def backtest_series(holdings, histories, start=None):
+    """
+    Daily value of the book given each symbol's bars
+
+    Args:
+        holdings (Holdings): Lots with optional purchase dates
+        histories (dict): symbol -> DataFrame with a 'Close' column
+        start (datetime): First day of the series (defaults to the first bar)
+
+    Returns:
+        pandas.DataFrame: indexed by date with Value, Invested, Profit/Loss,
+        Return Index (time-weighted, new purchases excluded) and Drawdown
+    """
+    panel = PricePanel.from_histories(histories)
+    if start is not None:
+        panel = panel.window(start=pd.Timestamp(start))
+    symbols, dates = panel.symbols, panel.dates
+
+    # Carry closes over holidays, and back to before a symbol's first bar
+    closes = panel.filled(backward=True)
+
+    shares = np.cumsum(_lot_events(holdings, symbols, dates, holdings.shares), axis=1)
+    purchases = _lot_events(holdings, symbols, dates, holdings.cost).sum(axis=0)
+
+    value = np.einsum("ij,ij->j", shares, np.nan_to_num(closes))
+    invested = np.cumsum(purchases)
+
+    # Time-weighted daily return: the day's change net of money put in
+    previous = np.concatenate([[0.0], value[:-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = np.where(previous > 0, (value - purchases) / previous - 1, 0.0)
+    index = np.cumprod(1 + daily)
+    drawdown = index / np.maximum.accumulate(index) - 1
+
+    return pd.DataFrame(
+        {
+            "Value": value,
+            "Invested": invested,
+            "Profit/Loss": value - invested,
+            "Return Index": index,
+            "Drawdown": drawdown,
+        },
+        index=pd.DatetimeIndex(dates, name="Date"),
+    )
+
+
+def backtest(portfolio_data, start=None, end=None, cache=None):
+    """
+    Mark the book to market on every trading day from `start` to `end`
+
+    Args:
+        portfolio_data: list of holding dicts (with optional 'purchase_date'),
+            or a Holdings instance
+        start (datetime): Defaults to the earliest purchase date, or one
+            year back if no lot has a date
+        end (datetime): Defaults to now
+        cache (HistoryCache): Optional on-disk history store; re-runs then
+            only download bars added since the last run
+
+    Returns:
+        pandas.DataFrame: see backtest_series()
+    """
+    holdings = (
+        portfolio_data
+        if isinstance(portfolio_data, Holdings)
+        else Holdings.from_records(portfolio_data)
+    )
+    end = end or now()
+    if start is None:
+        dated = holdings.purchase_dates[~np.isnat(holdings.purchase_dates)]
+        start = (
+            pd.Timestamp(dated.min()).to_pydatetime()
+            if len(dated)
+            else end - timedelta(days=DEFAULT_LOOKBACK_DAYS)
+        )
+
+    tickers = list(holdings.symbols)
+    if cache is not None:
+        histories = cache.get_histories(tickers, start, end)
+    else:
+        histories = download_histories(tickers, start=start, end=end)
+    histories = {s: h for s, h in histories.items() if h is not None and not h.empty}
+    for symbol in tickers:
+        if symbol not in histories:
+            print(f"Error processing {symbol}: no price history")
+
+    return backtest_series(holdings, histories, start)
@@ -0,0 +1,496 @@
+"""
+Command-line entry point for the finance_stocks tools
+
+Usage:
+    python src/cli.py portfolio [--file holdings.csv] [--output report.xlsx]
+    python src/cli.py portfolio --live [--interval 60]
+    python src/cli.py risk [--file holdings.csv] [--confidence 0.99 --paths 1000000]
+    python src/cli.py backtest [--file holdings.csv] [--start 2020-01-01]
+    python src/cli.py performance NVDA AAPL [--cache-only | --no-cache]
+    python src/cli.py screen [--build universe.txt] [--sort 3m --min "From High %=-10"]
+    python src/cli.py earnings ACN FDX [--cache-only]
+    python src/cli.py scan sp500.txt --checkpoint scan.jsonl [--output calendar.csv]
+    python src/cli.py daemon [--port 8765 | --socket /tmp/finance.sock]
+    python src/cli.py payoff [--strike 100 --spot 100 --plot]
+    python src/cli.py payoff --strikes 80 90 100 110 --output report.pdf [--grid 2x2]
+    python src/cli.py interest [--principal 50000 --rate 0.04 --plain]
+    python src/cli.py interest --years 10 [--contribution 100 --rate-sweep 0.02 0.04]
+
+Global options go before the subcommand:
+    --metrics           print fetch, cache and stage timings when done
+    --log-json PATH     stream every measurement as a JSON line
+    --profile PATH      save cProfile stats for the whole run
+
+Only the standard library is imported up front; pandas, yfinance and
+matplotlib are loaded by the subcommands that actually use them.
+"""
+
+import argparse
+import sys
+from datetime import datetime
+
+
+def _print_frame(df):
+    import pandas as pd
+
+    with pd.option_context("display.max_columns", None, "display.width", None):
+        print(df.to_string(index=False))
+
+
+def run_portfolio(args):
+    from fx import DEFAULT_CURRENCY_CACHE_PATH, DEFAULT_CURRENCY_TTL
+    from market_data import DEFAULT_BATCH_SIZE
+    from portfolio_analysis import (
+        EXAMPLE_PORTFOLIO,
+        _export_frame,
+        analyze_portfolio,
+        export_portfolio,
+        read_portfolio,
+        render_results,
+    )
+    from ttl_cache import TTLCache
+
+    portfolio = read_portfolio(args.file) if args.file else EXAMPLE_PORTFOLIO
+    base_currency, cache = None, None
+    if args.currency.lower() != "none":
+        base_currency = args.currency.upper()
+        cache = TTLCache(DEFAULT_CURRENCY_CACHE_PATH, DEFAULT_CURRENCY_TTL)
+    if args.live:
+        return run_live(portfolio, args, base_currency, cache)
+    print(f"Analyzing {len(portfolio)} holdings...\n")
+    results = analyze_portfolio(
+        portfolio,
+        max_workers=args.workers,
+        batch_size=DEFAULT_BATCH_SIZE if args.batch_size is None else args.batch_size,
+        base_currency=base_currency,
+        currency_cache=cache,
+    )
+    _print_frame(render_results(_export_frame(results)))
+    if args.output:
+        export_portfolio(results, args.output)
+
+
+def run_live(portfolio, args, base_currency=None, currency_cache=None):
+    from live_pnl import LivePnL, poll_prices
+
+    # Amounts are in the base currency, or as listed without one
+    unit = f" {base_currency}" if base_currency else ""
+
+    def show(row, totals):
+        print(
+            f"{row['Ticker']:<8} {row['Current Price']:>10.2f} "
+            f"P/L {row['Profit/Loss']:>12,.2f} | "
+            f"total P/L {totals['Profit/Loss']:>12,.2f}{unit} "
+            f"({totals['Return %']:.2f}%)"
+        )
+
+    engine = LivePnL(
+        portfolio, base_currency=base_currency, currency_cache=currency_cache
+    )
+    engine.subscribe(show)
+    try:
+        poll_prices(engine, interval=args.interval, iterations=args.polls)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_risk(args):
+    from portfolio_analysis import EXAMPLE_PORTFOLIO, read_portfolio
+    from risk import portfolio_risk
+
+    portfolio = read_portfolio(args.file) if args.file else EXAMPLE_PORTFOLIO
+    result = portfolio_risk(
+        portfolio,
+        confidence=args.confidence,
+        horizon_days=args.horizon,
+        n_paths=args.paths,
+        processes=args.processes,
+    )
+    print(f"{args.confidence:.0%} {args.horizon}-day VaR / CVaR")
+    for method in ("historical", "parametric", "monte_carlo"):
+        if method in result:
+            var, cvar = result[method]
+            print(f"  {method:<12} {var:>14,.2f} {cvar:>14,.2f}")
+
+
+def run_backtest(args):
+    from backtest import backtest
+    from history_cache import HistoryCache
+    from portfolio_analysis import EXAMPLE_PORTFOLIO, read_portfolio
+
+    portfolio = read_portfolio(args.file) if args.file else EXAMPLE_PORTFOLIO
+    series = backtest(portfolio, start=args.start, cache=HistoryCache())
+    if series.empty:
+        print("No price history to backtest.")
+        return
+    last = series.iloc[-1]
+    print(series.round(2).tail(args.tail).to_string())
+    print(
+        f"\nValue {last['Value']:,.2f}  P/L {last['Profit/Loss']:,.2f}  "
+        f"max drawdown {series['Drawdown'].min():.2%}"
+    )
+    if args.output:
+        series.to_csv(args.output)
+
+
+def run_performance(args):
+    from history_cache import HistoryCache
+    from Stocks_Performance import get_stock_performance
+
+    cache = None if args.no_cache else HistoryCache()
+    df = get_stock_performance(args.symbols, cache=cache, cache_only=args.cache_only)
+    _print_frame(df)
+
+
+def run_screen(args):
+    from screener import DEFAULT_INDEX_PATH, ScreenerIndex, build_index
+
+    path = args.index or DEFAULT_INDEX_PATH
+    if args.build:
+        from earnings_scan import read_symbols
+        from history_cache import HistoryCache
+
+        build_index(read_symbols(args.build), path, cache=HistoryCache())
+    index = ScreenerIndex(path)
+    filters = {}
+    for bound, values in (("min", args.min), ("max", args.max)):
+        for item in values or []:
+            column, value = item.rsplit("=", 1)
+            low, high = filters.get(column, (None, None))
+            if bound == "min":
+                low = float(value)
+            else:
+                high = float(value)
+            filters[column] = (low, high)
+    print(f"Index of {len(index)} symbols built {index.built_at:%Y-%m-%d %H:%M}")
+    _print_frame(
+        index.query(args.sort, n=args.top, ascending=args.ascending, filters=filters)
+    )
+
+
+def run_earnings(args):
+    from Earnings_Reports import get_upcoming_earnings
+    from ttl_cache import TTLCache
+
+    # Cache-only answers serve whatever is stored, however old
+    cache = TTLCache(ttl=float("inf")) if args.cache_only else TTLCache()
+    df = get_upcoming_earnings(
+        args.symbols, max_workers=args.workers, cache=cache, cache_only=args.cache_only
+    )
+    if df.empty:
+        print("No earnings dates found.")
+    else:
+        _print_frame(df[["Symbol", "Date"]])
+
+
+def run_scan(args):
+    from earnings_scan import read_symbols, scan_universe
+    from ttl_cache import TTLCache
+
+    symbols = read_symbols(args.universe)
+    print(f"Scanning {len(symbols)} symbols...")
+    df = scan_universe(
+        symbols,
+        checkpoint=args.checkpoint,
+        shard_size=args.shard_size,
+        shard_workers=args.shards,
+        max_workers=args.workers,
+        cache=TTLCache(),
+    )
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"Calendar written to {args.output}")
+    else:
+        _print_frame(df[["Symbol", "Date"]])
+
+
+def run_daemon(args):
+    import asyncio
+
+    from fx import DEFAULT_CURRENCY_CACHE_PATH, DEFAULT_CURRENCY_TTL
+    from market_daemon import MarketDataDaemon
+    from portfolio_analysis import EXAMPLE_PORTFOLIO, read_portfolio
+    from ttl_cache import TTLCache
+
+    portfolio = read_portfolio(args.file) if args.file else EXAMPLE_PORTFOLIO
+    max_age = {
+        name: value
+        for name, value in (
+            ("quotes", args.quotes_every),
+            ("bars", args.bars_every),
+            ("calendars", args.calendars_every),
+        )
+        if value is not None
+    }
+    base_currency, cache = None, None
+    if args.currency.lower() != "none":
+        base_currency = args.currency.upper()
+        cache = TTLCache(DEFAULT_CURRENCY_CACHE_PATH, DEFAULT_CURRENCY_TTL)
+    daemon = MarketDataDaemon(
+        portfolio,
+        args.watch or [],
+        max_age=max_age,
+        base_currency=base_currency,
+        currency_cache=cache,
+    )
+    try:
+        asyncio.run(daemon.run(port=args.port, unix_path=args.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_payoff(args):
+    from option_payoff_diagrams import (
+        plot_payoffs,
+        print_stats,
+        render_payoffs,
+        single_leg_strategies,
+    )
+
+    strikes = args.strikes or [args.strike]
+    strategies = {}
+    for strike in strikes:
+        for name, legs in single_leg_strategies(
+            strike, args.spot, args.volatility, args.rate, args.expiry
+        ).items():
+            strategies[name if len(strikes) == 1 else f"{name} K={strike:g}"] = legs
+    print_stats(strategies)
+    if args.output:
+        files = render_payoffs(
+            strategies,
+            args.output,
+            strike=args.strike if len(strikes) == 1 else None,
+            volatility=args.volatility,
+            rate=args.rate,
+            grid=tuple(int(n) for n in args.grid.lower().split("x")),
+            processes=args.processes,
+        )
+        print(
+            f"Rendered {len(strategies)} diagrams to {', '.join(files[:3])}"
+            + (f" and {len(files) - 3} more" if len(files) > 3 else "")
+        )
+    elif args.plot:
+        plot_payoffs(
+            strategies, strike=args.strike, volatility=args.volatility, rate=args.rate
+        )
+
+
+def run_interest(args):
+    if args.years is None:
+        from interest_example import print_interest
+
+        print_interest(args.principal, args.rate, df_bool=not args.plain)
+        return
+
+    from compounding import future_value, scenario_grid, to_frame
+
+    grid = scenario_grid(
+        rate=args.rate_sweep or [args.rate], periods_per_year=[1, 4, 12, 365]
+    )
+    values = future_value(
+        args.principal, **grid, years=args.years, contribution=args.contribution
+    )
+    df = to_frame(grid, values, name="Future Value").pivot(
+        index="rate", columns="periods_per_year", values="Future Value"
+    )
+    df.columns = [f"{m}x/year" for m in df.columns]
+    _print_frame(df.round(2).reset_index())
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="finance_stocks", description="Portfolio and market analysis tools"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="run under cProfile, save the stats to PATH and print the top entries",
+    )
+    parser.add_argument(
+        "--metrics", action="store_true", help="print run metrics when done"
+    )
+    parser.add_argument(
+        "--log-json", metavar="PATH", help="write metrics as JSON lines ('-' = stderr)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    portfolio = commands.add_parser("portfolio", help="value a portfolio")
+    portfolio.add_argument(
+        "--file", help="CSV with ticker, shares and purchase_price columns"
+    )
+    portfolio.add_argument("--output", help="export to .xlsx, .csv or .parquet")
+    portfolio.add_argument("--workers", type=int, default=8)
+    portfolio.add_argument(
+        "--batch-size",
+        type=int,
+        help="tickers per batched price download (0 looks each one up)",
+    )
+    portfolio.add_argument(
+        "--currency",
+        default="USD",
+        help="base currency for values and totals ('none' to skip conversion)",
+    )
+    portfolio.add_argument(
+        "--live", action="store_true", help="keep polling and print changed rows"
+    )
+    portfolio.add_argument(
+        "--interval", type=float, default=60.0, help="seconds between live polls"
+    )
+    portfolio.add_argument("--polls", type=int, help="stop after this many polls")
+    portfolio.set_defaults(run=run_portfolio)
+
+    risk = commands.add_parser("risk", help="VaR and CVaR of a portfolio")
+    risk.add_argument("--file", help="CSV with ticker, shares and purchase_price")
+    risk.add_argument("--confidence", type=float, default=0.99)
+    risk.add_argument("--horizon", type=int, default=1, help="in trading days")
+    risk.add_argument("--paths", type=int, default=100_000, help="Monte Carlo paths")
+    risk.add_argument("--processes", type=int, help="Monte Carlo worker processes")
+    risk.set_defaults(run=run_risk)
+
+    backtest = commands.add_parser("backtest", help="daily value of the book")
+    backtest.add_argument(
+        "--file", help="CSV with ticker, shares, purchase_price and purchase_date"
+    )
+    backtest.add_argument(
+        "--start",
+        type=lambda text: datetime.strptime(text, "%Y-%m-%d"),
+        help="YYYY-MM-DD (defaults to the first purchase)",
+    )
+    backtest.add_argument("--tail", type=int, default=10, help="rows to print")
+    backtest.add_argument("--output", help="write the full series as CSV")
+    backtest.set_defaults(run=run_backtest)
+
+    performance = commands.add_parser("performance", help="returns over horizons")
+    performance.add_argument("symbols", nargs="+")
+    source = performance.add_mutually_exclusive_group()
+    source.add_argument(
+        "--cache-only", action="store_true", help="use stored bars, no downloads"
+    )
+    source.add_argument(
+        "--no-cache", action="store_true", help="download without the history store"
+    )
+    performance.set_defaults(run=run_performance)
+
+    screen = commands.add_parser("screen", help="rank symbols from the screener index")
+    screen.add_argument("--build", metavar="FILE", help="rebuild from a symbols file")
+    screen.add_argument("--index", help="index file (default ~/.finance_stocks)")
+    screen.add_argument("--sort", default="3m", help="column to rank by")
+    screen.add_argument("--top", type=int, default=20)
+    screen.add_argument("--ascending", action="store_true", help="lowest first")
+    screen.add_argument(
+        "--min", action="append", metavar="COLUMN=VALUE", help="lower bound filter"
+    )
+    screen.add_argument(
+        "--max", action="append", metavar="COLUMN=VALUE", help="upper bound filter"
+    )
+    screen.set_defaults(run=run_screen)
+
+    earnings = commands.add_parser("earnings", help="upcoming earnings dates")
+    earnings.add_argument("symbols", nargs="+")
+    earnings.add_argument(
+        "--cache-only", action="store_true", help="use stored calendars, no requests"
+    )
+    earnings.add_argument("--workers", type=int, default=None)
+    earnings.set_defaults(run=run_earnings)
+
+    scan = commands.add_parser("scan", help="resumable earnings scan of a universe")
+    scan.add_argument("universe", help="text file of symbols (e.g. the S&P 500)")
+    scan.add_argument(
+        "--checkpoint", help="file recording finished shards; rerun to resume"
+    )
+    scan.add_argument("--shard-size", type=int, default=100)
+    scan.add_argument("--shards", type=int, default=4, help="shards fetched at once")
+    scan.add_argument("--workers", type=int, default=None)
+    scan.add_argument("--output", help="write the calendar as CSV")
+    scan.set_defaults(run=run_scan)
+
+    daemon = commands.add_parser("daemon", help="serve warm market data locally")
+    daemon.add_argument("--file", help="CSV with ticker, shares and purchase_price")
+    daemon.add_argument("--watch", nargs="+", help="extra symbols to keep warm")
+    daemon.add_argument("--port", type=int, default=8765)
+    daemon.add_argument("--socket", help="listen on this Unix socket instead")
+    daemon.add_argument("--quotes-every", type=float, help="seconds (default 60)")
+    daemon.add_argument("--bars-every", type=float, help="seconds (default 6h)")
+    daemon.add_argument("--calendars-every", type=float, help="seconds (default 12h)")
+    daemon.add_argument(
+        "--currency",
+        default="USD",
+        help="base currency for portfolio values ('none' to skip conversion)",
+    )
+    daemon.set_defaults(run=run_daemon)
+
+    payoff = commands.add_parser("payoff", help="single-leg option payoffs")
+    payoff.add_argument("--strike", type=float, default=100.0)
+    payoff.add_argument("--spot", type=float, default=100.0)
+    payoff.add_argument("--volatility", type=float, default=0.30)
+    payoff.add_argument("--rate", type=float, default=0.04)
+    payoff.add_argument("--expiry", type=float, default=0.25, help="in years")
+    payoff.add_argument("--plot", action="store_true", help="show the diagrams")
+    payoff.add_argument(
+        "--strikes", type=float, nargs="+", help="one set of diagrams per strike"
+    )
+    payoff.add_argument("--output", help="render to .png, .svg or .pdf (headless)")
+    payoff.add_argument("--grid", default="3x3", help="diagrams per page, ROWSxCOLS")
+    payoff.add_argument("--processes", type=int, help="render pages in parallel")
+    payoff.set_defaults(run=run_payoff)
+
+    interest = commands.add_parser("interest", help="simple interest by period")
+    interest.add_argument("--principal", type=float, default=50000.0)
+    interest.add_argument("--rate", type=float, default=0.04)
+    interest.add_argument(
+        "--plain", action="store_true", help="plain text table (no pandas)"
+    )
+    interest.add_argument(
+        "--years", type=float, help="compound over this many years instead"
+    )
+    interest.add_argument(
+        "--contribution", type=float, default=0.0, help="added every period"
+    )
+    interest.add_argument(
+        "--rate-sweep", type=float, nargs="+", help="compare several annual rates"
+    )
+    interest.set_defaults(run=run_interest)
+
+    return parser
+
+
+def run_profiled(args, top=25):
+    """
+    Run a subcommand under cProfile
+
+    cProfile only sees the main thread; time spent in fetch worker threads
+    shows up in the fetch.item timings of --metrics instead.
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(args.run, args)
+    finally:
+        profiler.dump_stats(args.profile)
+        print(f"\nProfile written to {args.profile}")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.log_json:
+        from instrumentation import configure_json_log
+
+        configure_json_log(args.log_json)
+
+    if args.profile:
+        run_profiled(args)
+    else:
+        args.run(args)
+
+    if args.metrics:
+        from instrumentation import get_metrics
+
+        print(get_metrics().report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Vectorized compounding and amortization scenarios
+Every function broadcasts its arguments with NumPy, so one call evaluates
+any number of principal / rate / frequency / contribution / horizon
+combinations; scenario_grid() lays out axes so they broadcast to a full grid
+
+Rates are annual and nominal, compounded `periods_per_year` times a year.
+Contributions and loan payments are made at the end of each period.
+"""
+
+import numpy as np
+
+
+def scenario_grid(**axes):
+    """
+    Reshape 1-D axes so that together they broadcast to every combination
+
+    Example:
+        grid = scenario_grid(principal=[1e4, 5e4], rate=np.linspace(0, 0.1, 101))
+        future_value(**grid, periods_per_year=12, years=10)  # shape (2, 101)
+
+    Returns:
+        dict: axis name -> array with that axis on its own dimension
+    """
+    n = len(axes)
+    grid = {}
+    for position, (name, values) in enumerate(axes.items()):
+        shape = [1] * n
+        shape[position] = -1
+        grid[name] = np.asarray(values).reshape(shape)
+    return grid
+
+
+def _growth_factor(rate, periods_per_year, periods):
+    """(1 + r/m)^n and r/m"""
+    periodic = np.asarray(rate, dtype=float) / periods_per_year
+    return np.power(1 + periodic, periods), periodic
+
+
+def _full_shape(*values, periods):
+    """Broadcast shape of all scenario arguments, plus a trailing period axis"""
+    return np.broadcast_shapes(*(np.shape(value) for value in values)) + (periods,)
+
+
+def _annuity_factor(growth, periodic, periods):
+    """Sum of (1 + r/m)^k for k < n, which is n itself at a zero rate"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(periodic == 0, periods, (growth - 1) / periodic)
+
+
+def future_value(principal, rate, periods_per_year=12, years=1, contribution=0.0):
+    """
+    Balance after `years` of compounding with a contribution every period
+
+    Returns:
+        numpy.ndarray: float64 balances, broadcast over all arguments
+    """
+    periods = np.floor(np.asarray(years, dtype=float) * periods_per_year)
+    growth, periodic = _growth_factor(rate, periods_per_year, periods)
+    return principal * growth + contribution * _annuity_factor(
+        growth, periodic, periods
+    )
+
+
+def growth_schedule(
+    principal, rate, periods_per_year=12, years=1, contribution=0.0, dtype=float
+):
+    """
+    Balance at the end of every period
+
+    Scenarios share one period axis as long as the longest horizon; periods
+    past a scenario's own horizon are NaN.
+
+    Args:
+        dtype: float32 halves the memory of large sweeps
+
+    Returns:
+        numpy.ndarray: balances with shape scenario_shape + (periods,)
+    """
+    periods_per_year = np.asarray(periods_per_year)
+    horizon = np.floor(np.asarray(years, dtype=float) * periods_per_year)
+    k = np.arange(1, int(horizon.max()) + 1, dtype=dtype)
+
+    shape = _full_shape(
+        principal, rate, periods_per_year, years, contribution, periods=len(k)
+    )
+
+    expand = lambda value: np.asarray(value)[..., None]  # noqa: E731
+    growth, periodic = _growth_factor(expand(rate), expand(periods_per_year), k)
+    # Fill in place, so only arrays without the principal axis are temporary
+    balances = np.empty(shape, dtype=dtype)
+    balances[...] = expand(principal) * growth
+    balances += expand(contribution) * _annuity_factor(growth, periodic, k)
+    balances[np.broadcast_to(k > expand(horizon), shape)] = np.nan
+    return balances
+
+
+def payment(principal, rate, periods_per_year=12, years=1):
+    """Level payment per period that repays a loan over `years`"""
+    periods = np.floor(np.asarray(years, dtype=float) * periods_per_year)
+    growth, periodic = _growth_factor(rate, periods_per_year, periods)
+    return principal * growth / _annuity_factor(growth, periodic, periods)
+
+
+def amortization_schedule(principal, rate, periods_per_year=12, years=1, dtype=float):
+    """
+    Interest, principal repaid and remaining balance for every payment
+
+    Returns:
+        dict: 'payment' (per scenario) and 'interest', 'principal',
+        'balance' with shape scenario_shape + (periods,), NaN past each
+        loan's term
+    """
+    periods_per_year = np.asarray(periods_per_year)
+    term = np.floor(np.asarray(years, dtype=float) * periods_per_year)
+    pmt = payment(principal, rate, periods_per_year, years)
+    k = np.arange(int(term.max()) + 1, dtype=dtype)
+    shape = _full_shape(principal, rate, periods_per_year, years, periods=len(k))
+
+    expand = lambda value: np.asarray(value)[..., None]  # noqa: E731
+    growth, periodic = _growth_factor(expand(rate), expand(periods_per_year), k)
+    # Balance after k payments, for k = 0 .. longest term
+    balance = np.empty(shape)
+    balance[...] = expand(principal) * growth - expand(pmt) * _annuity_factor(
+        growth, periodic, k
+    )
+    balance[np.broadcast_to(k > expand(term), shape)] = np.nan
+
+    # Payment k + 1 is only made while k + 1 is within the loan's term
+    paid = k[1:] <= expand(term)
+    interest = np.where(paid, balance[..., :-1] * periodic, np.nan)
+    schedule = {
+        "payment": pmt,
+        "interest": interest,
+        "principal": np.where(paid, expand(pmt) - interest, np.nan),
+        "balance": balance[..., 1:],
+    }
+    return {name: value.astype(dtype, copy=False) for name, value in schedule.items()}
+
+
+def to_frame(grid, values, name="value", period_axis=False):
+    """
+    Tidy DataFrame with one row per scenario (and per period if requested)
+
+    Args:
+        grid (dict): Axes as passed to scenario_grid(), 1-D
+        values (numpy.ndarray): Results over the grid (plus a trailing
+            period axis when period_axis=True)
+        name (str): Column name for the values
+        period_axis (bool): values has a trailing period dimension
+
+    Returns:
+        pandas.DataFrame: one column per axis, then 'period' and `name`
+    """
+    import pandas as pd
+
+    axes = {key: np.asarray(value).ravel() for key, value in grid.items()}
+    if period_axis:
+        axes["period"] = np.arange(1, values.shape[-1] + 1)
+    shape = tuple(len(v) for v in axes.values())
+    values = np.broadcast_to(values, shape)
+    index = pd.MultiIndex.from_product(list(axes.values()), names=list(axes))
+    return pd.DataFrame({name: values.ravel()}, index=index).reset_index()
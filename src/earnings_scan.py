@@ -0,0 +1,241 @@
+"""
+Universe-wide earnings scan
+Splits an index-sized symbol list into shards, fetches shards on a worker
+pool, and appends every finished shard to a checkpoint file, so an
+interrupted scan resumes where it stopped. Results are merged into a
+date-sorted calendar as each shard completes.
+"""
+
+import bisect
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime
+
+from instrumentation import metrics
+from market_data import chunked, fetch_calendars
+from ttl_cache import MISSING
+
+DEFAULT_SHARD_SIZE = 100
+
+# Shards fetched at the same time; every shard shares the provider's rate
+# limiter, so more shards only help while requests are waiting on latency
+DEFAULT_SHARD_WORKERS = 4
+
+
+def read_symbols(path):
+    """Symbols from a text file: whitespace or comma separated, '#' comments"""
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].replace(",", " ")
+            symbols.extend(s.strip().upper() for s in line.split())
+    return list(dict.fromkeys(symbols))
+
+
+def next_earnings_date(calendar):
+    """
+    First earnings date in a provider calendar
+
+    Returns:
+        datetime.date or None
+    """
+    if not calendar or "Earnings Date" not in calendar:
+        return None
+    value = calendar["Earnings Date"]
+    if isinstance(value, (list, tuple)) or hasattr(value, "tolist"):
+        value = list(value)[0] if len(value) else None
+    if isinstance(value, datetime):
+        return value.date()
+    if hasattr(value, "to_pydatetime"):
+        return value.to_pydatetime().date()
+    return value
+
+
+def load_checkpoint(path):
+    """
+    Shards already written to a checkpoint file
+
+    A line cut short by a crash is ignored, so that shard is fetched again.
+
+    Returns:
+        list: one dict per finished shard with 'symbols', 'rows' and 'errors'
+    """
+    shards = []
+    if not os.path.exists(path):
+        return shards
+    with open(path) as f:
+        for line in f:
+            try:
+                shard = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            for row in shard["rows"]:
+                row["Earnings Date"] = date.fromisoformat(row["Earnings Date"])
+            shards.append(shard)
+    return shards
+
+
+def _drop_partial_line(path):
+    """Cut a line left unfinished by a crash, so new shards start on a fresh line"""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def _append_checkpoint(f, symbols, rows, errors):
+    record = {
+        "symbols": symbols,
+        "rows": [
+            {"Symbol": r["Symbol"], "Earnings Date": r["Earnings Date"].isoformat()}
+            for r in rows
+        ],
+        "errors": errors,
+    }
+    f.write(json.dumps(record) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _scan_shard(symbols, cached, max_workers):
+    """Rows, errors and newly fetched calendars for one shard"""
+    pending = [s for s in symbols if s not in cached]
+    with metrics.timer("scan.shard", symbols=len(pending)):
+        fetched, errors = fetch_calendars(pending, max_workers=max_workers)
+    rows = []
+    for symbol in symbols:
+        calendar = cached[symbol] if symbol in cached else fetched.get(symbol)
+        earnings_date = next_earnings_date(calendar)
+        if earnings_date is not None:
+            rows.append({"Symbol": symbol, "Earnings Date": earnings_date})
+    return rows, errors, fetched
+
+
+def iter_universe_scan(
+    symbols,
+    checkpoint=None,
+    shard_size=DEFAULT_SHARD_SIZE,
+    shard_workers=DEFAULT_SHARD_WORKERS,
+    max_workers=None,
+    cache=None,
+):
+    """
+    Fetch earnings dates shard by shard, yielding each shard as it finishes
+
+    Shards recorded in `checkpoint` are yielded first without any request,
+    restricted to the symbols in `symbols` (a checkpoint written for another
+    universe contributes only the symbols the two share); only the remaining
+    symbols are fetched, and each finished shard is appended to the
+    checkpoint before it is yielded.
+
+    Args:
+        symbols (list): Universe to scan (e.g. every S&P 500 ticker)
+        checkpoint (str): Path of the JSON-lines checkpoint file (optional)
+        shard_size (int): Symbols per shard
+        shard_workers (int): Shards fetched at the same time
+        max_workers (int): Concurrent requests within each shard
+        cache (TTLCache): Optional per-symbol calendar cache
+
+    Yields:
+        tuple: (symbols, rows, errors) for one shard - rows are dicts with
+        'Symbol' and 'Earnings Date', errors maps symbol -> message
+    """
+    done = set()
+    if checkpoint:
+        _drop_partial_line(checkpoint)
+        universe = set(symbols)
+        for shard in load_checkpoint(checkpoint):
+            # Symbols that failed are fetched again, and symbols no longer in
+            # the universe are left out
+            scanned = [
+                s
+                for s in shard["symbols"]
+                if s in universe and s not in shard["errors"] and s not in done
+            ]
+            if not scanned:
+                continue
+            kept = set(scanned)
+            done.update(scanned)
+            yield scanned, [r for r in shard["rows"] if r["Symbol"] in kept], {}
+        if done:
+            print(f"Resuming scan: {len(done)} symbols already checkpointed")
+
+    shards = chunked([s for s in symbols if s not in done], shard_size)
+    if not shards:
+        return
+
+    # The cache is only touched from this thread; shard workers just fetch
+    cached = {}
+    if cache is not None:
+        for shard in shards:
+            for symbol in shard:
+                calendar = cache.get(symbol)
+                if calendar is not MISSING:
+                    cached[symbol] = calendar
+
+    f = open(checkpoint, "a") if checkpoint else None
+    pool = ThreadPoolExecutor(max_workers=max(1, min(shard_workers, len(shards))))
+    try:
+        futures = {
+            pool.submit(_scan_shard, shard, cached, max_workers): shard
+            for shard in shards
+        }
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                shard = futures[future]
+                rows, errors, fetched = future.result()
+                if cache is not None and fetched:
+                    cache.set_many(fetched)
+                if f is not None:
+                    _append_checkpoint(f, shard, rows, errors)
+                yield shard, rows, errors
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        if f is not None:
+            f.close()
+
+
+def scan_universe(symbols, checkpoint=None, on_shard=None, **options):
+    """
+    Earnings calendar for a whole universe, resumable from a checkpoint
+
+    Every finished shard is inserted into a calendar that is always sorted
+    by date, so partial results can be shown while the scan runs.
+
+    Args:
+        symbols (list): Universe to scan
+        checkpoint (str): Path of the checkpoint file (optional)
+        on_shard (callable): Called as on_shard(scanned, total, calendar)
+            after each shard; `calendar` is the sorted list of rows so far
+        **options: shard_size, shard_workers, max_workers and cache, as for
+            iter_universe_scan()
+
+    Returns:
+        DataFrame: Sorted earnings calendar with Symbol, Earnings Date and
+        Date ('dd-mm-yyyy') columns
+    """
+    import pandas as pd
+
+    total = len(dict.fromkeys(symbols))
+    calendar, keys, scanned = [], [], 0
+    for shard, rows, errors in iter_universe_scan(symbols, checkpoint, **options):
+        scanned += len(shard)
+        for symbol, error in errors.items():
+            print(f"Error processing {symbol}: {error}")
+        for row in rows:
+            key = (row["Earnings Date"], row["Symbol"])
+            i = bisect.bisect(keys, key)
+            keys.insert(i, key)
+            calendar.insert(i, row)
+        print(f"Scanned {scanned}/{total} symbols, {len(calendar)} dates found")
+        if on_shard is not None:
+            on_shard(scanned, total, calendar)
+
+    df = pd.DataFrame(calendar, columns=["Symbol", "Earnings Date"])
+    df["Date"] = [d.strftime("%d-%m-%Y") for d in df["Earnings Date"]]
+    return df
@@ -0,0 +1,429 @@
+"""
+Bounded worker-pool fetching for market data lookups
+Applies per-provider concurrency and rate limits, per-request timeouts,
+jittered retries, circuit breaking and optional hedged requests, and keeps
+results in input order
+"""
+
+import random
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from http.client import HTTPException
+
+from instrumentation import metrics
+
+# Default limits per data provider: pool size, sustained request rate and
+# burst, seconds before a request is abandoned, and seconds before a slow
+# request is duplicated (None disables hedging)
+PROVIDER_LIMITS = {
+    "yahoo": {
+        "max_workers": 8,
+        "calls_per_second": 4.0,
+        "burst": 8,
+        "timeout": 30.0,
+        "hedge_after": None,
+    },
+}
+
+# Retries allowed per item after a transient error (throttling, connection
+# failure); waits are drawn from [0, min(max, base * 2**attempt)]. A request
+# abandoned at its timeout is not retried: it already took the full timeout
+THROTTLE_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Consecutive transient failures that open a provider's circuit, and the
+# seconds it stays open before a trial request is let through
+BREAKER_THRESHOLD = 5
+BREAKER_RESET_AFTER = 30.0
+
+
+class FetchTimeout(TimeoutError):
+    """A request got no response within its timeout"""
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider has failed repeatedly, so requests fail fast for a while"""
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter that slows down when the provider throttles
+
+    Tokens refill at `rate` per second up to `capacity`. Each throttling
+    error halves the rate (down to `min_rate`); each success restores a
+    little of it, until the configured rate is reached again.
+    """
+
+    def __init__(self, calls_per_second, capacity=None, min_rate=0.1):
+        self.base_rate = calls_per_second or 0.0
+        self.rate = self.base_rate
+        self.capacity = capacity or max(1.0, self.base_rate)
+        self.min_rate = min(min_rate, self.base_rate) if self.base_rate else 0.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        if not self.base_rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+    def throttled(self):
+        """Record a throttling error: halve the rate and drain the bucket"""
+        if not self.base_rate:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+
+    def succeeded(self):
+        """Record a success: recover a tenth of the configured rate"""
+        if not self.base_rate or self.rate >= self.base_rate:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+
+def is_throttling_error(error):
+    """True if an exception looks like the provider rejecting our request rate"""
+    text = f"{type(error).__name__} {error}".lower()
+    markers = ("ratelimit", "rate limit", "too many requests", "429")
+    return any(marker in text for marker in markers)
+
+
+def is_transient_error(error):
+    """
+    True for failures worth retrying: throttling, timeouts, connection and
+    socket errors, and HTTP 5xx responses. Other OSErrors (a missing file,
+    a permission error) are not the provider's fault and fail at once.
+    """
+    if is_throttling_error(error) or isinstance(
+        error, (TimeoutError, ConnectionError, socket.gaierror, HTTPException)
+    ):
+        return True
+    # requests and curl_cffi raise their own ConnectionError and Timeout types
+    # (subclasses of OSError, not of the builtins)
+    if type(error).__name__ in ("ConnectionError", "Timeout", "ReadTimeout"):
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff, so retrying workers spread out"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+class CircuitBreaker:
+    """
+    Fails fast once a provider looks down
+
+    After `threshold` consecutive transient failures the circuit opens and
+    every call raises CircuitOpenError for `reset_after` seconds. Then one
+    trial call is let through: success closes the circuit, failure opens
+    it again.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_after=BREAKER_RESET_AFTER):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_after:
+            return "open"
+        return "half-open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return
+        raise CircuitOpenError("provider circuit is open, failing fast")
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                if self.opened_at is None or self._trial:
+                    metrics.increment("fetch.circuit_opened")
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+_limiters = {}
+_breakers = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider="yahoo"):
+    """Return the limiter shared by every pool talking to `provider`"""
+    with _limiters_lock:
+        if provider not in _limiters:
+            limits = PROVIDER_LIMITS.get(provider, {})
+            _limiters[provider] = TokenBucket(
+                limits.get("calls_per_second"), capacity=limits.get("burst")
+            )
+        return _limiters[provider]
+
+
+def get_circuit_breaker(provider="yahoo"):
+    """Return the circuit breaker shared by every pool talking to `provider`"""
+    with _limiters_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker()
+        return _breakers[provider]
+
+
+def _start_call(fn, *args):
+    """
+    Run `fn(*args)` on a new daemon thread and return its Future
+
+    The call starts at once, so its timeout covers only the call itself, and
+    an abandoned call that never returns holds no slot in any pool.
+    """
+    future = Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+
+def _first_success(futures, timeout):
+    """
+    Result of the first future to succeed
+
+    Raises:
+        FetchTimeout: nothing succeeded within `timeout` seconds
+        Exception: the last error, if every future failed
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending, error = set(futures), None
+    while pending:
+        remaining = None if deadline is None else max(0, deadline - time.monotonic())
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            raise FetchTimeout(f"no response within {timeout:g}s")
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def iter_fetch(
+    fetch,
+    items,
+    provider="yahoo",
+    max_workers=None,
+    timeout=None,
+    hedge_after=None,
+    deadline=None,
+):
+    """
+    Run `fetch(item)` for every item and yield outcomes as they complete
+
+    Each request is abandoned after `timeout` seconds, counted from when it
+    starts rather than from when its item was queued. Transient failures
+    are retried with jittered exponential backoff, and a provider that
+    keeps failing trips its circuit breaker, so later items fail fast.
+    With `hedge_after`, a request still running after that many seconds is
+    sent a second time and the first answer wins.
+
+    Args:
+        fetch (callable): Function taking one item and returning its result
+        items (list): Items to fetch (e.g. ticker symbols)
+        provider (str): Key into PROVIDER_LIMITS for concurrency, rate
+            limits, timeout and hedging defaults
+        max_workers (int): Pool size, capped at the provider's limit
+        timeout (float): Seconds per request (provider default if None, no
+            timeout if 0)
+        hedge_after (float): Seconds before hedging (provider default if
+            None, no hedging if 0)
+        deadline (float): Seconds for the whole run; items still unfinished
+            then are yielded as FetchTimeout errors
+
+    Yields:
+        tuple: (index, item, result, error) - error is None on success
+    """
+    items = list(items)
+    limits = PROVIDER_LIMITS.get(provider, {})
+    workers = max_workers or limits.get("max_workers", 4)
+    if "max_workers" in limits:
+        workers = min(workers, limits["max_workers"])
+    workers = max(1, min(workers, len(items) or 1))
+    timeout = timeout if timeout is not None else limits.get("timeout")
+    hedge_after = hedge_after if hedge_after is not None else limits.get("hedge_after")
+    limiter = get_rate_limiter(provider)
+    breaker = get_circuit_breaker(provider)
+
+    def timed(item):
+        with metrics.timer("fetch.item", provider=provider, item=str(item)):
+            return fetch(item)
+
+    def attempt(item):
+        limiter.acquire()
+        if not timeout and not hedge_after:
+            return timed(item)
+        # Each request gets its own thread so a hung one can be abandoned
+        futures = [_start_call(timed, item)]
+        if hedge_after and (timeout is None or hedge_after < timeout):
+            done, _ = wait(futures, timeout=hedge_after)
+            if not done:
+                limiter.acquire()
+                metrics.increment("fetch.hedged", provider=provider, item=str(item))
+                futures.append(_start_call(timed, item))
+                return _first_success(
+                    futures, None if timeout is None else timeout - hedge_after
+                )
+        return _first_success(futures, timeout)
+
+    def run(item):
+        for retry in range(THROTTLE_RETRIES + 1):
+            breaker.before_call()
+            try:
+                result = attempt(item)
+            except FetchTimeout:
+                # One failure for the provider; retrying would wait it out again
+                breaker.failure()
+                raise
+            except Exception as e:
+                if not is_transient_error(e):
+                    # The provider answered; only this item is bad
+                    breaker.success()
+                    raise
+                breaker.failure()
+                if is_throttling_error(e):
+                    limiter.throttled()
+                if retry == THROTTLE_RETRIES:
+                    raise
+                metrics.increment("fetch.retries", provider=provider, item=str(item))
+                time.sleep(backoff_delay(retry))
+                continue
+            breaker.success()
+            limiter.succeeded()
+            return result
+
+    if workers == 1 and deadline is None:
+        # Nothing to overlap or abandon, so skip the pool
+        for i, item in enumerate(items):
+            try:
+                result = run(item)
+            except Exception as e:
+                yield i, item, None, e
+            else:
+                yield i, item, result, None
+        return
+
+    runner = ThreadPoolExecutor(max_workers=workers)
+    futures = {runner.submit(run, item): i for i, item in enumerate(items)}
+    pending = set(futures)
+    try:
+        try:
+            for future in _as_completed(futures, deadline):
+                pending.discard(future)
+                i = futures[future]
+                error = future.exception()
+                yield i, items[i], None if error else future.result(), error
+        except FetchTimeout as e:
+            # Report what finished meanwhile; everything else timed out
+            for future in pending:
+                i = futures[future]
+                if future.done() and future.exception() is None:
+                    yield i, items[i], future.result(), None
+                else:
+                    future.cancel()
+                    yield i, items[i], None, future.exception() if future.done() else e
+    finally:
+        # Do not wait for abandoned requests
+        runner.shutdown(wait=False, cancel_futures=True)
+
+
+def _as_completed(futures, deadline):
+    """Like concurrent.futures.as_completed, raising FetchTimeout at the deadline"""
+    end = None if deadline is None else time.monotonic() + deadline
+    pending = set(futures)
+    while pending:
+        remaining = None if end is None else max(0, end - time.monotonic())
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            raise FetchTimeout(f"run deadline of {deadline:g}s reached")
+        yield from done
+
+
+def fetch_concurrently(fetch, items, provider="yahoo", max_workers=None, **options):
+    """
+    Run `fetch(item)` for every item on a bounded thread pool
+
+    Args:
+        fetch (callable): Function taking one item and returning its result
+        items (list): Items to fetch (e.g. ticker symbols)
+        provider (str): Key into PROVIDER_LIMITS for concurrency and rate limits;
+            throttling errors slow the provider's shared limiter and are retried
+        max_workers (int): Pool size, capped at the provider's limit
+        **options: timeout, hedge_after and deadline, as for iter_fetch()
+
+    Returns:
+        tuple: (results, errors) - results is a list aligned with `items`
+        (None where the fetch failed), errors maps item -> error message
+    """
+    items = list(items)
+    results = [None] * len(items)
+    errors = {}
+    for i, item, result, error in iter_fetch(
+        fetch, items, provider=provider, max_workers=max_workers, **options
+    ):
+        if error is None:
+            results[i] = result
+        else:
+            errors[item] = str(error)
+            metrics.increment("fetch.errors", provider=provider, item=str(item))
+    return results, errors
@@ -0,0 +1,202 @@
+"""
+Currency metadata and FX conversion
+Looks up each ticker's quote currency once (normalizing minor units such as
+GBp to their major currency), fetches every FX pair a run needs in one
+batched download, and converts whole price arrays with a single multiply
+"""
+
+import math
+import os
+
+import numpy as np
+
+from fetch_pool import fetch_concurrently
+from instrumentation import metrics
+from market_data import caches_bypassed, fetch_last_prices, get_provider, now
+from ttl_cache import MISSING
+
+BASE_CURRENCY = "USD"
+
+DEFAULT_CURRENCY_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".finance_stocks", "currency.sqlite"
+)
+
+# A listing's currency practically never changes, so keep it for 30 days
+DEFAULT_CURRENCY_TTL = 30 * 24 * 60 * 60
+
+# FX rates are reused for every lookup within the same bucket of this many seconds
+FX_BUCKET_SECONDS = 15 * 60
+
+# Minor-unit quote currencies: code -> (major currency, major units per minor unit)
+MINOR_UNITS = {
+    "GBp": ("GBP", 0.01),
+    "GBX": ("GBP", 0.01),
+    "ZAc": ("ZAR", 0.01),
+    "ILA": ("ILS", 0.01),
+}
+
+
+def normalize_currency(code):
+    """
+    Split a quote currency into its major currency and unit scale
+
+    Returns:
+        tuple: (major currency, scale) - e.g. ('GBP', 0.01) for 'GBp'
+    """
+    if code in MINOR_UNITS:
+        return MINOR_UNITS[code]
+    return code.upper(), 1.0
+
+
+def fx_symbol(currency, base=BASE_CURRENCY):
+    """Yahoo ticker quoting one unit of `currency` in `base`, e.g. 'GBPUSD=X'"""
+    return f"{currency}{base}=X"
+
+
+def fetch_currencies(symbols, max_workers=None, cache=None, provider=None):
+    """
+    Quote currency of each symbol, as reported by the provider
+
+    Works like market_data.fetch_calendars: with a TTLCache only symbols that
+    are not cached go to the network, and the cache is ignored while
+    recording or replaying.
+
+    Returns:
+        tuple: (currencies, errors) keyed by symbol; symbols whose currency
+        could not be found are left out of `currencies`
+    """
+    provider = provider or get_provider()
+    if caches_bypassed(provider):
+        cache = None
+    currencies = {}
+    if cache is not None:
+        for symbol in dict.fromkeys(symbols):
+            cached = cache.get(symbol)
+            if cached is not MISSING:
+                currencies[symbol] = cached
+
+    def fetch(symbol):
+        currency = (provider.info(symbol) or {}).get("currency")
+        if not currency:
+            raise LookupError("no currency available")
+        return currency
+
+    pending = [s for s in dict.fromkeys(symbols) if s not in currencies]
+    results, errors = fetch_concurrently(
+        fetch, pending, provider=provider.name, max_workers=max_workers
+    )
+    fetched = {
+        symbol: result
+        for symbol, result in zip(pending, results)
+        if symbol not in errors
+    }
+    if cache is not None and fetched:
+        cache.set_many(fetched)
+    currencies.update(fetched)
+    return currencies, errors
+
+
+class FXRates:
+    """
+    Latest FX rates, cached per time bucket
+
+    Every pair missing from the current bucket is fetched in one batched
+    download, so a run asks for each pair once however many lots need it.
+    Buckets follow market_data.now(), so replayed runs reuse recorded rates.
+    """
+
+    def __init__(self, bucket_seconds=FX_BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self._rates = {}
+
+    def _bucket(self):
+        return int(now().timestamp() // self.bucket_seconds)
+
+    def rates(self, currencies, base=BASE_CURRENCY):
+        """
+        Units of `base` per unit of each (major) currency
+
+        Returns:
+            dict: currency -> rate; NaN where no rate could be fetched
+        """
+        bucket = self._bucket()
+        wanted = set(currencies) - {base}
+        pending = sorted(c for c in wanted if (c, base, bucket) not in self._rates)
+        metrics.increment("cache.fx.hit", len(wanted) - len(pending))
+        if pending:
+            metrics.increment("cache.fx.miss", len(pending))
+            closes = fetch_last_prices([fx_symbol(c, base) for c in pending])
+            for currency in pending:
+                rate = closes.get(fx_symbol(currency, base), math.nan)
+                if math.isnan(rate):
+                    print(f"No FX rate for {currency}/{base}")
+                self._rates[(currency, base, bucket)] = rate
+        rates = {c: self._rates[(c, base, bucket)] for c in wanted}
+        rates[base] = 1.0
+        return rates
+
+    def clear(self):
+        self._rates = {}
+
+
+fx_rates = FXRates()
+
+
+def conversion_factors(currencies, base=BASE_CURRENCY, rates=None):
+    """
+    Multipliers taking amounts quoted in `currencies` into `base`
+
+    Each distinct currency is resolved once and the result is broadcast
+    back, so converting n amounts is a single array multiply.
+
+    Args:
+        currencies (array-like): Quote currency of each amount ('GBp', 'USD',
+            ...), or None where it is unknown
+        base (str): Currency to convert into
+        rates (FXRates): Rate cache (defaults to the process-wide one)
+
+    Returns:
+        tuple: (quote, major) float64 arrays aligned with `currencies` -
+        `quote` converts prices as quoted (pence for 'GBp'), `major` converts
+        amounts already in the major currency (pounds); NaN where no rate or
+        no currency
+    """
+    currencies = np.array([c or "" for c in currencies], dtype=object).astype(str)
+    unique, codes = np.unique(currencies, return_inverse=True)
+    majors, scales = [], []
+    for code in unique:
+        major, scale = normalize_currency(code) if code else (None, math.nan)
+        majors.append(major)
+        scales.append(scale)
+    rate = (rates or fx_rates).rates([m for m in majors if m], base)
+    major = np.array([rate[m] if m else math.nan for m in majors], dtype=float)
+    quote = major * np.array(scales, dtype=float)
+    return quote[codes], major[codes]
+
+
+def listing_conversion(
+    symbols, base=BASE_CURRENCY, max_workers=None, cache=None, rates=None
+):
+    """
+    Quote currency of each symbol and the factors converting it into `base`
+
+    Symbols whose currency cannot be found have no currency (None) and NaN
+    factors, so they are left unvalued rather than guessed to be in `base`.
+
+    Args:
+        symbols (list): Ticker symbols
+        base (str): Currency to convert into
+        max_workers (int): Concurrent currency lookups
+        cache (TTLCache): Optional cache of each symbol's quote currency
+        rates (FXRates): Rate cache (defaults to the process-wide one)
+
+    Returns:
+        tuple: (currencies, quote, major) aligned with `symbols` - see
+        conversion_factors() for the two factor arrays
+    """
+    found, unknown = fetch_currencies(symbols, max_workers=max_workers, cache=cache)
+    for symbol in unknown:
+        print(f"Unknown currency for {symbol}, leaving it unvalued")
+    currencies = [found.get(symbol) for symbol in symbols]
+    quote, major = conversion_factors(currencies, base, rates)
+    return currencies, quote, major
@@ -0,0 +1,230 @@
+"""
+Persistent daily OHLCV history store
+Keeps one SQLite table of bars keyed by symbol and date, so repeated runs only
+download the bars that are missing since the last stored date
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from instrumentation import metrics
+from market_data import caches_bypassed, download_histories
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".finance_stocks", "history.sqlite"
+)
+
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def _fetch_batched(symbols, start, end):
+    """Default fetcher: daily bars for [start, end) in multi-ticker batches"""
+    return download_histories(symbols, start=start, end=end)
+
+
+class HistoryCache:
+    """
+    SQLite-backed store of daily bars
+
+    Yahoo back-adjusts prices for splits and dividends, so when a fetch
+    returns a new corporate action the stored history for that symbol is
+    dropped and downloaded again in full.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, fetch=None):
+        self.path = path
+        self.fetch = fetch or _fetch_batched
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS bars (
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (symbol, date)
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                symbol TEXT PRIMARY KEY,
+                first_date TEXT NOT NULL,
+                last_date TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            """
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def coverage(self, symbol):
+        """Return (first_date, last_date, updated_at) for a symbol, or None"""
+        row = self.conn.execute(
+            "SELECT first_date, last_date, updated_at FROM meta WHERE symbol = ?",
+            (symbol,),
+        ).fetchone()
+        if row is None:
+            return None
+        return tuple(datetime.fromisoformat(value) for value in row)
+
+    def load(self, symbol, start=None, end=None):
+        """Read stored bars for a symbol as a DataFrame indexed by naive date"""
+        query = "SELECT date, open, high, low, close, volume FROM bars WHERE symbol = ?"
+        params = [symbol]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(start.strftime("%Y-%m-%d"))
+        if end is not None:
+            query += " AND date <= ?"
+            params.append(end.strftime("%Y-%m-%d"))
+        rows = self.conn.execute(query + " ORDER BY date", params).fetchall()
+        df = pd.DataFrame(rows, columns=["Date"] + BAR_COLUMNS)
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df.set_index("Date")
+
+    def store(self, symbol, hist, replace=False, covered_from=None):
+        """
+        Upsert bars for a symbol (dropping what was stored first if `replace`)
+
+        `covered_from` records the start of the requested range, so symbols
+        listed after that date are not treated as missing older bars. An
+        empty or missing `hist` (a failed download) leaves the store as it is,
+        even with `replace`.
+        """
+        hist = _normalize(hist)
+        if hist.empty:
+            return
+        with self.conn:
+            if replace:
+                self.conn.execute("DELETE FROM bars WHERE symbol = ?", (symbol,))
+                self.conn.execute("DELETE FROM meta WHERE symbol = ?", (symbol,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (symbol, date.strftime("%Y-%m-%d"), *map(float, values))
+                    for date, values in zip(
+                        hist.index, hist[BAR_COLUMNS].itertuples(index=False)
+                    )
+                ],
+            )
+            first, last = hist.index[0], hist.index[-1]
+            if covered_from is not None:
+                first = min(first, pd.Timestamp(covered_from).normalize())
+            existing = None if replace else self.coverage(symbol)
+            if existing is not None:
+                first, last = min(first, existing[0]), max(last, existing[1])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?, ?, ?)",
+                (
+                    symbol,
+                    first.strftime("%Y-%m-%d"),
+                    last.strftime("%Y-%m-%d"),
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+
+    def invalidate(self, symbol=None):
+        """Drop stored history for one symbol, or for every symbol if None"""
+        with self.conn:
+            if symbol is None:
+                self.conn.execute("DELETE FROM bars")
+                self.conn.execute("DELETE FROM meta")
+            else:
+                self.conn.execute("DELETE FROM bars WHERE symbol = ?", (symbol,))
+                self.conn.execute("DELETE FROM meta WHERE symbol = ?", (symbol,))
+
+    def get_history(self, symbol, start, end, max_age=None):
+        """Return daily bars for one symbol (see get_histories)"""
+        return self.get_histories([symbol], start, end, max_age=max_age)[symbol]
+
+    def get_histories(self, symbols, start, end, max_age=None):
+        """
+        Return daily bars for [start, end], downloading only what is missing
+
+        Symbols that need the same kind of refresh are fetched together, so a
+        warm store costs one batched request for the latest bars. While a run
+        is recorded or replayed the store is left alone and every bar is
+        fetched through a throwaway in-memory store.
+
+        Args:
+            symbols (list): Ticker symbols
+            start, end (datetime): Requested date range
+            max_age (timedelta): Serve straight from the store if it was
+                refreshed more recently than this
+
+        Returns:
+            dict: symbol -> OHLCV DataFrame indexed by naive date
+        """
+        if caches_bypassed():
+            scratch = HistoryCache(":memory:", fetch=self.fetch)
+            try:
+                return scratch._get_histories(symbols, start, end)
+            finally:
+                scratch.close()
+        return self._get_histories(symbols, start, end, max_age)
+
+    def _get_histories(self, symbols, start, end, max_age=None):
+        full, stale = {}, {}
+        for symbol in dict.fromkeys(symbols):
+            coverage = self.coverage(symbol)
+            if coverage is None or start < coverage[0]:
+                # Nothing stored yet, or the request reaches further back
+                full[symbol] = start
+            elif max_age is None or datetime.now() - coverage[2] > max_age:
+                stale[symbol] = coverage
+
+        if stale:
+            # Re-fetch from the last stored bar, which may have been partial
+            since = min(coverage[1] for coverage in stale.values())
+            new_bars = self.fetch(list(stale), since, end)
+            for symbol, coverage in stale.items():
+                bars = new_bars.get(symbol)
+                if bars is None:
+                    continue
+                if _has_corporate_action(bars, after=coverage[1]):
+                    print(f"Corporate action for {symbol}, refreshing stored history")
+                    full[symbol] = min(start, coverage[0])
+                else:
+                    self.store(symbol, bars)
+
+        # Hits are served from the store alone; refreshed symbols fetched
+        # their latest bars, and misses (including corporate actions) refetch
+        refreshed = sum(1 for symbol in stale if symbol not in full)
+        served = len(dict.fromkeys(symbols)) - len(full) - refreshed
+        metrics.increment("cache.history.hit", served)
+        metrics.increment("cache.history.miss", len(full))
+        metrics.increment("cache.history.refresh", refreshed)
+
+        if full:
+            full_start = min(full.values())
+            fetched = self.fetch(list(full), full_start, end)
+            for symbol in full:
+                self.store(
+                    symbol, fetched.get(symbol), replace=True, covered_from=full_start
+                )
+
+        return {symbol: self.load(symbol, start, end) for symbol in symbols}
+
+
+def _normalize(hist):
+    """Strip timezones and intraday times so bars key on the trading date"""
+    if hist is None or hist.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS, index=pd.DatetimeIndex([]))
+    hist = hist.copy()
+    if hist.index.tz is not None:
+        hist.index = hist.index.tz_localize(None)
+    hist.index = hist.index.normalize()
+    return hist[~hist.index.duplicated(keep="last")]
+
+
+def _has_corporate_action(hist, after):
+    """True if newly fetched bars include a split or dividend after `after`"""
+    hist = _normalize(hist)
+    hist = hist[hist.index > after]
+    for column in ("Dividends", "Stock Splits"):
+        if column in hist and (hist[column].fillna(0) != 0).any():
+            return True
+    return False
@@ -0,0 +1,133 @@
+"""
+Columnar holdings model
+Stores lots as NumPy arrays with a ticker-code index, so each unique ticker is
+priced once and every lot is revalued in a single vectorized pass
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class Holdings:
+    """
+    Lots of a portfolio held column-wise
+
+    Attributes:
+        tickers (numpy.ndarray): Ticker of each lot
+        shares (numpy.ndarray): float64 share count of each lot
+        purchase_prices (numpy.ndarray): float64 cost per share of each lot
+        purchase_dates (numpy.ndarray): datetime64 purchase date of each lot
+            (NaT where unknown)
+        symbols (numpy.ndarray): Unique tickers, sorted
+        codes (numpy.ndarray): Index into `symbols` for each lot
+    """
+
+    def __init__(self, tickers, shares, purchase_prices, purchase_dates=None):
+        self.tickers = np.asarray(tickers, dtype=object)
+        self.shares = np.asarray(shares, dtype=float)
+        self.purchase_prices = np.asarray(purchase_prices, dtype=float)
+        if purchase_dates is None:
+            purchase_dates = [None] * len(self.tickers)
+        self.purchase_dates = pd.to_datetime(pd.Series(purchase_dates)).to_numpy(
+            "datetime64[ns]"
+        )
+        self.symbols, self.codes = np.unique(
+            self.tickers.astype(str), return_inverse=True
+        )
+
+    @classmethod
+    def from_records(cls, portfolio_data):
+        """
+        Build from a list of dicts with 'ticker', 'shares', 'purchase_price'
+        and optionally 'purchase_date'
+        """
+        return cls(
+            [holding["ticker"] for holding in portfolio_data],
+            [holding["shares"] for holding in portfolio_data],
+            [holding["purchase_price"] for holding in portfolio_data],
+            [holding.get("purchase_date") for holding in portfolio_data],
+        )
+
+    def __len__(self):
+        return len(self.tickers)
+
+    @property
+    def cost(self):
+        """Initial value of each lot"""
+        return self.shares * self.purchase_prices
+
+    def symbol_prices(self, prices):
+        """
+        Align prices with `symbols`
+
+        Args:
+            prices: dict ticker -> price, or an array aligned with `symbols`;
+                missing or zero prices become NaN
+        """
+        if isinstance(prices, dict):
+            prices = [prices.get(symbol) for symbol in self.symbols]
+            prices = np.array([np.nan if p is None else p for p in prices], float)
+        else:
+            prices = np.array(prices, dtype=float)
+        prices[prices == 0] = np.nan
+        return prices
+
+    def lot_prices(self, prices):
+        """Broadcast per-symbol prices onto lots"""
+        return self.symbol_prices(prices)[self.codes]
+
+    def revalue(self, prices):
+        """
+        Value every lot at the given prices
+
+        Returns:
+            pandas.DataFrame: one row per lot with float64 value columns,
+            NaN where no price is available
+        """
+        current_price = self.lot_prices(prices)
+        initial_value = self.cost
+        current_value = self.shares * current_price
+        return pd.DataFrame(
+            {
+                "Ticker": self.tickers,
+                "Shares": self.shares,
+                "Purchase Price": self.purchase_prices,
+                "Current Price": current_price,
+                "Initial Value": initial_value,
+                "Current Value": current_value,
+                "Profit/Loss": current_value - initial_value,
+                "Return %": (current_price - self.purchase_prices)
+                / self.purchase_prices
+                * 100,
+            }
+        )
+
+    def rollup(self, prices=None):
+        """
+        Aggregate lots per ticker with a weighted-average cost
+
+        Returns:
+            pandas.DataFrame: one row per unique ticker; value columns are
+            included when `prices` is given
+        """
+        n = len(self.symbols)
+        shares = np.bincount(self.codes, weights=self.shares, minlength=n)
+        initial_value = np.bincount(self.codes, weights=self.cost, minlength=n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average_cost = initial_value / shares
+        df = pd.DataFrame(
+            {
+                "Ticker": self.symbols,
+                "Lots": np.bincount(self.codes, minlength=n),
+                "Shares": shares,
+                "Average Cost": average_cost,
+                "Initial Value": initial_value,
+            }
+        )
+        if prices is not None:
+            current_price = self.symbol_prices(prices)
+            df["Current Price"] = current_price
+            df["Current Value"] = shares * current_price
+            df["Profit/Loss"] = df["Current Value"] - initial_value
+            df["Return %"] = (current_price - average_cost) / average_cost * 100
+        return df
@@ -0,0 +1,143 @@
+"""
+Run metrics and structured logging
+Collects counters and timings from the fetch, cache, compute and export
+paths in one process-wide Metrics object, and can mirror every measurement
+as a JSON log line
+
+Enable JSON lines for any script with FINANCE_STOCKS_METRICS_LOG=<path>
+(or '-' for stderr), or call configure_json_log().
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_LOG_ENV = "FINANCE_STOCKS_METRICS_LOG"
+
+logger = logging.getLogger("finance_stocks.metrics")
+logger.propagate = False
+
+
+class Metrics:
+    """
+    Thread-safe counters and timings
+
+    Counters are plain sums (requests, retries, cache hits, bytes). Timings
+    keep count, total and max seconds per name, so memory stays constant
+    however many observations are made.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.timings = {}
+
+    def increment(self, name, value=1, **fields):
+        """Add `value` to a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        _log(name, value=value, **fields)
+
+    def observe(self, name, seconds, **fields):
+        """Record one duration"""
+        with self._lock:
+            count, total, longest = self.timings.get(name, (0, 0.0, 0.0))
+            self.timings[name] = (count + 1, total + seconds, max(longest, seconds))
+        _log(name, seconds=round(seconds, 6), **fields)
+
+    @contextmanager
+    def timer(self, name, **fields):
+        """Time the body of a with-block, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **fields)
+
+    def snapshot(self):
+        """
+        Current values as plain data
+
+        Returns:
+            dict: 'counters', 'timings' (count/total/mean/max seconds) and
+            'cache_hit_ratio' per cache, from '<cache>.hit' / '<cache>.miss'
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            timings = {
+                name: {
+                    "count": count,
+                    "total_s": round(total, 6),
+                    "mean_s": round(total / count, 6),
+                    "max_s": round(longest, 6),
+                }
+                for name, (count, total, longest) in self.timings.items()
+            }
+        caches = {name.rsplit(".", 1)[0] for name in counters if name.endswith(".hit")}
+        ratios = {}
+        for cache in sorted(caches):
+            hits = counters.get(f"{cache}.hit", 0)
+            lookups = hits + counters.get(f"{cache}.miss", 0)
+            ratios[cache] = round(hits / lookups, 4) if lookups else None
+        return {"counters": counters, "timings": timings, "cache_hit_ratio": ratios}
+
+    def report(self):
+        """Human-readable summary of the snapshot"""
+        snap = self.snapshot()
+        lines = ["Timings:"]
+        for name, t in sorted(snap["timings"].items()):
+            lines.append(
+                f"  {name:<32} {t['count']:>7} x {t['mean_s'] * 1000:>9.2f} ms "
+                f"(total {t['total_s']:.3f} s, max {t['max_s'] * 1000:.2f} ms)"
+            )
+        lines.append("Counters:")
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"  {name:<32} {value:>12,}")
+        for cache, ratio in snap["cache_hit_ratio"].items():
+            if ratio is not None:
+                lines.append(f"  {cache + ' hit ratio':<32} {ratio:>12.1%}")
+        return "\n".join(lines)
+
+
+metrics = Metrics()
+
+
+def get_metrics():
+    """Return the process-wide Metrics object"""
+    return metrics
+
+
+def _log(event, **fields):
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"ts": round(time.time(), 6), "event": event, **fields}))
+
+
+def configure_json_log(target="-"):
+    """
+    Write one JSON object per measurement to `target`
+
+    Args:
+        target: a file path, '-' for stderr, or an open text stream
+    """
+    if target == "-":
+        handler = logging.StreamHandler(sys.stderr)
+    elif isinstance(target, str):
+        handler = logging.FileHandler(target)
+    else:
+        handler = logging.StreamHandler(target)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    return handler
+
+
+if os.environ.get(METRICS_LOG_ENV):
+    configure_json_log(os.environ[METRICS_LOG_ENV])
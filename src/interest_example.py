@@ -1,56 +1,68 @@
-# Investment variables
-principal = 50000
-annual_rate = 0.04
-
-df_bool = True  # Set to False to print plain table
-
-# Calculations
-per_year = principal * annual_rate
-per_3_months = per_year / 4
-per_month = per_year / 12
-per_day = per_year / 365
-
-# Percentages
-pct_year = (per_year / principal) * 100
-pct_3_months = (per_3_months / principal) * 100
-pct_month = (per_month / principal) * 100
-pct_day = (per_day / principal) * 100
-
-if df_bool:
-    import pandas as pd
-
-    data = {
-        "Time Period": ["Per Year", "Per 3 Months", "Per Month", "Per Day"],
-        "Interest Earned": [per_year, per_3_months, per_month, per_day],
-        "Percentage Gain (%)": [pct_year, pct_3_months, pct_month, pct_day],
-        "Total Value": [
-            principal + per_year,
-            principal + per_3_months,
-            principal + per_month,
-            principal + per_day,
-        ],
-    }
-
-    df = pd.DataFrame(data)
-    print(df)
-
-else:
-    # Printing table
-    print(
-        "| Time Period      | Interest Earned | Percentage Gain (%) | Total Value    |"
-    )
-    print(
-        "|------------------|-----------------|----------------------|----------------|"
-    )
-    print(
-        f"| Per Year         | ${per_year:,.2f}      | {pct_year:.2f}%                | ${principal + per_year:,.2f} |"
-    )
-    print(
-        f"| Per 3 Months     | ${per_3_months:,.2f}      | {pct_3_months:.2f}%                | ${principal + per_3_months:,.2f} |"
-    )
-    print(
-        f"| Per Month        | ${per_month:,.2f}      | {pct_month:.2f}%                | ${principal + per_month:,.2f} |"
-    )
-    print(
-        f"| Per Day          | ${per_day:,.2f}      | {pct_day:.3f}%               | ${principal + per_day:,.2f} |"
-    )
+PERIODS = [
+    ("Per Year", 1),
+    ("Per 3 Months", 4),
+    ("Per Month", 12),
+    ("Per Day", 365),
+]
+
+
+def interest_rows(principal, annual_rate):
+    """
+    Simple interest earned over each period
+
+    Returns:
+        list: (period name, interest earned, percentage gain, total value)
+    """
+    per_year = principal * annual_rate
+    rows = []
+    for name, per_year_count in PERIODS:
+        earned = per_year / per_year_count
+        rows.append((name, earned, (earned / principal) * 100, principal + earned))
+    return rows
+
+
+def print_interest(principal, annual_rate, df_bool=True):
+    """Print the interest table, as a DataFrame or as a plain text table"""
+    rows = interest_rows(principal, annual_rate)
+
+    if df_bool:
+        import pandas as pd
+
+        df = pd.DataFrame(
+            rows,
+            columns=[
+                "Time Period",
+                "Interest Earned",
+                "Percentage Gain (%)",
+                "Total Value",
+            ],
+        )
+        print(df)
+
+    else:
+        # Printing table
+        print(
+            "| Time Period      | Interest Earned | Percentage Gain (%) | Total Value    |"
+        )
+        print(
+            "|------------------|-----------------|----------------------|----------------|"
+        )
+        for name, earned, pct, total in rows:
+            percentage = f"{pct:.{3 if name == 'Per Day' else 2}f}%"
+            print(
+                f"| {name:<16} | ${earned:,.2f}      | {percentage:<21}| ${total:,.2f} |"
+            )
+
+
+def main():
+    # Investment variables
+    principal = 50000
+    annual_rate = 0.04
+
+    df_bool = True  # Set to False to print plain table
+
+    print_interest(principal, annual_rate, df_bool)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Incremental live P&L
+Keeps per-ticker values and portfolio totals up to date from a stream of
+price ticks: each tick touches one ticker's row and adjusts the running
+totals by its change, so a tick costs the same however large the book is
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from fx import conversion_factors, listing_conversion
+from holdings import Holdings
+from market_data import fetch_last_prices
+
+
+class LivePnL:
+    """
+    Running valuation of a portfolio, updated one price tick at a time
+
+    Totals follow the TOTAL row of the portfolio export: Initial Value covers
+    every lot, while Current Value and Profit/Loss cover only tickers that
+    have a price.
+
+    Ticks carry prices as quoted. Without conversion rates every amount stays
+    in its listing's currency, so totals only add up for a single-currency
+    book; with base_currency (or set_rates()) prices, values and totals are
+    all in that currency, as in analyze_portfolio(base_currency=...).
+
+    Args:
+        holdings (Holdings): Lots to value (or a list of holding dicts)
+        prices (dict): Optional starting prices, ticker -> price as quoted
+        base_currency (str): Convert into this currency (e.g. 'USD'); each
+            ticker's quote currency and the FX rates are looked up once here
+        currency_cache (TTLCache): Optional cache of quote currencies
+    """
+
+    def __init__(self, holdings, prices=None, base_currency=None, currency_cache=None):
+        if not isinstance(holdings, Holdings):
+            holdings = Holdings.from_records(holdings)
+        self._listed = holdings
+        self.holdings = holdings
+        self.symbols = list(holdings.symbols)
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        n = len(self.symbols)
+        self.shares = np.bincount(holdings.codes, weights=holdings.shares, minlength=n)
+        self.initial_value = np.bincount(
+            holdings.codes, weights=holdings.cost, minlength=n
+        )
+        self.quotes = np.full(n, np.nan)
+        self.prices = np.full(n, np.nan)
+        self.values = np.full(n, np.nan)
+        self.base_currency = None
+        self.currencies = None
+        self.quote_factors = np.ones(n)
+
+        self.total_initial = float(self.initial_value.sum())
+        self.total_current = 0.0
+        self.priced_initial = 0.0
+        self.ticks = 0
+
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+        if base_currency:
+            self.currencies, quote, major = listing_conversion(
+                self.symbols, base_currency, cache=currency_cache
+            )
+            self.set_rates(base_currency, quote, major)
+        if prices:
+            self.update(prices)
+
+    def set_rates(self, base_currency, quote_factors, major_factors):
+        """
+        Value the book in `base_currency` from now on
+
+        Revalues every row and recomputes the totals; call it again when FX
+        rates move. A NaN factor (no FX rate) leaves that ticker unvalued.
+
+        Args:
+            base_currency (str): Currency the factors convert into
+            quote_factors (array-like): Per ticker (aligned with `symbols`),
+                converting prices as quoted (pence for GBp)
+            major_factors (array-like): Per ticker, converting purchase
+                prices (pounds for GBp listings)
+        """
+        quote_factors = np.asarray(quote_factors, dtype=float)
+        major_factors = np.asarray(major_factors, dtype=float)
+        listed = self._listed
+        with self._lock:
+            self.base_currency = base_currency
+            self.quote_factors = quote_factors
+            self.holdings = Holdings(
+                listed.tickers,
+                listed.shares,
+                listed.purchase_prices * major_factors[listed.codes],
+                listed.purchase_dates,
+            )
+            self.initial_value = np.bincount(
+                listed.codes, weights=self.holdings.cost, minlength=len(self.symbols)
+            )
+            self.total_initial = float(np.nansum(self.initial_value))
+            self.prices = self.quotes * quote_factors
+            self.values = self.shares * self.prices
+        self.resync()
+
+    def refresh_rates(self):
+        """
+        Revalue the book at current FX rates (the shared fx.fx_rates cache
+        fetches them at most once per bucket); a no-op without base_currency
+        """
+        if self.currencies is None:
+            return
+        quote, major = conversion_factors(self.currencies, self.base_currency)
+        self.set_rates(self.base_currency, quote, major)
+
+    def subscribe(self, callback):
+        """
+        Call `callback(row, totals)` whenever a ticker's price changes
+
+        Returns:
+            function: call it to unsubscribe
+        """
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def on_tick(self, symbol, price):
+        """
+        Apply one price update
+
+        Unknown tickers and unchanged prices are ignored; a zero or None
+        price marks the ticker as unpriced. `price` is as quoted, and is
+        converted with the rates from set_rates().
+
+        Returns:
+            bool: True if the book changed
+        """
+        i = self._index.get(symbol)
+        if i is None:
+            return False
+        quote = np.nan if not price else float(price)
+
+        with self._lock:
+            old_quote = self.quotes[i]
+            if quote == old_quote or (np.isnan(quote) and np.isnan(old_quote)):
+                return False
+            price = quote * self.quote_factors[i]
+            old_value = self.values[i]
+            new_value = self.shares[i] * price
+
+            # Move the row's contribution out of, then back into, the totals
+            if not np.isnan(old_value):
+                self.total_current -= old_value
+                self.priced_initial -= self.initial_value[i]
+            if not np.isnan(new_value):
+                self.total_current += new_value
+                self.priced_initial += self.initial_value[i]
+
+            self.quotes[i] = quote
+            self.prices[i] = price
+            self.values[i] = new_value
+            self.ticks += 1
+            row, totals = self.row(i), self.totals
+
+        for callback in list(self._subscribers):
+            callback(row, totals)
+        return True
+
+    def update(self, prices):
+        """
+        Apply many updates at once
+
+        Returns:
+            int: number of tickers whose price changed
+        """
+        return sum(self.on_tick(symbol, price) for symbol, price in prices.items())
+
+    def row(self, i):
+        """One ticker's current position, as a dict"""
+        shares = self.shares[i]
+        initial_value = self.initial_value[i]
+        average_cost = initial_value / shares if shares else np.nan
+        current_value = self.values[i]
+        return {
+            "Ticker": self.symbols[i],
+            "Shares": shares,
+            "Average Cost": average_cost,
+            "Current Price": self.prices[i],
+            "Initial Value": initial_value,
+            "Current Value": current_value,
+            "Profit/Loss": current_value - initial_value,
+            "Return %": (self.prices[i] - average_cost) / average_cost * 100,
+        }
+
+    @property
+    def totals(self):
+        """Portfolio totals, matching the export's TOTAL row"""
+        return {
+            "Initial Value": self.total_initial,
+            "Current Value": self.total_current,
+            "Profit/Loss": self.total_current - self.priced_initial,
+            "Return %": (
+                (self.total_current - self.total_initial) / self.total_initial * 100
+                if self.total_initial > 0
+                else 0
+            ),
+        }
+
+    def resync(self):
+        """Recompute the running totals from scratch, dropping rounding drift"""
+        with self._lock:
+            priced = ~np.isnan(self.values) & ~np.isnan(self.initial_value)
+            self.total_current = float(self.values[priced].sum())
+            self.priced_initial = float(self.initial_value[priced].sum())
+
+    def snapshot(self):
+        """Per-ticker view of the whole book as a DataFrame"""
+        return self.holdings.rollup(self.prices)
+
+
+def run_feed(engine, ticks):
+    """
+    Feed (symbol, price) ticks into the engine until the stream ends
+
+    Returns:
+        int: number of ticks that changed the book
+    """
+    return sum(engine.on_tick(symbol, price) for symbol, price in ticks)
+
+
+def poll_prices(engine, interval=60.0, iterations=None, fetch=fetch_last_prices):
+    """
+    Refresh the engine from batched last-price downloads every `interval` seconds
+
+    Only tickers whose price moved reach the subscribers. A book valued in
+    a base currency also picks up moved FX rates on each poll.
+
+    Args:
+        engine (LivePnL): Book to update
+        interval (float): Seconds between polls
+        iterations (int): Stop after this many polls (None polls forever)
+        fetch: function(symbols) -> dict of prices
+    """
+    done = 0
+    while iterations is None or done < iterations:
+        engine.refresh_rates()
+        engine.update(fetch(engine.symbols))
+        done += 1
+        if iterations is None or done < iterations:
+            time.sleep(interval)
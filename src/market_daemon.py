@@ -0,0 +1,324 @@
+"""
+Market data refresh daemon
+A long-running asyncio service that keeps quotes, daily bars and earnings
+calendars in memory, refreshes each on its own staleness schedule, and
+serves portfolio, performance and earnings views as JSON over a local HTTP
+port or Unix socket. Requests are answered from memory; only the refresh
+tasks talk to the data provider.
+
+    python src/cli.py daemon --port 8765
+    curl localhost:8765/portfolio
+"""
+
+import asyncio
+import json
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from earnings_scan import next_earnings_date
+from fx import BASE_CURRENCY, FX_BUCKET_SECONDS, conversion_factors, listing_conversion
+from instrumentation import metrics
+from live_pnl import LivePnL
+from market_data import download_histories, fetch_calendars, fetch_last_prices, now
+from price_panel import PricePanel
+from Stocks_Performance import (
+    PERFORMANCE_COLUMNS,
+    TIME_PERIODS,
+    compute_horizon_returns,
+)
+
+DEFAULT_PORT = 8765
+
+# Seconds each dataset may age before it is refreshed
+DEFAULT_MAX_AGE = {
+    "quotes": 60.0,
+    "bars": 6 * 60 * 60.0,
+    "calendars": 12 * 60 * 60.0,
+    "fx": float(FX_BUCKET_SECONDS),
+}
+
+# Seconds before a failed refresh is tried again
+RETRY_AFTER = 30.0
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    500: "Internal Server Error",
+    503: "Unavailable",
+}
+
+
+class Dataset:
+    """
+    One in-memory dataset and its refresh schedule
+
+    Args:
+        name (str): Dataset name ('quotes', 'bars', 'calendars', 'fx')
+        load (callable): Blocking function returning fresh data; it runs on
+            a worker thread so the event loop keeps serving requests
+        max_age (float): Seconds before the data counts as stale
+    """
+
+    def __init__(self, name, load, max_age):
+        self.name = name
+        self.load = load
+        self.max_age = max_age
+        self.data = None
+        self.refreshed_at = None
+        self.refreshes = 0
+        self.error = None
+        self.loaded = asyncio.Event()
+
+    @property
+    def age(self):
+        if self.refreshed_at is None:
+            return None
+        return time.monotonic() - self.refreshed_at
+
+    def due_in(self):
+        """Seconds until the next refresh (0 if stale now)"""
+        if self.refreshed_at is None:
+            return 0.0
+        return max(0.0, self.max_age - self.age)
+
+    async def refresh(self):
+        """
+        Reload the data, keeping the old copy if the load fails
+
+        Returns:
+            bool: True if the data was replaced
+        """
+        try:
+            with metrics.timer("daemon.refresh", dataset=self.name):
+                data = await asyncio.to_thread(self.load)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Error refreshing {self.name}: {e}")
+            return False
+        self.data = data
+        self.refreshed_at = time.monotonic()
+        self.refreshes += 1
+        self.error = None
+        self.loaded.set()
+        return True
+
+
+class MarketDataDaemon:
+    """
+    Keeps a portfolio's and a watchlist's market data warm
+
+    Args:
+        portfolio (list): Holding dicts (or a Holdings instance) to value
+        watchlist (list): Extra symbols for the performance and earnings views
+        max_age (dict): Per-dataset overrides of DEFAULT_MAX_AGE
+        base_currency (str): Value the portfolio in this currency, with FX
+            rates kept warm as their own dataset (None keeps listing currencies)
+        currency_cache (TTLCache): Optional cache of quote currencies
+    """
+
+    def __init__(
+        self,
+        portfolio=(),
+        watchlist=(),
+        max_age=None,
+        base_currency=BASE_CURRENCY,
+        currency_cache=None,
+    ):
+        self.book = LivePnL(portfolio)
+        self.symbols = list(dict.fromkeys(list(self.book.symbols) + list(watchlist)))
+        self.base_currency = base_currency
+        self.currency_cache = currency_cache
+        self._currencies = None
+        ages = {**DEFAULT_MAX_AGE, **(max_age or {})}
+        self.datasets = {
+            "quotes": Dataset("quotes", self._load_quotes, ages["quotes"]),
+            "bars": Dataset("bars", self._load_bars, ages["bars"]),
+            "calendars": Dataset("calendars", self._load_calendars, ages["calendars"]),
+        }
+        if base_currency:
+            self.datasets["fx"] = Dataset("fx", self._load_fx, ages["fx"])
+        self.routes = {
+            "/portfolio": self.portfolio_view,
+            "/performance": self.performance_view,
+            "/earnings": self.earnings_view,
+            "/status": self.status_view,
+        }
+        self._tasks = []
+        # yfinance downloads share module state, so refreshes never overlap
+        self._fetch_lock = asyncio.Lock()
+
+    def _load_quotes(self):
+        return fetch_last_prices(self.symbols)
+
+    def _load_bars(self):
+        # The close panel is built once per refresh, not once per request, and
+        # only it is kept in memory between refreshes
+        end_date = now()
+        start_date = end_date - timedelta(days=max(TIME_PERIODS.values()) + 7)
+        return PricePanel.from_histories(
+            download_histories(self.symbols, start=start_date, end=end_date)
+        )
+
+    def _load_calendars(self):
+        calendars, _ = fetch_calendars(self.symbols)
+        return calendars
+
+    def _load_fx(self):
+        # Quote currencies are looked up once; later refreshes only need rates
+        if self._currencies is None:
+            currencies, quote, major = listing_conversion(
+                self.book.symbols, self.base_currency, cache=self.currency_cache
+            )
+            self._currencies = currencies
+            return quote, major
+        return conversion_factors(self._currencies, self.base_currency)
+
+    async def refresh(self, name):
+        async with self._fetch_lock:
+            refreshed = await self.datasets[name].refresh()
+        if refreshed and name == "quotes":
+            self.book.update(self.datasets["quotes"].data)
+        if refreshed and name == "fx":
+            self.book.set_rates(self.base_currency, *self.datasets["fx"].data)
+        return refreshed
+
+    async def _keep_fresh(self, dataset):
+        while True:
+            await asyncio.sleep(dataset.due_in())
+            if not await self.refresh(dataset.name):
+                await asyncio.sleep(min(RETRY_AFTER, dataset.max_age))
+
+    def start(self):
+        """Start one refresh task per dataset on the running event loop"""
+        self._tasks = [
+            asyncio.create_task(self._keep_fresh(d)) for d in self.datasets.values()
+        ]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def ready(self):
+        """Wait until every dataset has loaded once"""
+        await asyncio.gather(*(d.loaded.wait() for d in self.datasets.values()))
+
+    # Views: computed from memory only
+
+    def portfolio_view(self):
+        rows = self.book.snapshot()
+        return {
+            "currency": self.book.base_currency,
+            "rows": json.loads(rows.to_json(orient="records")),
+            "totals": self.book.totals,
+        }
+
+    def performance_view(self):
+        panel = self.datasets["bars"].data
+        quotes = self.datasets["quotes"].data or {}
+        current = [
+            quotes.get(s, close) for s, close in zip(panel.symbols, panel.last())
+        ]
+        changes = compute_horizon_returns(
+            panel.symbols, panel.dates, panel.values, current, now()
+        )
+        changes.insert(0, "Current Price", current)
+        df = changes.reset_index()[PERFORMANCE_COLUMNS]
+        return json.loads(df.to_json(orient="records"))
+
+    def earnings_view(self):
+        calendars = self.datasets["calendars"].data or {}
+        rows = []
+        for symbol, calendar in calendars.items():
+            earnings_date = next_earnings_date(calendar)
+            if earnings_date is not None:
+                rows.append({"Symbol": symbol, "Earnings Date": earnings_date})
+        rows.sort(key=lambda row: (row["Earnings Date"], row["Symbol"]))
+        for row in rows:
+            row["Earnings Date"] = row["Earnings Date"].isoformat()
+        return rows
+
+    def status_view(self):
+        return {
+            name: {
+                "age_s": None if d.age is None else round(d.age, 3),
+                "max_age_s": d.max_age,
+                "refreshes": d.refreshes,
+                "error": d.error,
+            }
+            for name, d in self.datasets.items()
+        }
+
+    # HTTP
+
+    def respond(self, method, target):
+        """
+        Status code and JSON body for one request
+
+        Returns:
+            tuple: (status, body)
+        """
+        if method != "GET":
+            return 400, {"error": f"unsupported method {method}"}
+        path = urlsplit(target).path.rstrip("/") or "/"
+        if path not in self.routes:
+            return 404, {"error": f"unknown path {path}", "paths": list(self.routes)}
+        if path != "/status" and not all(
+            d.loaded.is_set() for d in self.datasets.values()
+        ):
+            return 503, {"error": "still loading"}
+        with metrics.timer("daemon.request", path=path):
+            return 200, self.routes[path]()
+
+    async def _handle(self, reader, writer):
+        try:
+            request = (await reader.readline()).decode("latin-1")
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # headers are not needed
+            method, target = request.split()[:2]
+        except Exception as e:
+            # A request line we cannot parse is the client's fault
+            status, body = 400, {"error": f"malformed request: {e}"}
+        else:
+            try:
+                status, body = self.respond(method, target)
+            except Exception as e:
+                # A view failing is ours
+                print(f"Error serving {target}: {e}")
+                status, body = 500, {"error": str(e)}
+        payload = json.dumps(body, default=str).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n".encode() + payload
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None):
+        """
+        Start answering requests (on a Unix socket if `unix_path` is given)
+
+        Returns:
+            asyncio.Server
+        """
+        if unix_path:
+            return await asyncio.start_unix_server(self._handle, unix_path)
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def run(self, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None):
+        """Serve and refresh until cancelled"""
+        server = await self.serve(host, port, unix_path)
+        where = unix_path or f"http://{host}:{port}"
+        print(f"Serving {', '.join(self.routes)} on {where}")
+        self.start()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.stop()
@@ -0,0 +1,262 @@
+"""
+Shared market data access layer
+Groups symbols into chunked multi-ticker requests and fans the results back
+out per symbol, so request count scales with symbols / batch_size
+"""
+
+import atexit
+import os
+import threading
+from datetime import datetime
+
+from fetch_pool import fetch_concurrently
+from instrumentation import metrics
+from ttl_cache import MISSING
+
+DEFAULT_BATCH_SIZE = 50
+
+# Seconds yfinance waits on each HTTP response of a multi-ticker download
+DOWNLOAD_TIMEOUT = 120.0
+
+
+class YahooProvider:
+    """Thin wrapper over yfinance; every network call in the project goes through here"""
+
+    name = "yahoo"
+
+    # yfinance's download keeps shared module state, so calls never overlap
+    _download_lock = threading.Lock()
+
+    @staticmethod
+    def _yf():
+        # yfinance is slow to import, so only load it once a request is made
+        import yfinance
+
+        return yfinance
+
+    def download(self, symbols, start=None, end=None, period=None):
+        """One multi-ticker daily-bar request, columns grouped by ticker"""
+        with self._download_lock:
+            return self._yf().download(
+                list(symbols),
+                start=start,
+                end=end,
+                period=period,
+                group_by="ticker",
+                auto_adjust=True,
+                actions=True,
+                progress=False,
+                threads=False,
+                timeout=DOWNLOAD_TIMEOUT,
+            )
+
+    def info(self, symbol):
+        return self._yf().Ticker(symbol).info
+
+    def history(self, symbol, start=None, end=None, period=None):
+        if period is not None:
+            return self._yf().Ticker(symbol).history(period=period)
+        return self._yf().Ticker(symbol).history(start=start, end=end)
+
+    def calendar(self, symbol):
+        return self._yf().Ticker(symbol).calendar
+
+
+# Point either variable at an archive file to record a run or replay it offline
+RECORD_ENV = "FINANCE_STOCKS_RECORD"
+REPLAY_ENV = "FINANCE_STOCKS_REPLAY"
+
+_provider = None
+
+
+def _default_provider():
+    """Yahoo, wrapped for recording or replaced by an archive if requested"""
+    from replay import RecordingProvider, ReplayProvider
+
+    if os.environ.get(REPLAY_ENV):
+        return ReplayProvider(os.environ[REPLAY_ENV])
+    if os.environ.get(RECORD_ENV):
+        recorder = RecordingProvider(YahooProvider(), os.environ[RECORD_ENV])
+        atexit.register(recorder.save)
+        return recorder
+    return YahooProvider()
+
+
+def get_provider():
+    """Return the provider used by all data modules"""
+    global _provider
+    if _provider is None:
+        _provider = _default_provider()
+    return _provider
+
+
+def set_provider(provider):
+    """Swap the provider used by all data modules (returns the previous one)"""
+    global _provider
+    previous, _provider = get_provider(), provider
+    return previous
+
+
+def caches_bypassed(provider=None):
+    """
+    True while a run is recorded or replayed
+
+    A cache hit would keep that response out of a recording, and a replay
+    must not read or write the user's caches (whose TTLs follow the wall
+    clock, not the archive's as-of time), so cached lookups go straight to
+    the provider instead.
+    """
+    return getattr(provider or get_provider(), "bypass_caches", False)
+
+
+def now():
+    """
+    The as-of time for data requests: the archive's time when replaying,
+    otherwise the wall clock, so replayed runs reproduce the recorded one
+    """
+    as_of = getattr(get_provider(), "as_of", None)
+    return as_of if as_of is not None else datetime.now()
+
+
+def chunked(symbols, batch_size):
+    """Split symbols into lists of at most batch_size, dropping duplicates"""
+    unique = list(dict.fromkeys(symbols))
+    return [unique[i : i + batch_size] for i in range(0, len(unique), batch_size)]
+
+
+def split_download(data, symbols):
+    """
+    Fan a multi-ticker download frame back out per symbol
+
+    Returns:
+        dict: symbol -> DataFrame of that symbol's bars (naive date index);
+        symbols with no rows are left out
+    """
+    import pandas as pd
+
+    histories = {}
+    if data is None or data.empty:
+        return histories
+
+    if isinstance(data.columns, pd.MultiIndex):
+        available = set(data.columns.get_level_values(0))
+        frames = {s: data[s] for s in symbols if s in available}
+    else:
+        frames = {symbols[0]: data} if len(symbols) == 1 else {}
+
+    for symbol, frame in frames.items():
+        frame = frame.dropna(how="all")
+        if "Close" in frame:
+            frame = frame[frame["Close"].notna()]
+        if frame.empty:
+            continue
+        if frame.index.tz is not None:
+            frame.index = frame.index.tz_localize(None)
+        frame.columns.name = None
+        histories[symbol] = frame
+    return histories
+
+
+def download_histories(
+    symbols,
+    start=None,
+    end=None,
+    period=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    provider=None,
+):
+    """
+    Daily bars for many symbols using one request per batch
+
+    Each batch's latency and in-memory size (as a stand-in for bytes
+    transferred, which yfinance does not expose) go to the run metrics.
+
+    Returns:
+        dict: symbol -> DataFrame of bars; symbols without data are left out
+    """
+    provider = provider or get_provider()
+    chunks = chunked(symbols, batch_size)
+
+    def download(i):
+        with metrics.timer(
+            "download.batch", provider=provider.name, symbols=len(chunks[i])
+        ):
+            return provider.download(chunks[i], start=start, end=end, period=period)
+
+    # One batch at a time: yfinance's download keeps shared module state.
+    # Each batch runs in this thread, with the fetch layer's retries and
+    # breaker but not its timeout: an abandoned download would keep running
+    # alongside the next one, so the provider's own timeout applies instead
+    results, errors = fetch_concurrently(
+        download,
+        range(len(chunks)),
+        provider=provider.name,
+        max_workers=1,
+        timeout=0,
+        hedge_after=0,
+    )
+    histories = {}
+    for i, data in enumerate(results):
+        if i in errors:
+            print(f"Error downloading {', '.join(chunks[i])}: {errors[i]}")
+            continue
+        if data is not None and not data.empty:
+            metrics.increment("download.bytes", int(data.memory_usage().sum()))
+        histories.update(split_download(data, chunks[i]))
+    return histories
+
+
+def fetch_last_prices(symbols, batch_size=DEFAULT_BATCH_SIZE, provider=None):
+    """
+    Latest close for many symbols from a short batched download
+
+    Returns:
+        dict: symbol -> last close; symbols without data are left out
+    """
+    histories = download_histories(
+        symbols, period="5d", batch_size=batch_size, provider=provider
+    )
+    return {symbol: float(hist["Close"].iloc[-1]) for symbol, hist in histories.items()}
+
+
+def fetch_calendars(
+    symbols, max_workers=None, cache=None, provider=None, cache_only=False
+):
+    """
+    Earnings calendars for many symbols
+
+    Yahoo has no multi-symbol calendar endpoint, so calendars are fetched
+    concurrently within the provider's rate limit. With a TTLCache, only
+    symbols whose entry is stale or missing go to the network; with
+    cache_only=True nothing does, and uncached symbols are left out. The
+    cache is ignored while recording or replaying (see caches_bypassed).
+
+    Returns:
+        tuple: (calendars, errors) keyed by symbol
+    """
+    provider = provider or get_provider()
+    if caches_bypassed(provider):
+        cache = None
+    calendars = {}
+    if cache is not None:
+        for symbol in dict.fromkeys(symbols):
+            cached = cache.get(symbol)
+            if cached is not MISSING:
+                calendars[symbol] = cached
+
+    if cache_only:
+        return calendars, {}
+
+    pending = [s for s in dict.fromkeys(symbols) if s not in calendars]
+    results, errors = fetch_concurrently(
+        provider.calendar, pending, provider=provider.name, max_workers=max_workers
+    )
+    fetched = {
+        symbol: result
+        for symbol, result in zip(pending, results)
+        if symbol not in errors
+    }
+    if cache is not None and fetched:
+        cache.set_many(fetched)
+    calendars.update(fetched)
+    return calendars, errors
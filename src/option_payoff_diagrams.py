@@ -1,86 +1,261 @@
-import matplotlib.pyplot as plt
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
+from black_scholes import bs_price
+from option_strategies import (
+    Leg,
+    pack_strategies,
+    payoff,
+    strategy_stats,
+    value_before_expiry,
+)
+
 # Create a range of stock prices
 S = np.linspace(0, 200, 500)
 
-# Define strike price and premium for examples
+# Define strike price and market assumptions for examples
 K = 100  # strike price
-premium_call = 10
-premium_put = 8
-
-# Payoff functions
-# Long call: max(S - K, 0) - premium
-long_call = np.maximum(S - K, 0) - premium_call
-
-# Short call: -long_call
-short_call = -long_call
-
-# Long put: max(K - S, 0) - premium
-long_put = np.maximum(K - S, 0) - premium_put
-
-# Short put: -long_put
-short_put = -long_put
-
-# Plotting
-strategies = {
-    "Long Call": long_call,
-    "Short Call": short_call,
-    "Long Put": long_put,
-    "Short Put": short_put,
-}
-
-for name, payoff in strategies.items():
-    plt.figure(figsize=(6, 4))
-    plt.plot(S, payoff, label=f"{name} payoff", linewidth=2)
-    plt.axhline(0, color="black", linewidth=1)
-    plt.axvline(K, color="red", linestyle="--", label="Strike Price")
-    plt.title(f"Payoff Diagram: {name}")
-    plt.xlabel("Stock Price at Expiration (S)")
-    plt.ylabel("Profit / Loss")
-    plt.legend()
-    plt.grid(True)
-    plt.show()
-import matplotlib.pyplot as plt
-import numpy as np
+spot = 100  # current stock price
+volatility = 0.30  # annualized
+rate = 0.04  # risk-free rate
+expiry = 0.25  # years to expiration
 
-# Create a range of stock prices
-S = np.linspace(0, 200, 500)
+# Strategies per page of a rendered report (rows, columns)
+DEFAULT_GRID = (3, 3)
 
-# Define strike price and premium for examples
-K = 100  # strike price
-premium_call = 10
-premium_put = 8
-
-# Payoff functions
-# Long call: max(S - K, 0) - premium
-long_call = np.maximum(S - K, 0) - premium_call
-
-# Short call: -long_call
-short_call = -long_call
-
-# Long put: max(K - S, 0) - premium
-long_put = np.maximum(K - S, 0) - premium_put
-
-# Short put: -long_put
-short_put = -long_put
-
-# Plotting
-strategies = {
-    "Long Call": long_call,
-    "Short Call": short_call,
-    "Long Put": long_put,
-    "Short Put": short_put,
-}
-
-for name, payoff in strategies.items():
-    plt.figure(figsize=(6, 4))
-    plt.plot(S, payoff, label=f"{name} payoff", linewidth=2)
-    plt.axhline(0, color="black", linewidth=1)
-    plt.axvline(K, color="red", linestyle="--", label="Strike Price")
-    plt.title(f"Payoff Diagram: {name}")
-    plt.xlabel("Stock Price at Expiration (S)")
-    plt.ylabel("Profit / Loss")
-    plt.legend()
-    plt.grid(True)
-    plt.show()
+
+def single_leg_strategies(
+    strike=K, spot=spot, volatility=volatility, rate=rate, expiry=expiry
+):
+    """Long/short call and put, with premiums from Black-Scholes instead of fixed guesses"""
+    premium_call = float(bs_price(spot, strike, volatility, expiry, rate, "call"))
+    premium_put = float(bs_price(spot, strike, volatility, expiry, rate, "put"))
+    return {
+        "Long Call": [Leg("call", strike, premium_call, "long", expiry=expiry)],
+        "Short Call": [Leg("call", strike, premium_call, "short", expiry=expiry)],
+        "Long Put": [Leg("put", strike, premium_put, "long", expiry=expiry)],
+        "Short Put": [Leg("put", strike, premium_put, "short", expiry=expiry)],
+    }
+
+
+def print_stats(strategies):
+    """Print max profit, max loss and breakevens for each strategy"""
+    stats = strategy_stats(list(strategies.values()))
+    for i, name in enumerate(strategies):
+        breakevens = stats["breakevens"][i][~np.isnan(stats["breakevens"][i])]
+        print(
+            f"{name}: max profit {stats['max_profit'][i]:.2f}, "
+            f"max loss {stats['max_loss'][i]:.2f}, breakevens {breakevens}"
+        )
+
+
+def plot_payoffs(strategies, prices=S, strike=K, volatility=volatility, rate=rate):
+    """
+    Show each strategy's payoff at expiration and its P&L halfway there
+    (when its legs have an expiry)
+
+    Long call: max(S - K, 0) - premium, short call: -long_call
+    Long put: max(K - S, 0) - premium, short put: -long_put
+    """
+    if not strategies:
+        return
+    # matplotlib is slow to import, so it is only loaded when plotting
+    import matplotlib.pyplot as plt
+
+    packed = pack_strategies(list(strategies.values()))
+    payoffs = payoff(packed, prices)
+    pre_expiry = _halfway_values(packed, prices, volatility, rate)
+
+    for i, name in enumerate(strategies):
+        plt.figure(figsize=(6, 4))
+        plt.plot(prices, payoffs[i], label=f"{name} payoff", linewidth=2)
+        if pre_expiry is not None:
+            plt.plot(
+                prices, pre_expiry[i], linestyle=":", label="Halfway to expiration"
+            )
+        plt.axhline(0, color="black", linewidth=1)
+        plt.axvline(strike, color="red", linestyle="--", label="Strike Price")
+        plt.title(f"Payoff Diagram: {name}")
+        plt.xlabel("Stock Price at Expiration (S)")
+        plt.ylabel("Profit / Loss")
+        plt.legend()
+        plt.grid(True)
+        plt.show()
+
+
+def _halfway_values(packed, prices, volatility, rate):
+    """
+    P&L of every strategy halfway to the latest expiry among its legs
+
+    Returns:
+        numpy.ndarray: shape (n_strategies, n_prices), or None when no leg
+        has an expiry (e.g. strategies from the option_strategies helpers)
+    """
+    expiries = packed["expiry"]
+    if not np.isfinite(expiries).any():
+        return None
+    # fmax skips the NaN padding; a strategy without expiries stays at intrinsic
+    half_expiry = np.nan_to_num(np.fmax.reduce(expiries, axis=1) / 2)
+    return value_before_expiry(packed, prices, half_expiry[:, None], volatility, rate)
+
+
+def _page_files(path, pages):
+    """One file per page for PNG/SVG ('report-001.png', ...); PDF keeps one file"""
+    root, extension = os.path.splitext(path)
+    if extension.lower() == ".pdf" or pages == 1:
+        return [path] * pages
+    return [f"{root}-{page + 1:03d}{extension}" for page in range(pages)]
+
+
+def _render_pages(job):
+    """
+    Draw pages of a payoff report onto one reused figure and save each page
+
+    The figure is built once with a grid of axes; every page only swaps the
+    line data, titles and y-limits, which is far cheaper than a new figure
+    per strategy. Figure and the Agg canvas are used directly, so nothing
+    touches pyplot or needs a display.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+
+    names, payoffs, pre_expiry, prices, strike, grid, dpi, files = job
+    rows, cols = grid
+    per_page = rows * cols
+
+    figure = Figure(figsize=(4 * cols, 3 * rows), dpi=dpi)
+    FigureCanvasAgg(figure)
+    figure.subplots_adjust(hspace=0.5, wspace=0.3)
+    axes = figure.subplots(rows, cols, squeeze=False).ravel()
+    lines = []
+    for ax in axes:
+        (expiry_line,) = ax.plot(prices, prices * 0, linewidth=2, label="Payoff")
+        halfway_line = None
+        if pre_expiry is not None:
+            (halfway_line,) = ax.plot(
+                prices, prices * 0, linestyle=":", label="Halfway to expiration"
+            )
+        ax.axhline(0, color="black", linewidth=1)
+        if strike is not None:
+            ax.axvline(strike, color="red", linestyle="--", label="Strike Price")
+        ax.set_xlabel("Stock Price at Expiration (S)")
+        ax.grid(True)
+        lines.append((expiry_line, halfway_line))
+    for ax in axes[::cols]:
+        ax.set_ylabel("Profit / Loss")
+    axes[0].legend(fontsize="small")
+
+    pdf = PdfPages(files[0]) if files[0].lower().endswith(".pdf") else None
+    try:
+        for page, filename in enumerate(files):
+            first = page * per_page
+            for slot, ax in enumerate(axes):
+                i = first + slot
+                ax.set_visible(i < len(names))
+                if i >= len(names):
+                    continue
+                curves = [payoffs[i]]
+                lines[slot][0].set_ydata(payoffs[i])
+                if pre_expiry is not None:
+                    lines[slot][1].set_ydata(pre_expiry[i])
+                    curves.append(pre_expiry[i])
+                ax.set_title(f"Payoff Diagram: {names[i]}", fontsize="medium")
+                low = min(np.nanmin(curve) for curve in curves)
+                high = max(np.nanmax(curve) for curve in curves)
+                pad = max(high - low, 1.0) * 0.05
+                ax.set_ylim(low - pad, high + pad)
+            if pdf is not None:
+                pdf.savefig(figure)
+            else:
+                figure.savefig(filename)
+    finally:
+        if pdf is not None:
+            pdf.close()
+    return sorted(set(files))
+
+
+def render_payoffs(
+    strategies,
+    path,
+    prices=S,
+    strike=K,
+    volatility=volatility,
+    rate=rate,
+    grid=DEFAULT_GRID,
+    processes=None,
+    dpi=100,
+):
+    """
+    Render payoff diagrams for many strategies to files, without a display
+
+    Strategies are drawn `grid` (rows, columns) to a page. The format comes
+    from the extension: a .pdf gets one page per grid, .png and .svg get one
+    file per page (report-001.png, ...). Payoffs for every strategy are
+    computed in one vectorized call before any drawing.
+
+    Args:
+        strategies (dict): name -> list of Legs
+        path (str): Output file (.png, .svg or .pdf)
+        prices (numpy.ndarray): Underlying prices on the x-axis
+        strike (float): Draw a strike line here (None for no line)
+        volatility, rate (float): Market assumptions for the halfway curve,
+            which is left out when no leg has an expiry
+        grid (tuple): (rows, columns) of diagrams per page
+        processes (int): Render PNG/SVG pages on this many worker processes;
+            a PDF is one file, so it is always written by this process
+        dpi (int): Resolution of PNG output
+
+    Returns:
+        list: Files written (none if `strategies` is empty)
+    """
+    names = list(strategies)
+    if not names:
+        return []
+    packed = pack_strategies(list(strategies.values()))
+    payoffs = payoff(packed, prices)
+    pre_expiry = _halfway_values(packed, prices, volatility, rate)
+
+    if len(names) < grid[0] * grid[1]:
+        # A single short page: drop the empty rows and columns
+        cols = min(grid[1], max(1, len(names)))
+        grid = (max(1, -(-len(names) // cols)), cols)
+    per_page = grid[0] * grid[1]
+    pages = max(1, -(-len(names) // per_page))
+    files = _page_files(path, pages)
+
+    def job(first_page, last_page):
+        lo, hi = first_page * per_page, last_page * per_page
+        return (
+            names[lo:hi],
+            payoffs[lo:hi],
+            None if pre_expiry is None else pre_expiry[lo:hi],
+            prices,
+            strike,
+            grid,
+            dpi,
+            files[first_page:last_page],
+        )
+
+    if not processes or processes < 2 or path.lower().endswith(".pdf") or pages < 2:
+        return _render_pages(job(0, pages))
+
+    # Contiguous runs of pages, one per worker
+    bounds = np.linspace(0, pages, min(processes, pages) + 1).astype(int)
+    with ProcessPoolExecutor(max_workers=len(bounds) - 1) as pool:
+        written = pool.map(
+            _render_pages, [job(a, b) for a, b in zip(bounds[:-1], bounds[1:])]
+        )
+    return [filename for chunk in written for filename in chunk]
+
+
+def main():
+    strategies = single_leg_strategies()
+    print_stats(strategies)
+    plot_payoffs(strategies)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Vectorized multi-leg option strategy payoff engine
+A strategy is a list of legs; many strategies are evaluated at once by
+broadcasting over a strategies x legs x prices array
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from black_scholes import bs_price
+
+
+@dataclass(frozen=True)
+class Leg:
+    """
+    One option position
+
+    kind: "call" or "put"
+    side: "long" or "short"
+    strike: strike price
+    premium: price paid (long) or received (short) per option
+    quantity: number of options
+    expiry: years until expiry (used for pre-expiry valuation)
+    """
+
+    kind: str
+    strike: float
+    premium: float = 0.0
+    side: str = "long"
+    quantity: float = 1.0
+    expiry: float = None
+
+
+def pack_strategies(strategies):
+    """
+    Stack strategies into padded strategies x legs arrays
+
+    Padding legs have position 0 and a NaN strike, so they add nothing.
+
+    Returns:
+        dict: 'is_call', 'position' (signed quantity), 'strike', 'premium'
+        and 'expiry' arrays, each of shape (n_strategies, max_legs)
+    """
+    n = len(strategies)
+    width = max((len(legs) for legs in strategies), default=0)
+    packed = {
+        "is_call": np.zeros((n, width), dtype=bool),
+        "position": np.zeros((n, width)),
+        "strike": np.full((n, width), np.nan),
+        "premium": np.zeros((n, width)),
+        "expiry": np.full((n, width), np.nan),
+    }
+    for i, legs in enumerate(strategies):
+        for j, leg in enumerate(legs):
+            if leg.kind not in ("call", "put") or leg.side not in ("long", "short"):
+                raise ValueError(f"Invalid leg: {leg}")
+            packed["is_call"][i, j] = leg.kind == "call"
+            sign = 1.0 if leg.side == "long" else -1.0
+            packed["position"][i, j] = sign * leg.quantity
+            packed["strike"][i, j] = leg.strike
+            packed["premium"][i, j] = leg.premium
+            if leg.expiry is not None:
+                packed["expiry"][i, j] = leg.expiry
+    return packed
+
+
+def _as_packed(strategies):
+    return strategies if isinstance(strategies, dict) else pack_strategies(strategies)
+
+
+def _payoff_at(packed, prices):
+    """
+    Expiry P&L of every strategy at `prices`
+
+    prices broadcasts against (n_strategies, 1, n_points); the result has
+    shape (n_strategies, n_points)
+    """
+    strike = np.nan_to_num(packed["strike"])[:, :, None]
+    intrinsic = np.where(
+        packed["is_call"][:, :, None],
+        np.maximum(prices - strike, 0),
+        np.maximum(strike - prices, 0),
+    )
+    pnl = packed["position"][:, :, None] * (intrinsic - packed["premium"][:, :, None])
+    return pnl.sum(axis=1)
+
+
+def payoff(strategies, prices):
+    """
+    P&L at expiry of many strategies over a price grid
+
+    Args:
+        strategies: list of strategies (each a list of Leg) or pack_strategies output
+        prices (array-like): Underlying prices at expiry
+
+    Returns:
+        numpy.ndarray: shape (n_strategies, n_prices)
+    """
+    prices = np.asarray(prices, dtype=float)
+    return _payoff_at(_as_packed(strategies), prices[None, None, :])
+
+
+def strategy_stats(strategies):
+    """
+    Breakevens, max profit and max loss of many strategies, computed exactly
+
+    Expiry payoffs are piecewise linear with kinks only at the strikes, so
+    they are evaluated at S = 0 and at each strike, and the slope beyond the
+    highest strike (the net call position) decides whether profit or loss is
+    unbounded.
+
+    Returns:
+        dict: 'max_profit' and 'max_loss' arrays of shape (n_strategies,)
+        (+inf / -inf when unbounded), and 'breakevens' of shape
+        (n_strategies, max_legs + 1), NaN-padded and sorted
+    """
+    packed = _as_packed(strategies)
+    n, width = packed["strike"].shape
+
+    # Kink points: S = 0 followed by the sorted strikes (NaN padding sorts last)
+    points = np.concatenate([np.zeros((n, 1)), np.sort(packed["strike"], axis=1)], 1)
+    values = _payoff_at(packed, np.nan_to_num(points)[:, None, :])
+    values[np.isnan(points)] = np.nan
+    last = (~np.isnan(points)).sum(axis=1) - 1
+    last_point = points[np.arange(n), last]
+    last_value = values[np.arange(n), last]
+    slope = np.where(packed["is_call"], packed["position"], 0).sum(axis=1)
+
+    max_profit = np.where(slope > 0, np.inf, np.nanmax(values, axis=1))
+    max_loss = np.where(slope < 0, -np.inf, np.nanmin(values, axis=1))
+
+    # Roots on each segment between consecutive kink points
+    x0, x1 = points[:, :-1], points[:, 1:]
+    y0, y1 = values[:, :-1], values[:, 1:]
+    segment = x1 > x0  # False for padding and for repeated strikes
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing = np.where(
+            y0 == 0, x0, np.where(y0 * y1 < 0, x0 - y0 * (x1 - x0) / (y1 - y0), np.nan)
+        )
+        tail = np.where(
+            last_value == 0,
+            last_point,
+            np.where(last_value * slope < 0, last_point - last_value / slope, np.nan),
+        )
+    crossing[~segment] = np.nan
+    breakevens = np.sort(np.concatenate([crossing, tail[:, None]], axis=1), axis=1)
+
+    return {
+        "max_profit": max_profit,
+        "max_loss": max_loss,
+        "breakevens": breakevens,
+    }
+
+
+def price_strategies(strategies, spot, vol, rate=0.0, dividend=0.0):
+    """
+    Replace every leg's premium with its Black-Scholes price
+
+    Legs need an expiry (years); vol may be a scalar or an array that
+    broadcasts against the (n_strategies, max_legs) leg arrays.
+
+    Returns:
+        dict: packed strategies with model premiums
+    """
+    packed = dict(_as_packed(strategies))
+    real = packed["position"] != 0
+    if np.isnan(packed["expiry"][real]).any():
+        raise ValueError("Model pricing needs an expiry on every leg")
+    premium = bs_price(
+        spot,
+        np.nan_to_num(packed["strike"]),
+        vol,
+        np.nan_to_num(packed["expiry"]),
+        rate,
+        packed["is_call"],
+        dividend,
+    )
+    packed["premium"] = np.where(real, premium, 0.0)
+    return packed
+
+
+def value_before_expiry(strategies, prices, elapsed, vol, rate=0.0, dividend=0.0):
+    """
+    Mark-to-model P&L of many strategies `elapsed` years from now
+
+    Each leg is valued with Black-Scholes on its remaining time
+    (expiry - elapsed); legs that have expired by then, or have no expiry,
+    are worth their intrinsic value. `elapsed` may also be an
+    (n_strategies, 1) array, giving each strategy its own horizon.
+
+    Returns:
+        numpy.ndarray: shape (n_strategies, n_prices)
+    """
+    packed = _as_packed(strategies)
+    prices = np.asarray(prices, dtype=float)[None, None, :]
+    remaining = np.nan_to_num(packed["expiry"] - elapsed)[:, :, None]
+    value = bs_price(
+        prices,
+        np.nan_to_num(packed["strike"])[:, :, None],
+        vol,
+        remaining,
+        rate,
+        packed["is_call"][:, :, None],
+        dividend,
+    )
+    pnl = packed["position"][:, :, None] * (value - packed["premium"][:, :, None])
+    return pnl.sum(axis=1)
+
+
+def long_call(strike, premium, quantity=1):
+    return [Leg("call", strike, premium, "long", quantity)]
+
+
+def long_put(strike, premium, quantity=1):
+    return [Leg("put", strike, premium, "long", quantity)]
+
+
+def straddle(strike, call_premium, put_premium, side="long"):
+    return [
+        Leg("call", strike, call_premium, side),
+        Leg("put", strike, put_premium, side),
+    ]
+
+
+def vertical_spread(kind, long_strike, short_strike, long_premium, short_premium):
+    """Bull/bear call or put spread: buy one strike, sell the other"""
+    return [
+        Leg(kind, long_strike, long_premium, "long"),
+        Leg(kind, short_strike, short_premium, "short"),
+    ]
+
+
+def iron_condor(put_wing, put_body, call_body, call_wing, premiums):
+    """
+    Short iron condor; premiums are for (put_wing, put_body, call_body, call_wing)
+    """
+    return [
+        Leg("put", put_wing, premiums[0], "long"),
+        Leg("put", put_body, premiums[1], "short"),
+        Leg("call", call_body, premiums[2], "short"),
+        Leg("call", call_wing, premiums[3], "long"),
+    ]
@@ -4,103 +4,269 @@ Fetches current stock prices and calculates portfolio performance
 Outputs results to an Excel file
 """
 
+import csv
+import numpy as np
 import pandas as pd
-import yfinance as yf
 from datetime import datetime
 
+from fetch_pool import fetch_concurrently
+from fx import (
+    DEFAULT_CURRENCY_CACHE_PATH,
+    DEFAULT_CURRENCY_TTL,
+    listing_conversion,
+    normalize_currency,
+)
+from holdings import Holdings
+from instrumentation import metrics
+from market_data import DEFAULT_BATCH_SIZE, fetch_last_prices, get_provider
+from ttl_cache import TTLCache
+
+# Value of the Status column for each lot
+STATUS_OK = "ok"
+STATUS_NO_PRICE = "no price"
+STATUS_ERROR = "fetch error"
+STATUS_NO_FX = "no fx rate"
+
+# Columns that are NaN when a lot has no current price
+PRICED_COLUMNS = ["Current Price", "Current Value", "Profit/Loss", "Return %"]
+
+# EXAMPLE PORTFOLIO - Replace with your actual holdings
+EXAMPLE_PORTFOLIO = [
+    {"ticker": "AMPY", "shares": 133, "purchase_price": 5.49},
+    {"ticker": "HIMS", "shares": 36.39, "purchase_price": 49.04},
+    {"ticker": "ITGR", "shares": 20, "purchase_price": 68.85},
+    {"ticker": "LULU", "shares": 9, "purchase_price": 175.83},
+    {"ticker": "MA", "shares": 2, "purchase_price": 558.50},
+    {"ticker": "META", "shares": 2, "purchase_price": 664.25},
+    {"ticker": "REGN", "shares": 3, "purchase_price": 570.33},
+    {"ticker": "SMCI", "shares": 11, "purchase_price": 46.28},
+    {"ticker": "UNH", "shares": 4, "purchase_price": 319.76},
+    {"ticker": "V", "shares": 4, "purchase_price": 343.19},
+    {"ticker": "VUAG.L", "shares": 112, "purchase_price": 87.4},  #
+    {"ticker": "VUSA.L", "shares": 115, "purchase_price": 84.69},
+    {"ticker": "ZIM", "shares": 15, "purchase_price": 17.63},
+    {"ticker": "AMPY", "shares": 72, "purchase_price": 6.23},
+    {"ticker": "UNH", "shares": 3, "purchase_price": 300.33},
+    {"ticker": "VUAG.L", "shares": 112, "purchase_price": 87.37},  #
+    {"ticker": "VUSA.L", "shares": 112, "purchase_price": 83.97},
+    # {'ticker': 'AAPL', 'shares': 10, 'purchase_price': 150.00},
+    # {'ticker': 'MSFT', 'shares': 5, 'purchase_price': 300.00},
+    # {'ticker': 'GOOGL', 'shares': 8, 'purchase_price': 120.00},
+    # {'ticker': 'TSLA', 'shares': 3, 'purchase_price': 250.00},
+    # {'ticker': 'AMZN', 'shares': 4, 'purchase_price': 140.00},
+]
+
+
+def read_portfolio(path):
+    """
+    Load holdings from a CSV file with ticker, shares and purchase_price
+    columns, and an optional purchase_date column (YYYY-MM-DD)
+
+    Returns:
+        list: dicts in analyze_portfolio's input format
+    """
+    holdings = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            holding = {
+                "ticker": row["ticker"].strip(),
+                "shares": float(row["shares"]),
+                "purchase_price": float(row["purchase_price"]),
+            }
+            if row.get("purchase_date"):
+                holding["purchase_date"] = row["purchase_date"].strip()
+            holdings.append(holding)
+    return holdings
+
+
+def _fetch_price(ticker):
+    """
+    Look up the current price for one ticker, letting errors propagate
+
+    Returns:
+        float: the price, or None if the provider answered without one
+    """
+    provider = get_provider()
+    info = provider.info(ticker)
+    current_price = info.get("currentPrice") or info.get("regularMarketPrice")
+    if current_price is None:
+        # Try getting from history if info doesn't have price
+        hist = provider.history(ticker, period="1d")
+        if not hist.empty:
+            current_price = hist["Close"].iloc[-1]
+    return current_price
+
+
+def _fetch_one(ticker):
+    """
+    Price one ticker through the fetch layer, for its timeout, retries and
+    circuit breaker
+
+    Returns:
+        tuple: (price, error) - price is None if there is none, error is the
+        message if the request failed (None otherwise)
+    """
+    results, errors = fetch_concurrently(
+        _fetch_price, [ticker], provider=get_provider().name, max_workers=1
+    )
+    return results[0], errors.get(ticker)
+
 
 def get_stock_data(ticker):
     """Fetch current stock price and basic info"""
-    try:
-        stock = yf.Ticker(ticker)
-        current_price = stock.info.get("currentPrice") or stock.info.get(
-            "regularMarketPrice"
-        )
-        if current_price is None:
-            # Try getting from history if info doesn't have price
-            hist = stock.history(period="1d")
-            if not hist.empty:
-                current_price = hist["Close"].iloc[-1]
-        return current_price
-    except Exception as e:
-        print(f"Error fetching data for {ticker}: {e}")
-        return None
-
-
-def analyze_portfolio(portfolio_data):
+    price, error = _fetch_one(ticker)
+    if error is not None:
+        print(f"Error fetching data for {ticker}: {error}")
+    return price
+
+
+def fetch_prices(tickers, max_workers=None, batch_size=None):
+    """
+    Fetch current prices for many tickers
+
+    With batch_size set, prices come from chunked multi-ticker downloads and
+    only tickers missing from those are looked up one by one. The per-ticker
+    lookups run on a bounded worker pool.
+
+    Returns:
+        tuple: (prices, errors) - prices is a list aligned with `tickers`
+        (None where unavailable), errors maps ticker -> error message for
+        the lookups that failed; a ticker the provider has no price for is
+        None without an error
+    """
+    batched = {}
+    if batch_size:
+        batched = fetch_last_prices(tickers, batch_size=batch_size)
+
+    def fetch(ticker):
+        if ticker in batched:
+            return batched[ticker]
+        return _fetch_price(ticker)
+
+    return fetch_concurrently(
+        fetch, tickers, provider=get_provider().name, max_workers=max_workers
+    )
+
+
+def analyze_portfolio(
+    portfolio_data,
+    max_workers=None,
+    batch_size=None,
+    base_currency=None,
+    currency_cache=None,
+):
     """
     Analyze portfolio performance
 
+    Each unique ticker is priced once, however many lots hold it, and all
+    lots are then valued in one vectorized pass.
+
     Parameters:
     portfolio_data: list of dicts with keys: 'ticker', 'shares', 'purchase_price'
+                    (or a Holdings instance)
+    max_workers: fetch prices concurrently with this many workers
+    batch_size: fetch prices in multi-ticker batches of this size
+                (with neither set, prices are fetched one ticker at a time)
+    base_currency: convert every value into this currency (e.g. 'USD'), so
+                   totals across listings add up; purchase prices are taken
+                   to be in the listing's major currency (GBP, not GBp)
+    currency_cache: optional TTLCache of each ticker's quote currency
+
+    Returns:
+    pandas.DataFrame with one row per lot: float64 value columns (NaN where no
+    price is available) and a Status column (STATUS_OK, STATUS_NO_PRICE,
+    STATUS_ERROR or STATUS_NO_FX); with base_currency, a Currency column gives
+    each listing's currency (missing if it could not be found, which leaves
+    the lot unvalued). render_results() turns it into display strings
     """
-    results = []
-
-    for holding in portfolio_data:
-        ticker = holding["ticker"]
-        shares = holding["shares"]
-        purchase_price = holding["purchase_price"]
-
-        print(f"Fetching data for {ticker}...")
-        current_price = get_stock_data(ticker)
-
-        if current_price:
-            initial_value = shares * purchase_price
-            current_value = shares * current_price
-            profit_loss = current_value - initial_value
-            profit_loss_pct = ((current_price - purchase_price) / purchase_price) * 100
-
-            results.append(
-                {
-                    "Ticker": ticker,
-                    "Shares": shares,
-                    "Purchase Price": purchase_price,
-                    "Current Price": round(current_price, 2),
-                    "Initial Value": round(initial_value, 2),
-                    "Current Value": round(current_value, 2),
-                    "Profit/Loss": round(profit_loss, 2),
-                    "Return %": round(profit_loss_pct, 2),
-                }
+    holdings = (
+        portfolio_data
+        if isinstance(portfolio_data, Holdings)
+        else Holdings.from_records(portfolio_data)
+    )
+    tickers = list(holdings.symbols)
+
+    errors = {}
+    with metrics.timer("stage.fetch", command="portfolio"):
+        if max_workers or batch_size:
+            print(f"Fetching data for {len(tickers)} tickers...")
+            prices, errors = fetch_prices(
+                tickers, max_workers=max_workers, batch_size=batch_size
             )
+            for ticker, error in errors.items():
+                print(f"Error fetching data for {ticker}: {error}")
         else:
-            results.append(
-                {
-                    "Ticker": ticker,
-                    "Shares": shares,
-                    "Purchase Price": purchase_price,
-                    "Current Price": "N/A",
-                    "Initial Value": round(shares * purchase_price, 2),
-                    "Current Value": "N/A",
-                    "Profit/Loss": "N/A",
-                    "Return %": "N/A",
-                }
+            prices = []
+            for ticker in tickers:
+                print(f"Fetching data for {ticker}...")
+                price, error = _fetch_one(ticker)
+                if error is not None:
+                    print(f"Error fetching data for {ticker}: {error}")
+                    errors[ticker] = error
+                prices.append(price)
+
+        if base_currency:
+            currencies, quote_factors, major_factors = listing_conversion(
+                tickers, base_currency, max_workers=max_workers, cache=currency_cache
             )
 
-    return results
+    with metrics.timer("stage.compute", command="portfolio"):
+        prices = holdings.symbol_prices(prices)
+        priced = ~np.isnan(prices)
+        if base_currency:
+            # One multiply per column: quotes (pence for GBp) and purchase
+            # prices (pounds) both go straight into the base currency
+            prices = prices * quote_factors
+            holdings = Holdings(
+                holdings.tickers,
+                holdings.shares,
+                holdings.purchase_prices * major_factors[holdings.codes],
+                holdings.purchase_dates,
+            )
+        df = holdings.revalue(prices).round(
+            {
+                "Purchase Price": 2,
+                "Current Price": 2,
+                "Initial Value": 2,
+                "Current Value": 2,
+                "Profit/Loss": 2,
+                "Return %": 2,
+            }
+        )
 
+    if base_currency:
+        listed = np.array(
+            [normalize_currency(c)[0] if c else None for c in currencies], dtype=object
+        )
+        df.insert(1, "Currency", listed[holdings.codes])
 
-def export_to_excel(results, filename=None):
-    """Export portfolio analysis to Excel file"""
-    if filename is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"portfolio_analysis_{timestamp}.xlsx"
+    status = np.where(
+        np.isin(holdings.symbols, list(errors)), STATUS_ERROR, STATUS_NO_PRICE
+    )
+    status = np.where(priced, STATUS_NO_FX, status)[holdings.codes]
+    df["Status"] = np.where(df["Current Price"].isna(), status, STATUS_OK)
+    return df
+
+
+def _export_frame(results):
+    """
+    Sort results by Profit/Loss (best first, missing last) and append a TOTAL row
 
+    Returns:
+        pandas.DataFrame: still typed - NaN marks missing values, and the
+        TOTAL row is NaN in the per-lot columns
+    """
     df = pd.DataFrame(results)
 
     # Sort by Profit/Loss (descending - best performers first)
-    # Handle 'N/A' values by treating them as 0 for sorting
-    df_sorted = df.copy()
-    df_sorted["PL_Sort"] = df_sorted["Profit/Loss"].apply(
-        lambda x: x if x != "N/A" else -999999
-    )
-    df_sorted = df_sorted.sort_values("PL_Sort", ascending=False)
-    df_sorted = df_sorted.drop("PL_Sort", axis=1)
-    df = df_sorted
+    df = df.sort_values(
+        "Profit/Loss", ascending=False, na_position="last", kind="stable"
+    ).reset_index(drop=True)
 
     # Calculate totals
-    total_initial = df[df["Initial Value"] != "N/A"]["Initial Value"].sum()
-    total_current = df[df["Current Value"] != "N/A"]["Current Value"].sum()
-    total_pl = df[df["Profit/Loss"] != "N/A"]["Profit/Loss"].sum()
+    total_initial = df["Initial Value"].sum()
+    total_current = df["Current Value"].sum()
+    total_pl = df["Profit/Loss"].sum()
     total_return_pct = (
         ((total_current - total_initial) / total_initial) * 100
         if total_initial > 0
@@ -112,62 +278,136 @@ def export_to_excel(results, filename=None):
         [
             {
                 "Ticker": "TOTAL",
-                "Shares": "",
-                "Purchase Price": "",
-                "Current Price": "",
                 "Initial Value": round(total_initial, 2),
                 "Current Value": round(total_current, 2),
                 "Profit/Loss": round(total_pl, 2),
                 "Return %": round(total_return_pct, 2),
+                "Status": "",
             }
         ]
     )
 
-    df = pd.concat([df, summary], ignore_index=True)
-
-    # Create Excel writer with formatting
-    with pd.ExcelWriter(filename, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name="Portfolio", index=False)
-
-        # Get the worksheet
-        worksheet = writer.sheets["Portfolio"]
-
-        # Adjust column widths
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 20)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-
-        # Apply formatting to header
-        from openpyxl.styles import Font, PatternFill, Alignment
-
-        header_fill = PatternFill(
-            start_color="366092", end_color="366092", fill_type="solid"
-        )
-        header_font = Font(bold=True, color="FFFFFF")
+    return pd.concat([df, summary], ignore_index=True)
 
-        for cell in worksheet[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center")
 
-        # Format summary row
-        last_row = worksheet.max_row
-        summary_fill = PatternFill(
-            start_color="D9E1F2", end_color="D9E1F2", fill_type="solid"
-        )
-        summary_font = Font(bold=True)
+def render_results(df):
+    """
+    Display strings for a results frame: 'N/A' where a lot has no price,
+    blanks in the columns the TOTAL row does not fill
+    """
+    df = df.copy()
+    total = (df["Ticker"] == "TOTAL").to_numpy()
+    for column in df.columns.drop(["Ticker", "Status"], errors="ignore"):
+        missing = df[column].isna().to_numpy()
+        if not missing.any():
+            continue
+        df[column] = df[column].astype(object)
+        df.loc[missing & ~total, column] = "N/A"
+        df.loc[missing & total, column] = ""
+    return df
+
+
+def _column_widths(df, max_width=20):
+    """Column widths from per-column statistics instead of a per-cell scan"""
+    widths = {}
+    for column in df.columns:
+        values = df[column]
+        numbers = pd.to_numeric(values, errors="coerce")
+        longest = len(str(column))
+        if numbers.notna().any():
+            # The widest number is one of the extremes
+            for extreme in (numbers.max(), numbers.min()):
+                longest = max(longest, len(f"{extreme:,.2f}"))
+        text = values[numbers.isna() & values.notna()]
+        if not text.empty:
+            longest = max(longest, int(text.astype(str).str.len().max()))
+        widths[column] = min(longest + 2, max_width)
+    return widths
+
+
+@metrics.timer("stage.export", format="xlsx")
+def export_to_excel(results, filename=None):
+    """
+    Export portfolio analysis to Excel file
+
+    The workbook is written in openpyxl's write-only mode, which streams rows
+    to disk instead of holding every cell in memory.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"portfolio_analysis_{timestamp}.xlsx"
+
+    df = render_results(_export_frame(results))
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Portfolio")
+
+    # Adjust column widths (must be set before any rows are streamed)
+    for i, width in enumerate(_column_widths(df).values(), start=1):
+        worksheet.column_dimensions[get_column_letter(i)].width = width
+
+    # Apply formatting to header
+    header_fill = PatternFill(
+        start_color="366092", end_color="366092", fill_type="solid"
+    )
+    header_font = Font(bold=True, color="FFFFFF")
+    header = []
+    for column in df.columns:
+        cell = WriteOnlyCell(worksheet, value=column)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal="center")
+        header.append(cell)
+    worksheet.append(header)
+
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False)
+    last_row = len(df) - 1
+    summary_fill = PatternFill(
+        start_color="D9E1F2", end_color="D9E1F2", fill_type="solid"
+    )
+    summary_font = Font(bold=True)
+    for i, row in enumerate(rows):
+        if i == last_row:
+            # Format summary row
+            row = [WriteOnlyCell(worksheet, value=value) for value in row]
+            for cell in row:
+                cell.fill = summary_fill
+                cell.font = summary_font
+        worksheet.append(list(row))
+
+    workbook.save(filename)
+
+    print(f"\n✓ Portfolio analysis exported to: {filename}")
+    return filename, df
+
 
-        for cell in worksheet[last_row]:
-            cell.fill = summary_fill
-            cell.font = summary_font
+def export_portfolio(results, filename):
+    """
+    Export portfolio analysis in the format given by the file extension
+
+    .xlsx streams a formatted workbook; .csv and .parquet write the same
+    sorted table (with its TOTAL row) without any per-cell formatting, which
+    keeps very large books fast and memory-bounded. Parquet needs pyarrow.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "xlsx":
+        return export_to_excel(results, filename)
+
+    with metrics.timer("stage.export", format=extension):
+        df = _export_frame(results)
+        if extension == "csv":
+            df = render_results(df)
+            df.to_csv(filename, index=False)
+        elif extension == "parquet":
+            # Parquet keeps the typed columns, with nulls for missing values
+            df.to_parquet(filename, index=False)
+        else:
+            raise ValueError(f"Unsupported export format: {filename}")
 
     print(f"\n✓ Portfolio analysis exported to: {filename}")
     return filename, df
@@ -176,31 +416,7 @@ def export_to_excel(results, filename=None):
 def main():
     """Main function to run portfolio analysis"""
 
-    # EXAMPLE PORTFOLIO - Replace with your actual holdings
-    portfolio = [
-        {"ticker": "AMPY", "shares": 133, "purchase_price": 5.49},
-        {"ticker": "HIMS", "shares": 36.39, "purchase_price": 49.04},
-        {"ticker": "ITGR", "shares": 20, "purchase_price": 68.85},
-        {"ticker": "LULU", "shares": 9, "purchase_price": 175.83},
-        {"ticker": "MA", "shares": 2, "purchase_price": 558.50},
-        {"ticker": "META", "shares": 2, "purchase_price": 664.25},
-        {"ticker": "REGN", "shares": 3, "purchase_price": 570.33},
-        {"ticker": "SMCI", "shares": 11, "purchase_price": 46.28},
-        {"ticker": "UNH", "shares": 4, "purchase_price": 319.76},
-        {"ticker": "V", "shares": 4, "purchase_price": 343.19},
-        {"ticker": "VUAG.L", "shares": 112, "purchase_price": 87.4},  #
-        {"ticker": "VUSA.L", "shares": 115, "purchase_price": 84.69},
-        {"ticker": "ZIM", "shares": 15, "purchase_price": 17.63},
-        {"ticker": "AMPY", "shares": 72, "purchase_price": 6.23},
-        {"ticker": "UNH", "shares": 3, "purchase_price": 300.33},
-        {"ticker": "VUAG.L", "shares": 112, "purchase_price": 87.37},  #
-        {"ticker": "VUSA.L", "shares": 112, "purchase_price": 83.97},
-        # {'ticker': 'AAPL', 'shares': 10, 'purchase_price': 150.00},
-        # {'ticker': 'MSFT', 'shares': 5, 'purchase_price': 300.00},
-        # {'ticker': 'GOOGL', 'shares': 8, 'purchase_price': 120.00},
-        # {'ticker': 'TSLA', 'shares': 3, 'purchase_price': 250.00},
-        # {'ticker': 'AMZN', 'shares': 4, 'purchase_price': 140.00},
-    ]
+    portfolio = EXAMPLE_PORTFOLIO
 
     print("=" * 60)
     print("STOCK PORTFOLIO ANALYSIS")
@@ -208,39 +424,17 @@ def main():
     print(f"\nAnalyzing {len(portfolio)} holdings...\n")
 
     # Analyze portfolio
-    results = analyze_portfolio(portfolio)
+    results = analyze_portfolio(
+        portfolio,
+        max_workers=8,
+        batch_size=DEFAULT_BATCH_SIZE,
+        base_currency="USD",
+        currency_cache=TTLCache(DEFAULT_CURRENCY_CACHE_PATH, DEFAULT_CURRENCY_TTL),
+    )
     # print(results) # returns a list
 
-    df_results = pd.DataFrame(results)
-    df_results["PL_Sort"] = df_results["Profit/Loss"].apply(
-        lambda x: x if x != "N/A" else -999999
-    )
-    df_results = df_results.sort_values("PL_Sort", ascending=False).drop(
-        "PL_Sort", axis=1
-    )
-    # Calculate totals for columns from 'Purchase Price' to 'Return %'
-    totals_row = {
-        "Ticker": "TOTALS",
-        "Shares": round(df_results[df_results["Shares"] != "N/A"]["Shares"].sum(), 2),
-        "Purchase Price": "N/A",
-        "Current Price": "N/A",
-        "Initial Value": round(
-            df_results[df_results["Initial Value"] != "N/A"]["Initial Value"].sum(), 2
-        ),
-        "Current Value": round(
-            df_results[df_results["Current Value"] != "N/A"]["Current Value"].sum(), 2
-        ),
-        "Profit/Loss": round(
-            df_results[df_results["Profit/Loss"] != "N/A"]["Profit/Loss"].sum(), 2
-        ),
-        "Return %": round(
-            df_results[df_results["Return %"] != "N/A"]["Return %"].sum(), 2
-        ),
-    }
-
-    df_totals = pd.DataFrame([totals_row])
-    df_results_with_totals = pd.concat([df_results, df_totals], ignore_index=True)
-    df_results_with_totals.head(12)
+    df_results_with_totals = render_results(_export_frame(results))
+    print(df_results_with_totals.head(12).to_string(index=False))
 
     # # Export to Excel
     # filename, df = export_to_excel(results)
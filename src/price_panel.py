@@ -0,0 +1,153 @@
+"""
+Aligned multi-symbol price panel
+Holds one price field for many symbols as a single contiguous
+symbols x dates array on a shared trading-calendar index, with a mask of
+which bars exist. Rows, columns and date windows are zero-copy views, so
+performance, risk and backtest code can share one panel instead of keeping
+a full OHLCV DataFrame per symbol.
+"""
+
+import numpy as np
+
+
+def fill_forward(values):
+    """Carry the last non-NaN value along each row"""
+    idx = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = np.take_along_axis(values, idx, axis=1)
+    return filled
+
+
+def fill_backward(values):
+    """Carry the next non-NaN value back along each row"""
+    return fill_forward(values[:, ::-1])[:, ::-1]
+
+
+class PricePanel:
+    """
+    One price field for many symbols on a shared date index
+
+    Attributes:
+        symbols (list): Row labels
+        dates (numpy.ndarray): Sorted datetime64[ns] column labels
+        values (numpy.ndarray): float64 or float32 symbols x dates prices,
+            NaN where a symbol has no bar on that date
+        mask (numpy.ndarray): bool symbols x dates, True where a bar exists
+    """
+
+    def __init__(self, symbols, dates, values, mask=None):
+        self.symbols = list(symbols)
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.values = np.asarray(values)
+        self.mask = ~np.isnan(self.values) if mask is None else mask
+        self._rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_histories(cls, histories, field="Close", dtype=np.float64):
+        """
+        Align per-symbol bars onto the union of their dates
+
+        Args:
+            histories (dict): symbol -> DataFrame with a naive date index
+            field (str): Column to keep (the other OHLCV columns are dropped)
+            dtype: np.float64, or np.float32 to halve the panel's memory
+
+        Returns:
+            PricePanel
+        """
+        symbols = list(histories)
+        indexes = [histories[s].index.values.astype("datetime64[ns]") for s in symbols]
+        dates = (
+            np.unique(np.concatenate(indexes))
+            if indexes
+            else np.array([], "datetime64[ns]")
+        )
+        values = np.full((len(symbols), len(dates)), np.nan, dtype=dtype)
+        for row, (symbol, index) in enumerate(zip(symbols, indexes)):
+            values[row, np.searchsorted(dates, index)] = histories[symbol][
+                field
+            ].to_numpy(dtype)
+        return cls(symbols, dates, values)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self):
+        """Memory held by the values, mask and date index"""
+        return self.values.nbytes + self.mask.nbytes + self.dates.nbytes
+
+    def row(self, symbol):
+        """One symbol's prices across all dates (a view)"""
+        return self.values[self._rows[symbol]]
+
+    def column(self, date):
+        """
+        Every symbol's price on one date (a strided view)
+
+        Raises:
+            KeyError: the date is not in the index
+        """
+        key = np.datetime64(date, "ns")
+        j = np.searchsorted(self.dates, key)
+        if j == len(self.dates) or self.dates[j] != key:
+            raise KeyError(f"{date} is not in the panel")
+        return self.values[:, j]
+
+    def window(self, start=None, end=None):
+        """
+        Panel restricted to start <= date <= end, sharing this panel's memory
+        """
+        lo = (
+            0
+            if start is None
+            else np.searchsorted(self.dates, np.datetime64(start, "ns"))
+        )
+        hi = (
+            len(self.dates)
+            if end is None
+            else np.searchsorted(self.dates, np.datetime64(end, "ns"), side="right")
+        )
+        return PricePanel(
+            self.symbols, self.dates[lo:hi], self.values[:, lo:hi], self.mask[:, lo:hi]
+        )
+
+    def select(self, symbols):
+        """Panel of some symbols only (a copy, in the order given)"""
+        rows = [self._rows[symbol] for symbol in symbols]
+        return PricePanel(symbols, self.dates, self.values[rows], self.mask[rows])
+
+    def last(self):
+        """
+        Latest price of each symbol
+
+        Returns:
+            numpy.ndarray: one value per symbol, NaN for symbols without bars
+        """
+        if not self.values.size:
+            return np.full(len(self.symbols), np.nan, dtype=self.values.dtype)
+        # Position of the last True in each mask row
+        last = self.mask.shape[1] - 1 - np.argmax(self.mask[:, ::-1], axis=1)
+        return self.values[np.arange(len(self.symbols)), last]
+
+    def filled(self, backward=False):
+        """
+        Copy with gaps filled from the previous bar; with backward=True the
+        dates before a symbol's first bar take that first bar's value too
+        """
+        filled = fill_forward(self.values)
+        return fill_backward(filled) if backward else filled
+
+    def to_frame(self):
+        """dates x symbols DataFrame over the panel's values"""
+        import pandas as pd
+
+        return pd.DataFrame(
+            self.values.T,
+            index=pd.DatetimeIndex(self.dates, name="Date"),
+            columns=self.symbols,
+        )
@@ -0,0 +1,207 @@
+"""
+Record/replay market data providers
+Recording wraps a live provider and saves every info, history and calendar
+response into a compressed local archive stamped with its as-of time;
+replaying serves the same responses back with no network access
+
+Either mode can be switched on for any script through the environment:
+    FINANCE_STOCKS_RECORD=snapshot.pkl.gz python src/portfolio_analysis.py
+    FINANCE_STOCKS_REPLAY=snapshot.pkl.gz python src/portfolio_analysis.py
+
+In either mode the calendar, currency and history caches are bypassed, so a
+recording holds every response even when the caches are warm, and a replay
+depends on the archive alone.
+
+Archives are pickles: only replay archives you recorded yourself.
+"""
+
+import gzip
+import os
+import pickle
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from market_data import split_download
+
+ARCHIVE_VERSION = 1
+
+
+def _empty_archive(as_of):
+    return {
+        "version": ARCHIVE_VERSION,
+        "as_of": as_of,
+        "info": {},
+        "calendar": {},
+        "bars": {},
+    }
+
+
+def load_archive(path):
+    with gzip.open(path, "rb") as f:
+        archive = pickle.load(f)
+    if archive.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported archive version in {path}")
+    return archive
+
+
+def save_archive(archive, path):
+    """Write atomically, so an interrupted save never leaves a broken archive"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with gzip.open(tmp, "wb") as f:
+        pickle.dump(archive, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _naive(hist):
+    if hist is None or hist.empty:
+        return hist
+    hist = hist.copy()
+    if hist.index.tz is not None:
+        hist.index = hist.index.tz_localize(None)
+    return hist
+
+
+def _window(as_of, start=None, end=None, period=None):
+    """Resolve a provider request into an inclusive [first, last] date range"""
+    as_of = pd.Timestamp(as_of)
+    if end is None:
+        last = as_of
+    else:
+        # `end` is exclusive unless it carries a time of day
+        end = pd.Timestamp(end)
+        last = end if end > end.normalize() else end - pd.Timedelta(days=1)
+    if start is not None:
+        first = pd.Timestamp(start).normalize()
+    elif period == "max":
+        first = pd.Timestamp.min
+    else:
+        first = as_of.normalize() - pd.Timedelta(days=_period_days(period or "1mo"))
+    return first, last
+
+
+def _period_days(period):
+    for suffix, days in (("d", 1), ("wk", 7), ("mo", 31), ("y", 366)):
+        if period.endswith(suffix) and period[: -len(suffix)].isdigit():
+            return int(period[: -len(suffix)]) * days
+    raise ValueError(f"Unsupported period: {period}")
+
+
+class RecordingProvider:
+    """
+    Passes requests to `inner` and keeps every response for the archive
+
+    Bars are merged per symbol, so overlapping history and download calls
+    end up as one series per symbol.
+    """
+
+    # Every response must reach the archive, so cached lookups are skipped
+    bypass_caches = True
+
+    def __init__(self, inner, path, as_of=None):
+        self.inner = inner
+        self.name = inner.name
+        self.path = path
+        self.archive = _empty_archive(as_of or datetime.now())
+        self._lock = threading.Lock()
+
+    @property
+    def as_of(self):
+        return self.archive["as_of"]
+
+    def _keep_bars(self, symbol, hist):
+        hist = _naive(hist)
+        if hist is None or hist.empty:
+            return
+        with self._lock:
+            stored = self.archive["bars"].get(symbol)
+            if stored is not None:
+                hist = hist.combine_first(stored)
+            self.archive["bars"][symbol] = hist
+
+    def download(self, symbols, start=None, end=None, period=None):
+        data = self.inner.download(symbols, start=start, end=end, period=period)
+        for symbol, hist in split_download(data, list(symbols)).items():
+            self._keep_bars(symbol, hist)
+        return data
+
+    def history(self, symbol, start=None, end=None, period=None):
+        hist = self.inner.history(symbol, start=start, end=end, period=period)
+        self._keep_bars(symbol, hist)
+        return hist
+
+    def info(self, symbol):
+        info = self.inner.info(symbol)
+        with self._lock:
+            self.archive["info"][symbol] = info
+        return info
+
+    def calendar(self, symbol):
+        calendar = self.inner.calendar(symbol)
+        with self._lock:
+            self.archive["calendar"][symbol] = calendar
+        return calendar
+
+    def save(self):
+        with self._lock:
+            save_archive(self.archive, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.save()
+
+
+class ReplayProvider:
+    """
+    Serves responses from an archive without touching the network
+
+    Requests for anything that was not recorded raise LookupError, which
+    the data modules report like any other per-symbol failure.
+    """
+
+    # Answers come from the archive alone, never from the user's caches
+    bypass_caches = True
+
+    def __init__(self, path):
+        self.path = path
+        self.archive = load_archive(path)
+        self.name = "replay"
+
+    @property
+    def as_of(self):
+        return self.archive["as_of"]
+
+    def _bars(self, symbol, start=None, end=None, period=None):
+        hist = self.archive["bars"].get(symbol)
+        if hist is None:
+            raise LookupError(f"{symbol}: no bars recorded in {self.path}")
+        first, last = _window(self.as_of, start, end, period)
+        return hist[(hist.index >= first) & (hist.index <= last)]
+
+    def download(self, symbols, start=None, end=None, period=None):
+        frames = {
+            symbol: self._bars(symbol, start, end, period)
+            for symbol in symbols
+            if symbol in self.archive["bars"]
+        }
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+    def history(self, symbol, start=None, end=None, period=None):
+        return self._bars(symbol, start, end, period)
+
+    def info(self, symbol):
+        if symbol not in self.archive["info"]:
+            raise LookupError(f"{symbol}: no info recorded in {self.path}")
+        return self.archive["info"][symbol]
+
+    def calendar(self, symbol):
+        if symbol not in self.archive["calendar"]:
+            raise LookupError(f"{symbol}: no calendar recorded in {self.path}")
+        return self.archive["calendar"][symbol]
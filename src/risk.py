@@ -0,0 +1,249 @@
+"""
+Portfolio risk engine
+Builds an aligned daily returns matrix for the holdings and estimates
+covariance, historical and parametric VaR/CVaR, and Monte Carlo P&L
+
+Losses are reported as positive amounts in the portfolio's price currency.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from statistics import NormalDist
+
+import numpy as np
+
+from holdings import Holdings
+from market_data import download_histories, now
+from price_panel import PricePanel
+
+# Paths simulated per chunk; memory per chunk is about chunk x tickers x 8 bytes
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def returns_matrix(histories):
+    """
+    Daily simple returns on the dates every symbol has traded
+
+    Args:
+        histories (dict): symbol -> DataFrame with a 'Close' column
+
+    Returns:
+        tuple: (symbols, dates, returns) - returns is float64 dates x symbols;
+        gaps inside a symbol's history are forward-filled, and dates before
+        the youngest symbol's first bar are dropped
+    """
+    panel = PricePanel.from_histories(histories)
+    symbols, dates = panel.symbols, panel.dates
+    if not symbols:
+        return symbols, dates, np.empty((0, 0))
+    closes = panel.filled()
+    common = ~np.isnan(closes).any(axis=0)
+    closes, dates = closes[:, common], dates[common]
+    returns = closes[:, 1:] / closes[:, :-1] - 1
+    return symbols, dates[1:], returns.T
+
+
+def covariance(returns):
+    """Sample covariance of a dates x symbols returns matrix"""
+    return np.atleast_2d(np.cov(returns, rowvar=False))
+
+
+def historical_var(pnl, confidence=0.99):
+    """
+    VaR and CVaR read straight off a sample of P&L outcomes
+
+    Returns:
+        tuple: (var, cvar) as positive losses
+    """
+    pnl = np.asarray(pnl, dtype=float)
+    var = -np.quantile(pnl, 1 - confidence)
+    tail = pnl[pnl <= -var]
+    cvar = -tail.mean() if tail.size else var
+    return float(var), float(cvar)
+
+
+def parametric_var(exposures, cov, confidence=0.99, horizon_days=1, mean=None):
+    """
+    Variance-covariance VaR and CVaR, assuming normally distributed returns
+
+    Args:
+        exposures (array-like): Current value held in each symbol
+        cov (numpy.ndarray): Daily returns covariance
+        confidence (float): e.g. 0.99 for 99% VaR
+        horizon_days (int): Trading days the loss is measured over
+        mean (array-like): Daily mean returns (zero if not given)
+
+    Returns:
+        tuple: (var, cvar) as positive losses
+    """
+    exposures = np.asarray(exposures, dtype=float)
+    sigma = np.sqrt(exposures @ cov @ exposures * horizon_days)
+    mu = 0.0 if mean is None else float(exposures @ mean) * horizon_days
+    normal = NormalDist()
+    z = normal.inv_cdf(confidence)
+    var = z * sigma - mu
+    cvar = sigma * normal.pdf(z) / (1 - confidence) - mu
+    return float(var), float(cvar)
+
+
+def _cholesky(cov):
+    """Cholesky factor, falling back to an eigen-decomposition for singular matrices"""
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        return vectors * np.sqrt(np.clip(values, 0, None))
+
+
+def _simulate_chunk(args):
+    """P&L of one chunk of paths (module level so a process pool can run it)"""
+    exposures, factor, drift, horizon_days, n_paths, seed = args
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((n_paths, len(exposures)))
+    # Log returns over the horizon, so large moves compound instead of adding
+    log_returns = shocks @ factor.T * np.sqrt(horizon_days) + drift * horizon_days
+    np.expm1(log_returns, out=log_returns)
+    return log_returns @ exposures
+
+
+def monte_carlo_pnl(
+    exposures,
+    cov,
+    n_paths=100_000,
+    horizon_days=1,
+    mean=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    seed=None,
+    processes=None,
+):
+    """
+    Simulate portfolio P&L from correlated normal log returns
+
+    Paths are generated in chunks, so peak memory depends on chunk_size
+    rather than n_paths; only the P&L of each path is kept. Each chunk has
+    its own seed, so results do not depend on how many processes run them.
+
+    Args:
+        exposures (array-like): Current value held in each symbol
+        cov (numpy.ndarray): Daily log returns covariance
+        n_paths (int): Number of simulated outcomes
+        horizon_days (int): Trading days simulated per path
+        mean (array-like): Daily mean log returns (zero if not given)
+        chunk_size (int): Paths generated per chunk
+        seed (int): Makes the simulation reproducible
+        processes (int): Spread chunks over this many processes (None runs
+            them in this process)
+
+    Returns:
+        numpy.ndarray: float64 P&L of each path
+    """
+    exposures = np.asarray(exposures, dtype=float)
+    factor = _cholesky(np.atleast_2d(cov))
+    drift = np.zeros(len(exposures)) if mean is None else np.asarray(mean, float)
+
+    sizes = [
+        min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [
+        (exposures, factor, drift, horizon_days, size, chunk_seed)
+        for size, chunk_seed in zip(sizes, seeds)
+    ]
+
+    pnl = np.empty(n_paths)
+    if processes and processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            chunks = pool.map(_simulate_chunk, tasks)
+    else:
+        chunks = map(_simulate_chunk, tasks)
+    start = 0
+    for chunk in chunks:
+        pnl[start : start + len(chunk)] = chunk
+        start += len(chunk)
+    return pnl
+
+
+def portfolio_risk(
+    portfolio_data,
+    confidence=0.99,
+    horizon_days=1,
+    n_paths=100_000,
+    lookback_days=730,
+    cache=None,
+    seed=None,
+    processes=None,
+):
+    """
+    Risk summary of a portfolio at its latest close
+
+    Args:
+        portfolio_data: list of holding dicts, or a Holdings instance
+        confidence (float): VaR confidence level
+        horizon_days (int): Trading days the loss is measured over
+        n_paths (int): Monte Carlo paths (0 skips the simulation)
+        lookback_days (int): Calendar days of history to estimate from
+        cache (HistoryCache): Optional on-disk history store
+        seed (int): Monte Carlo seed
+        processes (int): Monte Carlo processes (None: os.cpu_count() for
+            simulations of over a million paths, otherwise one)
+
+    Returns:
+        dict: symbols, exposures, covariance, and (var, cvar) tuples for
+        'historical', 'parametric' and 'monte_carlo'
+    """
+    holdings = (
+        portfolio_data
+        if isinstance(portfolio_data, Holdings)
+        else Holdings.from_records(portfolio_data)
+    )
+    end_date = now()
+    start_date = end_date - timedelta(days=lookback_days)
+    tickers = list(holdings.symbols)
+    if cache is not None:
+        histories = cache.get_histories(tickers, start_date, end_date)
+    else:
+        histories = download_histories(tickers, start=start_date, end=end_date)
+    histories = {s: h for s, h in histories.items() if h is not None and not h.empty}
+    for symbol in tickers:
+        if symbol not in histories:
+            print(f"Error processing {symbol}: no price history")
+
+    symbols, dates, returns = returns_matrix(histories)
+    last_prices = {s: float(histories[s]["Close"].iloc[-1]) for s in symbols}
+    shares = holdings.rollup().set_index("Ticker")["Shares"]
+    exposures = np.array([shares[s] * last_prices[s] for s in symbols])
+
+    cov = covariance(returns)
+    # Historical P&L: today's exposures replayed over past horizon windows
+    window_returns = (
+        np.prod(
+            1 + np.lib.stride_tricks.sliding_window_view(returns, horizon_days, axis=0),
+            axis=-1,
+        )
+        - 1
+    )
+    result = {
+        "symbols": symbols,
+        "exposures": exposures,
+        "covariance": cov,
+        "historical": historical_var(window_returns @ exposures, confidence),
+        "parametric": parametric_var(
+            exposures, cov, confidence, horizon_days, returns.mean(axis=0)
+        ),
+    }
+    if n_paths:
+        if processes is None:
+            processes = os.cpu_count() if n_paths > 1_000_000 else 1
+        log_returns = np.log1p(returns)
+        pnl = monte_carlo_pnl(
+            exposures,
+            covariance(log_returns),
+            n_paths,
+            horizon_days,
+            log_returns.mean(axis=0),
+            seed=seed,
+            processes=processes,
+        )
+        result["monte_carlo"] = historical_var(pnl, confidence)
+    return result
@@ -0,0 +1,212 @@
+"""
+Precomputed screener index
+Computes horizon returns, volatility and 52-week range statistics for a whole
+symbol universe once (e.g. nightly), and stores them as a single NumPy file
+that queries open memory-mapped. Sorting and filtering thousands of symbols
+then takes milliseconds, and every process reading the index shares the same
+pages of the OS file cache instead of holding its own copy.
+"""
+
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import metrics
+from market_data import DEFAULT_BATCH_SIZE, download_histories, now
+from price_panel import PricePanel
+from Stocks_Performance import TIME_PERIODS, compute_horizon_returns
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.expanduser("~"), ".finance_stocks", "screener.npy"
+)
+
+# Trading days per year, for the volatility window and annualization
+TRADING_DAYS = 252
+
+# Metric columns of the index, after the 'Symbol' field
+INDEX_COLUMNS = (
+    ["Current Price"]
+    + list(TIME_PERIODS)
+    + ["YTD", "Volatility", "52w High", "52w Low", "From High %"]
+)
+
+
+def compute_screener_metrics(histories, end_date):
+    """
+    Every index column for every symbol, in one vectorized pass
+
+    Volatility is the annualized standard deviation (in %) of daily log
+    returns over the last TRADING_DAYS bars; the 52-week range uses closes.
+
+    Args:
+        histories (dict): symbol -> DataFrame with a 'Close' column
+        end_date (datetime): Date the horizons are measured back from
+
+    Returns:
+        tuple: (symbols, values) - values is a float64 symbols x INDEX_COLUMNS
+        array, NaN where the history is too short
+    """
+    panel = PricePanel.from_histories(histories)
+    symbols, dates, closes = panel.symbols, panel.dates, panel.values
+    filled = panel.filled()
+    current = panel.last()
+    changes = compute_horizon_returns(symbols, dates, closes, current, end_date)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns = np.diff(np.log(filled[:, -(TRADING_DAYS + 1) :]), axis=1)
+    counts = np.sum(~np.isnan(log_returns), axis=1)
+    volatility = np.full(len(symbols), np.nan)
+    enough = counts > 1
+    if enough.any():
+        volatility[enough] = (
+            np.nanstd(log_returns[enough], axis=1, ddof=1) * np.sqrt(TRADING_DAYS) * 100
+        )
+
+    high = np.full(len(symbols), np.nan)
+    low = np.full(len(symbols), np.nan)
+    window = panel.window(start=end_date - timedelta(days=365)).values
+    seen = ~np.isnan(window).all(axis=1)
+    high[seen] = np.nanmax(window[seen], axis=1)
+    low[seen] = np.nanmin(window[seen], axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        from_high = (current - high) / high * 100
+
+    values = np.column_stack(
+        [current, changes.to_numpy(), volatility, high, low, from_high]
+    )
+    return symbols, values
+
+
+def save_index(symbols, values, path=DEFAULT_INDEX_PATH):
+    """
+    Write the index as one structured .npy file, rows sorted by symbol
+
+    The file is written next to `path` and renamed over it, so readers see
+    either the old index or the new one, never a partial file.
+    """
+    order = np.argsort(np.asarray(symbols, dtype=str), kind="stable")
+    width = max((len(s) for s in symbols), default=1)
+    dtype = [("Symbol", f"U{width}")] + [(column, "f8") for column in INDEX_COLUMNS]
+    table = np.empty(len(symbols), dtype=dtype)
+    table["Symbol"] = np.asarray(symbols, dtype=str)[order]
+    for j, column in enumerate(INDEX_COLUMNS):
+        table[column] = values[order, j]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp, table)
+    os.replace(tmp, path)
+    return path
+
+
+def build_index(
+    symbols, path=DEFAULT_INDEX_PATH, cache=None, batch_size=DEFAULT_BATCH_SIZE
+):
+    """
+    Fetch history for a universe and write its screener index
+
+    Meant to run once a day (e.g. from cron after the close); with a
+    HistoryCache only the bars added since the last build are downloaded.
+
+    Args:
+        symbols (list): Universe to index
+        path (str): Index file to (re)write
+        cache (HistoryCache): Optional on-disk history store
+        batch_size (int): Symbols per multi-ticker download request
+
+    Returns:
+        str: path of the index
+    """
+    end_date = now()
+    # Far enough back for the longest horizon's anchor
+    start_date = end_date - timedelta(days=max(TIME_PERIODS.values()) + 7)
+
+    with metrics.timer("stage.fetch", command="screener"):
+        if cache is not None:
+            fetched = cache.get_histories(symbols, start_date, end_date)
+        else:
+            fetched = download_histories(
+                symbols, start=start_date, end=end_date, batch_size=batch_size
+            )
+    histories = {s: h for s, h in fetched.items() if h is not None and not h.empty}
+    for symbol in dict.fromkeys(symbols):
+        if symbol not in histories:
+            print(f"Error processing {symbol}: no price history")
+
+    with metrics.timer("stage.compute", command="screener"):
+        indexed, values = compute_screener_metrics(histories, end_date)
+    save_index(indexed, values, path)
+    print(f"Indexed {len(indexed)} symbols to {path}")
+    return path
+
+
+class ScreenerIndex:
+    """
+    Read-only, memory-mapped view of a screener index
+
+    Opening the index maps the file without reading it; columns are strided
+    views of the mapping, so nothing is copied until a query returns rows.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self.table = np.load(path, mmap_mode="r")
+        self.columns = list(self.table.dtype.names[1:])
+        self.built_at = pd.Timestamp(os.path.getmtime(path), unit="s")
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def symbols(self):
+        return self.table["Symbol"]
+
+    def _frame(self, rows):
+        return pd.DataFrame(self.table[rows]).reset_index(drop=True)
+
+    def lookup(self, symbols):
+        """
+        Index rows for some symbols, found by binary search on the sorted
+        symbol column
+
+        Returns:
+            pandas.DataFrame: one row per symbol that is in the index
+        """
+        wanted = np.asarray(symbols, dtype=str)
+        if not len(self):
+            return self._frame([])
+        rows = np.minimum(np.searchsorted(self.symbols, wanted), len(self) - 1)
+        return self._frame(np.sort(rows[self.symbols[rows] == wanted]))
+
+    def query(self, sort_by, n=20, ascending=False, filters=None):
+        """
+        Top rows by one column, after optional range filters
+
+        Args:
+            sort_by (str): Column to rank by (e.g. '3m')
+            n (int): Rows to return (None for all)
+            ascending (bool): Rank lowest first instead of highest first
+            filters (dict): column -> (low, high); either bound may be None.
+                Rows with NaN in a filtered or ranked column are excluded.
+
+        Returns:
+            pandas.DataFrame: matching rows in rank order
+        """
+        keep = ~np.isnan(self.table[sort_by])
+        for column, (low, high) in (filters or {}).items():
+            values = self.table[column]
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+        rows = np.flatnonzero(keep)
+        keys = self.table[sort_by][rows]
+        if not ascending:
+            keys = -keys
+        if n is not None and n < len(rows):
+            # Only the top n need a full sort
+            top = np.argpartition(keys, n - 1)[:n]
+            rows, keys = rows[top], keys[top]
+        return self._frame(rows[np.argsort(keys, kind="stable")])
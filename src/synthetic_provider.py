@@ -0,0 +1,176 @@
+"""
+Deterministic synthetic market data provider
+Serves fake info, history and calendar data shaped like yfinance's, with a
+configurable simulated latency, so everything can run without network access
+"""
+
+import time
+import zlib
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Price paths start here, so a symbol's bar for a given date never changes
+EPOCH = pd.Timestamp("2010-01-04")
+
+PERIOD_DAYS = {"d": 1, "wk": 7, "mo": 31, "y": 366}
+
+
+def _period_start(end, period):
+    """Translate a yfinance period string such as '5d' or '1y' into a start date"""
+    if period == "max":
+        return EPOCH
+    for suffix, days in PERIOD_DAYS.items():
+        if period.endswith(suffix) and period[: -len(suffix)].isdigit():
+            return end - pd.Timedelta(days=int(period[: -len(suffix)]) * days)
+    raise ValueError(f"Unsupported period: {period}")
+
+
+@lru_cache(maxsize=8)
+def _business_days(last):
+    """Weekdays from EPOCH through `last` (numpy is much faster than bdate_range)"""
+    first, last = np.datetime64(EPOCH.date()), np.datetime64(last.date())
+    days = np.arange(first, last + 1, dtype="datetime64[D]")
+    return pd.DatetimeIndex(days[np.is_busday(days)].astype("datetime64[ns]"))
+
+
+class SyntheticProvider:
+    """
+    Drop-in replacement for market_data.YahooProvider
+
+    Every symbol gets a seeded geometric random walk of business-day bars
+    from EPOCH, so repeated calls and overlapping ranges agree exactly.
+    Symbols ending in '.L' are quoted in GBp, like LSE listings on Yahoo.
+
+    Args:
+        latency (float): Seconds each request sleeps before answering
+        today (datetime): Date treated as "now" (defaults to the real today)
+        missing (iterable): Symbols that should behave as unknown tickers
+    """
+
+    name = "synthetic"
+
+    def __init__(self, latency=0.0, today=None, missing=()):
+        self.latency = latency
+        self.today = pd.Timestamp(today or datetime.now()).normalize()
+        self.missing = set(missing)
+        self.requests = 0
+
+    def _wait(self):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _seed(symbol):
+        return zlib.crc32(symbol.encode())
+
+    def _bars(self, symbol, start=None, end=None, period=None):
+        """Daily bars for [start, end) with yfinance's column layout"""
+        # Like Yahoo, `end` is exclusive; a time of day includes that day's bar
+        end = self.today + pd.Timedelta(days=1) if end is None else pd.Timestamp(end)
+        last = end.normalize() if end > end.normalize() else end - pd.Timedelta(days=1)
+        last = min(last, self.today)
+        if start is None:
+            start = _period_start(last, period or "1mo")
+        start = max(pd.Timestamp(start).normalize(), EPOCH)
+
+        dates = _business_days(last)
+        rng = np.random.default_rng(self._seed(symbol))
+        base = 20 + (self._seed(symbol) % 480)
+        close = base * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(dates))))
+        spread = np.abs(rng.normal(0, 0.01, len(dates)))
+        volume = rng.integers(100_000, 10_000_000, len(dates)).astype(float)
+
+        keep = dates >= start
+        close, spread, volume = close[keep], spread[keep], volume[keep]
+        index = dates[keep].tz_localize("America/New_York")
+        return pd.DataFrame(
+            {
+                "Open": close * (1 - spread / 2),
+                "High": close * (1 + spread),
+                "Low": close * (1 - spread),
+                "Close": close,
+                "Volume": volume,
+                "Dividends": 0.0,
+                "Stock Splits": 0.0,
+            },
+            index=pd.DatetimeIndex(index, name="Date"),
+        )
+
+    def download(self, symbols, start=None, end=None, period=None):
+        self._wait()
+        frames = {
+            symbol: self._bars(symbol, start, end, period)
+            for symbol in symbols
+            if symbol not in self.missing
+        }
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+    def info(self, symbol):
+        self._wait()
+        if symbol in self.missing:
+            return {}
+        price = float(self._bars(symbol, period="5d")["Close"].iloc[-1])
+        return {
+            "symbol": symbol,
+            "currentPrice": price,
+            "regularMarketPrice": price,
+            "currency": "GBp" if symbol.endswith(".L") else "USD",
+        }
+
+    def history(self, symbol, start=None, end=None, period=None):
+        self._wait()
+        if symbol in self.missing:
+            return pd.DataFrame()
+        return self._bars(symbol, start, end, period)
+
+    def calendar(self, symbol):
+        self._wait()
+        if symbol in self.missing:
+            return {}
+        offset = 1 + self._seed(symbol) % 90
+        earnings = (self.today + timedelta(days=offset)).date()
+        return {
+            "Earnings Date": [earnings],
+            "Earnings Average": round((self._seed(symbol) % 500) / 100, 2),
+        }
+
+
+def synthetic_symbols(n):
+    """n distinct fake ticker symbols: SYM0000, SYM0001, ..."""
+    width = max(4, len(str(n - 1)))
+    return [f"SYM{i:0{width}d}" for i in range(n)]
+
+
+def synthetic_portfolio(n, seed=0):
+    """n lots over roughly n / 2 tickers, in analyze_portfolio's input format"""
+    rng = np.random.default_rng(seed)
+    symbols = synthetic_symbols(max(1, n // 2))
+    return [
+        {
+            "ticker": symbols[i],
+            "shares": float(rng.integers(1, 500)),
+            "purchase_price": round(float(rng.uniform(5, 500)), 2),
+        }
+        for i in rng.integers(0, len(symbols), n)
+    ]
+
+
+def synthetic_ticks(prices, n, seed=0, volatility=0.001):
+    """
+    Stand-in for a live tick feed: n (symbol, price) updates, each moving one
+    random symbol by a small random return from its last price
+    """
+    rng = np.random.default_rng(seed)
+    symbols = list(prices)
+    last = np.array([prices[s] for s in symbols], dtype=float)
+    picks = rng.integers(0, len(symbols), n)
+    moves = np.exp(rng.normal(0, volatility, n))
+    for i, move in zip(picks, moves):
+        last[i] *= move
+        yield symbols[i], float(last[i])
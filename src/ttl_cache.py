@@ -0,0 +1,101 @@
+"""
+Persistent per-key TTL cache
+Stores JSON-encoded values with their fetch time in SQLite, so repeat scans
+only go to the network for entries that are stale or missing
+"""
+
+import json
+import os
+import sqlite3
+import time
+from datetime import date, datetime
+
+from instrumentation import metrics
+
+DEFAULT_CALENDAR_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".finance_stocks", "calendar.sqlite"
+)
+
+# Earnings dates rarely move, so a calendar entry stays fresh for half a day
+DEFAULT_CALENDAR_TTL = 12 * 60 * 60
+
+# Returned by get() for keys that are missing or stale (a cached value may be None)
+MISSING = object()
+
+
+def _encode(value):
+    """JSON default hook: tag dates so they round-trip"""
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _decode(obj):
+    if "$datetime" in obj:
+        return datetime.fromisoformat(obj["$datetime"])
+    if "$date" in obj:
+        return date.fromisoformat(obj["$date"])
+    return obj
+
+
+class TTLCache:
+    """SQLite-backed key/value store whose entries expire after `ttl` seconds"""
+
+    def __init__(self, path=DEFAULT_CALENDAR_CACHE_PATH, ttl=DEFAULT_CALENDAR_TTL):
+        self.path = path
+        self.ttl = ttl
+        # Metrics name, e.g. 'cache.calendar' for calendar.sqlite
+        self.name = "cache." + os.path.splitext(os.path.basename(path))[0].strip(":")
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, key):
+        """Return the cached value, or MISSING if absent or older than ttl"""
+        row = self.conn.execute(
+            "SELECT value, fetched_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            metrics.increment(f"{self.name}.miss")
+            return MISSING
+        metrics.increment(f"{self.name}.hit")
+        return json.loads(row[0], object_hook=_decode)
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def set_many(self, values):
+        """Store several values stamped with the current time"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                [
+                    (key, json.dumps(value, default=_encode), now)
+                    for key, value in values.items()
+                ],
+            )
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry if key is None"""
+        with self.conn:
+            if key is None:
+                self.conn.execute("DELETE FROM entries")
+            else:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The modules under src/ are run as scripts, so make them importable by name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+@pytest.fixture
+def fresh_fetch_pool(monkeypatch):
+    """Give the test its own rate limiters and circuit breakers"""
+    import fetch_pool
+
+    monkeypatch.setattr(fetch_pool, "_limiters", {})
+    monkeypatch.setattr(fetch_pool, "_breakers", {})
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_data
+from backtest import backtest, backtest_series
+from history_cache import HistoryCache
+from holdings import Holdings
+from synthetic_provider import SyntheticProvider
+
+DATES = pd.to_datetime(["2025-01-02", "2025-01-03", "2025-01-06", "2025-01-07"])
+HISTORIES = {
+    "AAA": pd.DataFrame({"Close": [10.0, 11.0, 9.0, 12.0]}, index=DATES),
+    "BBB": pd.DataFrame({"Close": [50.0, 50.0, 55.0]}, index=DATES[[0, 1, 3]]),
+}
+
+
+def test_series_values_each_lot_from_its_purchase_day():
+    holdings = Holdings(
+        ["AAA", "BBB", "AAA"],
+        [10, 2, 5],
+        [10.0, 50.0, 9.0],
+        ["2025-01-02", "2025-01-03", "2025-01-06"],
+    )
+
+    series = backtest_series(holdings, HISTORIES)
+
+    # BBB has no bar on 6 January, so its last close carries over
+    np.testing.assert_allclose(series["Value"], [100, 210, 235, 290])
+    np.testing.assert_allclose(series["Invested"], [100, 200, 245, 245])
+    np.testing.assert_allclose(series["Profit/Loss"], [0, 10, -10, 45])
+    # 6 January: (235 - 45 bought) / 210 is the only losing day
+    assert series["Drawdown"].min() == pytest.approx(190 / 210 - 1)
+    assert series["Drawdown"].iloc[-1] == 0
+
+
+def test_matches_a_day_by_day_valuation():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2024-01-01", periods=60)
+    histories = {
+        s: pd.DataFrame(
+            {"Close": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 60)))}, index=dates
+        )
+        for s in ("AAA", "BBB", "CCC")
+    }
+    lots = [
+        {
+            "ticker": s,
+            "shares": float(rng.integers(1, 50)),
+            "purchase_price": 100.0,
+            "purchase_date": dates[rng.integers(0, 60)],
+        }
+        for s in rng.choice(["AAA", "BBB", "CCC"], 40)
+    ]
+
+    series = backtest_series(Holdings.from_records(lots), histories)
+
+    expected = [
+        sum(
+            lot["shares"] * histories[lot["ticker"]]["Close"][day]
+            for lot in lots
+            if lot["purchase_date"] <= day
+        )
+        for day in dates
+    ]
+    np.testing.assert_allclose(series["Value"], expected)
+
+
+def test_backtest_reuses_cached_history(tmp_path):
+    provider = SyntheticProvider(today=datetime(2025, 6, 13))
+    previous = market_data.set_provider(provider)
+    lots = [
+        {
+            "ticker": "AAA",
+            "shares": 10,
+            "purchase_price": 50.0,
+            "purchase_date": "2022-03-01",
+        },
+        {"ticker": "BBB", "shares": 5, "purchase_price": 80.0},
+    ]
+    try:
+        cache = HistoryCache(str(tmp_path / "history.sqlite"))
+        first = backtest(lots, end=datetime(2025, 6, 13, 16), cache=cache)
+        requests = provider.requests
+        again = backtest(lots, end=datetime(2025, 6, 13, 16), cache=cache)
+    finally:
+        market_data.set_provider(previous)
+
+    assert first.index[0] == pd.Timestamp("2022-03-01")
+    assert provider.requests - requests <= 1
+    pd.testing.assert_frame_equal(first, again)
@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from run_benchmarks import compare, run_benchmarks  # noqa: E402
+from synthetic_provider import SyntheticProvider  # noqa: E402
+
+
+def test_synthetic_provider_is_deterministic():
+    first = SyntheticProvider(today="2025-06-13").history("ABC", period="1y")
+    again = SyntheticProvider(today="2025-06-13").history("ABC", start="2025-01-02")
+
+    assert first.index[-1].date().isoformat() == "2025-06-13"
+    assert first.loc[again.index, "Close"].equals(again["Close"])
+
+
+def test_suite_runs_offline_at_smallest_size():
+    results = run_benchmarks(sizes=[10], memory=False, repeats=1)
+
+    assert set(results) == {
+        "analyze_portfolio@10",
+        "get_stock_performance@10",
+        "get_upcoming_earnings@10",
+        "export_to_excel@10",
+    }
+
+
+def test_compare_flags_slow_cases():
+    baselines = {"case@10": {"wall_s": 1.0, "peak_mb": 10.0}}
+    results = {"case@10": {"wall_s": 2.0, "peak_mb": 10.0}}
+
+    assert len(compare(results, baselines)) == 1
+    assert compare(results, baselines, time_tolerance=3) == []
+
+
+def test_compare_ignores_differences_below_the_noise_floor():
+    baselines = {"case@10": {"wall_s": 0.003, "peak_mb": 0.1}}
+    results = {"case@10": {"wall_s": 0.009, "peak_mb": 0.5}}
+
+    assert compare(results, baselines) == []
+    assert len(compare(results, baselines, time_floor=0, memory_floor=0)) == 2
@@ -0,0 +1,48 @@
+import numpy as np
+
+from black_scholes import bs_greeks, bs_price, implied_volatility
+
+
+def test_put_call_parity_over_a_grid():
+    spot = np.array([80.0, 100.0, 120.0])[:, None, None]
+    strike = np.array([90.0, 110.0])[None, :, None]
+    vol = np.array([0.1, 0.3, 0.6])[None, None, :]
+
+    call = bs_price(spot, strike, vol, 0.5, 0.04, "call", 0.01)
+    put = bs_price(spot, strike, vol, 0.5, 0.04, "put", 0.01)
+
+    assert call.shape == (3, 2, 3)
+    parity = spot * np.exp(-0.01 * 0.5) - strike * np.exp(-0.04 * 0.5)
+    np.testing.assert_allclose(call - put, np.broadcast_to(parity, call.shape))
+
+
+def test_greeks_match_finite_differences():
+    args = dict(strike=np.array([80.0, 100.0, 120.0]), t=0.5, rate=0.04, kind="put")
+    greeks = bs_greeks(100.0, vol=0.25, **args)
+    h = 1e-4
+
+    up, down = bs_price(100 + h, vol=0.25, **args), bs_price(100 - h, vol=0.25, **args)
+    delta = (up - down) / (2 * h)
+    up, down = bs_price(100.0, vol=0.25 + h, **args), bs_price(
+        100.0, vol=0.25 - h, **args
+    )
+    vega = (up - down) / (2 * h)
+
+    np.testing.assert_allclose(greeks["delta"], delta, atol=1e-5)
+    np.testing.assert_allclose(greeks["vega"], vega, rtol=1e-4)
+
+
+def test_implied_volatility_recovers_a_chain():
+    rng = np.random.default_rng(0)
+    strike = rng.uniform(70, 140, 2000)
+    vol = rng.uniform(0.05, 1.2, 2000)
+    t = rng.uniform(0.05, 2.0, 2000)
+    is_call = rng.random(2000) < 0.5
+    price = bs_price(100.0, strike, vol, t, 0.03, is_call)
+
+    implied = implied_volatility(price, 100.0, strike, t, 0.03, is_call)
+
+    vega = bs_greeks(100.0, strike, vol, t, 0.03, is_call)["vega"]
+    well_posed = vega > 1e-2
+    np.testing.assert_allclose(implied[well_posed], vol[well_posed], atol=1e-5)
+    assert np.isnan(implied_volatility(200.0, 100.0, 100.0, 1.0))  # above the spot
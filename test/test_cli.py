@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+import market_data
+from cli import main
+from history_cache import HistoryCache
+from Stocks_Performance import get_stock_performance
+from synthetic_provider import SyntheticProvider
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+# Seconds allowed for `import cli` plus the data layer in a fresh interpreter
+IMPORT_BUDGET = 0.5
+
+
+def test_startup_skips_heavy_imports_within_budget():
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import cli, market_data\n"
+        "print(time.perf_counter() - start)\n"
+        "print(' '.join(m for m in ('pandas', 'yfinance', 'matplotlib')"
+        " if m in sys.modules))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+
+    assert float(out[0]) < IMPORT_BUDGET
+    assert out[1:] in ([], [""])
+
+
+def test_interest_subcommand(capsys):
+    main(["interest", "--principal", "1000", "--rate", "0.05", "--plain"])
+
+    out = capsys.readouterr().out
+    assert "$50.00" in out and "$1,050.00" in out
+
+
+def test_cache_only_performance_makes_no_requests(tmp_path):
+    provider = SyntheticProvider(today=datetime.now())
+    previous = market_data.set_provider(provider)
+    try:
+        cache = HistoryCache(str(tmp_path / "history.sqlite"))
+        warm = get_stock_performance(["AAA", "BBB"], cache=cache)
+        requests = provider.requests
+
+        start = time.perf_counter()
+        cached = get_stock_performance(
+            ["AAA", "BBB", "CCC"], cache=cache, cache_only=True
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        market_data.set_provider(previous)
+
+    assert provider.requests == requests
+    assert elapsed < 1.0
+    assert list(cached["Symbol"]) == ["AAA", "BBB"]
+    assert cached["1y"].equals(warm["1y"])
+
+
+def test_cache_only_performance_needs_a_cache():
+    with pytest.raises(ValueError, match="needs a cache"):
+        get_stock_performance(["AAA"], cache_only=True)
+
+
+def test_portfolio_subcommand_prices_in_batches(tmp_path, capsys):
+    path = tmp_path / "holdings.csv"
+    path.write_text(
+        "ticker,shares,purchase_price\nAAA,10,5.0\nBBB,2,50.0\nCCC,1,20.0\n"
+    )
+    provider = SyntheticProvider()
+    previous = market_data.set_provider(provider)
+    args = ["portfolio", "--file", str(path), "--currency", "none"]
+    try:
+        main(args)
+        batched = provider.requests
+        main(args + ["--batch-size", "0"])
+    finally:
+        market_data.set_provider(previous)
+
+    assert batched == 1
+    assert provider.requests - batched == 3
+    assert "TOTAL" in capsys.readouterr().out
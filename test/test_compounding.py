@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from compounding import (
+    amortization_schedule,
+    future_value,
+    growth_schedule,
+    payment,
+    scenario_grid,
+    to_frame,
+)
+
+
+def test_future_value_matches_closed_forms():
+    assert future_value(50000, 0.04, 1, 1) == pytest.approx(52000)
+    assert future_value(1000, 0.0, 12, 1, contribution=100) == pytest.approx(2200)
+
+    # Monthly deposits of 100 at 6% for 10 years
+    assert future_value(0, 0.06, 12, 10, contribution=100) == pytest.approx(
+        16387.93, abs=0.01
+    )
+
+
+def test_grid_broadcasts_every_combination():
+    grid = scenario_grid(
+        principal=[1e4, 5e4, 1e5],
+        rate=np.linspace(0, 0.1, 11),
+        periods_per_year=[1, 12],
+        years=[5, 10],
+    )
+    values = future_value(**grid)
+
+    assert values.shape == (3, 11, 2, 2)
+    assert values[1, 4, 1, 0] == pytest.approx(5e4 * (1 + 0.04 / 12) ** 60)
+
+    df = to_frame(grid, values, name="fv")
+    assert len(df) == values.size
+    row = df[(df.principal == 5e4) & np.isclose(df.rate, 0.04)]
+    assert row[(row.periods_per_year == 12) & (row.years == 5)].fv.item() == (
+        pytest.approx(values[1, 4, 1, 0])
+    )
+
+
+def test_growth_schedule_ends_at_future_value_and_pads_short_horizons():
+    grid = scenario_grid(rate=[0.0, 0.05], years=[1, 2])
+    schedule = growth_schedule(1000, **grid, contribution=10, dtype=np.float32)
+
+    assert schedule.shape == (2, 2, 24) and schedule.dtype == np.float32
+    assert np.isnan(schedule[:, 0, 12:]).all()
+    assert schedule[1, 1, -1] == pytest.approx(
+        future_value(1000, 0.05, 12, 2, contribution=10), rel=1e-6
+    )
+
+
+def test_amortization_repays_the_loan():
+    schedule = amortization_schedule(200_000, 0.06, 12, 30)
+
+    assert payment(200_000, 0.06, 12, 30) == pytest.approx(1199.10, abs=0.01)
+    assert schedule["interest"][0] == pytest.approx(1000.0)
+    assert schedule["principal"].sum() == pytest.approx(200_000)
+    assert schedule["balance"][-1] == pytest.approx(0, abs=1e-6)
+
+
+def test_mixed_term_schedules_stop_at_each_term():
+    principal = np.array([1e5, 2e5])
+    schedule = amortization_schedule(principal, [0.06, 0.0], 12, [30, 15])
+
+    assert schedule["interest"].shape == (2, 360)
+    np.testing.assert_allclose(np.nansum(schedule["principal"], axis=-1), principal)
+    for name in ("interest", "principal", "balance"):
+        assert np.isnan(schedule[name][1, 180:]).all()
+        assert not np.isnan(schedule[name][1, :180]).any()
+        assert not np.isnan(schedule[name][0]).any()
@@ -1,48 +1,48 @@
-import yfinance as yf
-import pandas as pd
-import time
+import pytest
 
+import market_data
+from Earnings_Reports import get_upcoming_earnings
+from synthetic_provider import SyntheticProvider, synthetic_symbols
+from ttl_cache import TTLCache
 
-def get_upcoming_earnings(symbols):
-    """
-    Fetch upcoming earnings dates using a single session-based approach.
-    """
-    earnings_dates = []
+SYMBOLS = synthetic_symbols(8)
 
-    session = yf.Ticker  # Use a single session for all requests
 
-    for symbol in symbols:
-        try:
-            stock = session(symbol)  # Reuse session
-            next_earnings = stock.calendar
+@pytest.fixture
+def provider():
+    provider = SyntheticProvider(today="2025-06-13", missing=["SYM0003"])
+    previous = market_data.set_provider(provider)
+    yield provider
+    market_data.set_provider(previous)
 
-            if next_earnings is not None and "Earnings Date" in next_earnings:
-                earnings_date = next_earnings["Earnings Date"]
 
-                # Handle both single date and date range cases
-                if isinstance(earnings_date, pd.DatetimeIndex):
-                    earnings_date = earnings_date[0]
+def test_calendar_is_sorted_and_skips_unknown_symbols(provider):
+    df = get_upcoming_earnings(SYMBOLS, max_workers=4)
 
-                earnings_dates.append(
-                    {"Symbol": symbol, "Earnings Date": earnings_date}
-                )
+    assert set(df["Symbol"]) == set(SYMBOLS) - {"SYM0003"}
+    assert list(df["Earnings Date"]) == sorted(df["Earnings Date"])
+    expected = provider.calendar("SYM0000")["Earnings Date"][0]
+    row = df.set_index("Symbol").loc["SYM0000"]
+    assert row["Date"] == expected.strftime("%d-%m-%Y")
+    assert provider.requests == len(SYMBOLS) + 1
 
-            else:
-                print(f"Not found for {symbol}")
 
-            time.sleep(2)  # Increase delay to 2 seconds
+def test_cached_calendars_need_no_requests(provider):
+    cache = TTLCache(":memory:")
+    first = get_upcoming_earnings(SYMBOLS, cache=cache)
+    requests = provider.requests
 
-        except Exception as e:
-            print(f"Error processing {symbol}: {str(e)}")
+    again = get_upcoming_earnings(SYMBOLS, cache=cache)
+    offline = get_upcoming_earnings(SYMBOLS + ["SYM0099"], cache=cache, cache_only=True)
 
-    return (
-        pd.DataFrame(earnings_dates)
-        if earnings_dates
-        else pd.DataFrame(columns=["Symbol", "Earnings Date"])
-    )
+    # Empty calendars are cached too, so nothing goes back to the provider
+    assert provider.requests == requests
+    assert again.equals(first)
+    assert offline.equals(first)
 
 
-# Example usage
-symbols = ["ACN", "FDX", "NKE", "JPM"]
-earnings_calendar = get_upcoming_earnings(symbols)
-print(earnings_calendar)
+def test_no_known_symbols_gives_an_empty_calendar(provider):
+    df = get_upcoming_earnings(["SYM0003"])
+
+    assert df.empty
+    assert list(df.columns) == ["Symbol", "Earnings Date"]
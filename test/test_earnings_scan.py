@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import market_data
+from earnings_scan import load_checkpoint, scan_universe
+from synthetic_provider import SyntheticProvider, synthetic_symbols
+
+UNIVERSE = synthetic_symbols(50)
+
+
+def _scan(provider, symbols, **options):
+    previous = market_data.set_provider(provider)
+    try:
+        return scan_universe(symbols, shard_size=10, max_workers=4, **options)
+    finally:
+        market_data.set_provider(previous)
+
+
+def test_calendar_stays_sorted_while_shards_arrive():
+    provider = SyntheticProvider(today=datetime(2025, 6, 13), missing=["SYM0003"])
+    snapshots = []
+
+    df = _scan(
+        provider,
+        UNIVERSE,
+        on_shard=lambda scanned, total, calendar: snapshots.append(
+            [row["Earnings Date"] for row in calendar]
+        ),
+    )
+
+    assert len(snapshots) == 5
+    assert all(dates == sorted(dates) for dates in snapshots)
+    assert list(df["Earnings Date"]) == sorted(df["Earnings Date"])
+    assert set(df["Symbol"]) == set(UNIVERSE) - {"SYM0003"}
+
+
+def test_interrupted_scan_resumes_from_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / "scan.jsonl")
+    today = datetime(2025, 6, 13)
+
+    # First run covers two shards, then the process "dies" mid-write
+    _scan(SyntheticProvider(today=today), UNIVERSE[:20], checkpoint=checkpoint)
+    with open(checkpoint, "a") as f:
+        f.write('{"symbols": ["SYM00')
+
+    provider = SyntheticProvider(today=today)
+    resumed = _scan(provider, UNIVERSE, checkpoint=checkpoint)
+    fresh = _scan(SyntheticProvider(today=today), UNIVERSE)
+
+    assert provider.requests == 30
+    assert resumed.equals(fresh)
+    assert sum(len(shard["symbols"]) for shard in load_checkpoint(checkpoint)) == 50
+
+
+def test_resume_ignores_symbols_outside_the_universe(tmp_path):
+    checkpoint = str(tmp_path / "scan.jsonl")
+    today = datetime(2025, 6, 13)
+
+    # The checkpoint was written for an older universe that overlaps by 10
+    _scan(SyntheticProvider(today=today), UNIVERSE[:20], checkpoint=checkpoint)
+
+    provider = SyntheticProvider(today=today)
+    resumed = _scan(provider, UNIVERSE[10:30], checkpoint=checkpoint)
+    fresh = _scan(SyntheticProvider(today=today), UNIVERSE[10:30])
+
+    assert provider.requests == 10
+    assert set(resumed["Symbol"]) == set(UNIVERSE[10:30])
+    assert resumed.equals(fresh)
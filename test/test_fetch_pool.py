@@ -0,0 +1,205 @@
+import threading
+import time
+
+import pytest
+
+import fetch_pool
+from fetch_pool import (
+    PROVIDER_LIMITS,
+    fetch_concurrently,
+    get_circuit_breaker,
+    get_rate_limiter,
+    iter_fetch,
+)
+
+pytestmark = pytest.mark.usefixtures("fresh_fetch_pool")
+
+
+def test_results_keep_input_order(monkeypatch):
+    monkeypatch.setitem(PROVIDER_LIMITS, "test", {"max_workers": 4})
+
+    def fetch(n):
+        time.sleep(0.01 * (5 - n))  # later items finish first
+        return n * 10
+
+    results, errors = fetch_concurrently(fetch, [1, 2, 3, 4], provider="test")
+
+    assert results == [10, 20, 30, 40]
+    assert errors == {}
+
+
+def test_failures_are_reported_without_aborting(monkeypatch):
+    monkeypatch.setitem(PROVIDER_LIMITS, "test", {"max_workers": 4})
+
+    def fetch(symbol):
+        if symbol == "BAD":
+            raise ValueError("no data")
+        return symbol.lower()
+
+    results, errors = fetch_concurrently(fetch, ["AAA", "BAD", "CCC"], provider="test")
+
+    assert results == ["aaa", None, "ccc"]
+    assert errors == {"BAD": "no data"}
+
+
+def test_rate_limit_spaces_out_calls(monkeypatch):
+    monkeypatch.setitem(
+        PROVIDER_LIMITS,
+        "test-rate",
+        {
+            "max_workers": 4,
+            "calls_per_second": 50,
+            "burst": 1,
+        },
+    )
+    starts = []
+
+    results, _ = fetch_concurrently(
+        lambda n: starts.append(time.monotonic()) or n, range(5), provider="test-rate"
+    )
+
+    assert results == [0, 1, 2, 3, 4]
+    assert max(starts) - min(starts) >= 4 / 50 * 0.9
+
+
+def test_throttling_errors_back_off_and_retry(monkeypatch):
+    monkeypatch.setitem(
+        PROVIDER_LIMITS, "test-throttle", {"max_workers": 1, "calls_per_second": 1000}
+    )
+    attempts = []
+
+    def fetch(symbol):
+        attempts.append(symbol)
+        if len(attempts) == 1:
+            raise RuntimeError("429 Too Many Requests")
+        return symbol
+
+    results, errors = fetch_concurrently(fetch, ["AAA"], provider="test-throttle")
+
+    assert results == ["AAA"]
+    assert errors == {}
+    assert get_rate_limiter("test-throttle").rate < 1000
+
+
+def test_hung_requests_time_out_without_stalling_the_rest(monkeypatch):
+    monkeypatch.setattr(fetch_pool, "BACKOFF_BASE", 0.001)
+    monkeypatch.setitem(
+        PROVIDER_LIMITS, "test-timeout", {"max_workers": 2, "timeout": 0.05}
+    )
+    release = threading.Event()
+
+    def fetch(symbol):
+        if symbol == "HUNG":
+            release.wait(5)
+        return symbol
+
+    start = time.monotonic()
+    results, errors = fetch_concurrently(
+        fetch, ["AAA", "HUNG", "CCC"], provider="test-timeout"
+    )
+    release.set()
+
+    assert results == ["AAA", None, "CCC"]
+    assert "no response within" in errors["HUNG"]
+    assert time.monotonic() - start < 2
+
+
+def test_hedged_request_answers_for_a_slow_first_attempt(monkeypatch):
+    monkeypatch.setitem(
+        PROVIDER_LIMITS, "test-hedge", {"max_workers": 1, "hedge_after": 0.02}
+    )
+    calls = []
+
+    def fetch(symbol):
+        calls.append(symbol)
+        if len(calls) == 1:
+            time.sleep(1)
+            return "slow"
+        return "hedged"
+
+    start = time.monotonic()
+    results, _ = fetch_concurrently(fetch, ["AAA"], provider="test-hedge")
+
+    assert results == ["hedged"]
+    assert time.monotonic() - start < 0.5
+
+
+def test_circuit_opens_after_repeated_failures(monkeypatch):
+    monkeypatch.setattr(fetch_pool, "BACKOFF_BASE", 0.001)
+    monkeypatch.setitem(PROVIDER_LIMITS, "test-down", {"max_workers": 1})
+    calls = []
+
+    def fetch(symbol):
+        calls.append(symbol)
+        raise ConnectionError("connection refused")
+
+    _, errors = fetch_concurrently(fetch, ["A", "B", "C"], provider="test-down")
+
+    # Once BREAKER_THRESHOLD calls have failed in a row, C never reaches fetch
+    assert len(calls) == fetch_pool.BREAKER_THRESHOLD
+    assert "circuit is open" in errors["C"]
+    assert get_circuit_breaker("test-down").state == "open"
+
+
+def test_deadline_returns_partial_results(monkeypatch):
+    monkeypatch.setitem(PROVIDER_LIMITS, "test-deadline", {"max_workers": 2})
+
+    def fetch(n):
+        time.sleep(0.5 if n == 3 else 0)
+        return n
+
+    seen = list(iter_fetch(fetch, [1, 2, 3], provider="test-deadline", deadline=0.2))
+
+    assert sorted((i, result) for i, _, result, _ in seen) == [
+        (0, 1),
+        (1, 2),
+        (2, None),
+    ]
+    assert isinstance(seen[-1][3], TimeoutError)
+
+
+def test_hung_items_do_not_starve_healthy_ones(monkeypatch):
+    monkeypatch.setattr(fetch_pool, "BACKOFF_BASE", 0.001)
+    monkeypatch.setitem(
+        PROVIDER_LIMITS, "test-starve", {"max_workers": 2, "timeout": 0.1}
+    )
+    release = threading.Event()
+    items = ["HUNG1", "HUNG2"] + [f"OK{i}" for i in range(6)]
+
+    def fetch(symbol):
+        if symbol.startswith("HUNG"):
+            release.wait(5)
+        return symbol
+
+    results, errors = fetch_concurrently(fetch, items, provider="test-starve")
+    release.set()
+
+    assert results == [None, None] + items[2:]
+    assert set(errors) == {"HUNG1", "HUNG2"}
+    assert all("no response within" in e for e in errors.values())
+    assert get_circuit_breaker("test-starve").state == "closed"
+
+
+def test_local_os_errors_are_not_retried(monkeypatch):
+    monkeypatch.setitem(PROVIDER_LIMITS, "test-local", {"max_workers": 1})
+    calls = []
+
+    def fetch(path):
+        calls.append(path)
+        raise FileNotFoundError(path)
+
+    _, errors = fetch_concurrently(fetch, ["missing.csv"], provider="test-local")
+
+    assert calls == ["missing.csv"]
+    assert "missing.csv" in errors
+    assert get_circuit_breaker("test-local").failures == 0
+
+
+def test_single_worker_without_timeout_runs_inline(monkeypatch):
+    monkeypatch.setitem(PROVIDER_LIMITS, "test-inline", {"max_workers": 4})
+
+    results, _ = fetch_concurrently(
+        lambda _: threading.current_thread(), ["AAA"], provider="test-inline"
+    )
+
+    assert results == [threading.current_thread()]
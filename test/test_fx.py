@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+import market_data
+from fx import FXRates, conversion_factors, fx_rates, normalize_currency
+from live_pnl import LivePnL
+from portfolio_analysis import STATUS_NO_FX, STATUS_OK, analyze_portfolio
+from synthetic_provider import SyntheticProvider
+
+BOOK = [
+    {"ticker": "AAA", "shares": 10, "purchase_price": 5.0},
+    {"ticker": "VUAG.L", "shares": 4, "purchase_price": 80.0},
+    {"ticker": "VUAG.L", "shares": 2, "purchase_price": 90.0},
+]
+
+
+@pytest.fixture
+def provider():
+    fx_rates.clear()
+    provider = SyntheticProvider(today="2025-06-13")
+    previous = market_data.set_provider(provider)
+    yield provider
+    market_data.set_provider(previous)
+    fx_rates.clear()
+
+
+def test_minor_units_normalize_to_major_currency():
+    assert normalize_currency("GBp") == ("GBP", 0.01)
+    assert normalize_currency("usd") == ("USD", 1.0)
+
+
+def test_each_pair_is_fetched_once_per_bucket(provider):
+    rates = FXRates()
+
+    quote, major = conversion_factors(["GBp", "USD", "GBP", "GBp"], rates=rates)
+    requests = provider.requests
+    again, _ = conversion_factors(["GBP"] * 1000, rates=rates)
+    assert provider.requests == requests
+
+    gbp = market_data.fetch_last_prices(["GBPUSD=X"])["GBPUSD=X"]
+    np.testing.assert_allclose(quote, [gbp / 100, 1, gbp, gbp / 100])
+    np.testing.assert_allclose(major, [gbp, 1, gbp, gbp])
+    assert (again == gbp).all()
+
+
+def test_portfolio_totals_are_in_the_base_currency(provider):
+    native = analyze_portfolio(BOOK, max_workers=2)
+    converted = analyze_portfolio(BOOK, max_workers=2, base_currency="USD")
+
+    gbp = market_data.fetch_last_prices(["GBPUSD=X"])["GBPUSD=X"]
+    assert list(converted["Currency"]) == ["USD", "GBP", "GBP"]
+    np.testing.assert_allclose(
+        converted["Current Value"],
+        native["Current Value"] * [1, gbp / 100, gbp / 100],
+        rtol=1e-3,
+    )
+    np.testing.assert_allclose(converted["Initial Value"], [50, 320 * gbp, 180 * gbp])
+    np.testing.assert_array_equal(
+        converted["Purchase Price"], np.round([5.0, 80 * gbp, 90 * gbp], 2)
+    )
+    assert (converted["Status"] == STATUS_OK).all()
+
+
+def test_missing_rate_leaves_lots_unvalued(provider):
+    provider.missing.add("GBPUSD=X")
+
+    results = analyze_portfolio(BOOK, max_workers=2, base_currency="USD")
+
+    assert list(results["Status"]) == [STATUS_OK, STATUS_NO_FX, STATUS_NO_FX]
+    assert results.loc[1:, "Current Value"].isna().all()
+
+
+def test_unknown_currency_leaves_lots_unvalued(provider, monkeypatch):
+    info = provider.info
+
+    def info_without_london(symbol):
+        if symbol.endswith(".L"):
+            raise RuntimeError("HTTP Error 404: Not Found")
+        return info(symbol)
+
+    # Prices still arrive through the batch download, in pence
+    monkeypatch.setattr(provider, "info", info_without_london)
+    results = analyze_portfolio(BOOK, batch_size=10, base_currency="USD")
+
+    assert list(results["Status"]) == [STATUS_OK, STATUS_NO_FX, STATUS_NO_FX]
+    assert list(results["Currency"].fillna("?")) == ["USD", "?", "?"]
+    assert results.loc[1:, ["Purchase Price", "Current Value"]].isna().all(axis=None)
+
+    quotes = market_data.fetch_last_prices(["AAA", "VUAG.L"])
+    engine = LivePnL(BOOK, quotes, base_currency="USD")
+    engine.refresh_rates()
+    assert np.isnan(engine.prices[1])
+    assert engine.totals["Current Value"] == pytest.approx(10 * quotes["AAA"])
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from history_cache import HistoryCache
+from instrumentation import get_metrics
+
+DATES = pd.bdate_range("2024-01-01", "2024-03-29", name="Date")
+
+
+class FakeSource:
+    """Fetcher over fixed bars for [start, end), recording every request"""
+
+    def __init__(self):
+        close = np.linspace(100.0, 130.0, len(DATES))
+        self.bars = {
+            "AAA": pd.DataFrame(
+                {
+                    "Open": close,
+                    "High": close + 1,
+                    "Low": close - 1,
+                    "Close": close,
+                    "Volume": 1000.0,
+                    "Dividends": 0.0,
+                    "Stock Splits": 0.0,
+                },
+                index=DATES,
+            )
+        }
+        self.calls = []
+        self.fail = False
+
+    def __call__(self, symbols, start, end):
+        self.calls.append((list(symbols), start, end))
+        if self.fail:
+            return {}
+        return {
+            s: self.bars[s][(self.bars[s].index >= start) & (self.bars[s].index < end)]
+            for s in symbols
+            if s in self.bars
+        }
+
+
+def test_warm_store_only_fetches_new_bars():
+    source = FakeSource()
+    cache = HistoryCache(":memory:", fetch=source)
+    metrics = get_metrics()
+
+    cache.get_histories(["AAA"], datetime(2024, 1, 1), datetime(2024, 2, 1))
+    metrics.reset()
+    hist = cache.get_histories(["AAA"], datetime(2024, 1, 1), datetime(2024, 3, 1))
+
+    assert source.calls[1] == (["AAA"], datetime(2024, 1, 31), datetime(2024, 3, 1))
+    assert hist["AAA"].index[-1] == pd.Timestamp("2024-02-29")
+    assert len(hist["AAA"]) == (DATES < "2024-03-01").sum()
+    assert metrics.counters["cache.history.refresh"] == 1
+    assert metrics.counters["cache.history.hit"] == 0
+
+
+def test_dividend_refetches_the_full_history():
+    source = FakeSource()
+    cache = HistoryCache(":memory:", fetch=source)
+    cache.get_histories(["AAA"], datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+    # A dividend in February back-adjusts every earlier close
+    bars = source.bars["AAA"]
+    bars.loc[bars.index < "2024-02-15", ["Open", "High", "Low", "Close"]] *= 0.98
+    bars.loc["2024-02-15", "Dividends"] = 2.0
+    hist = cache.get_histories(["AAA"], datetime(2024, 1, 1), datetime(2024, 3, 1))
+
+    assert [call[1] for call in source.calls] == [
+        datetime(2024, 1, 1),
+        datetime(2024, 1, 31),
+        datetime(2024, 1, 1),
+    ]
+    assert hist["AAA"]["Close"].iloc[0] == bars["Close"].iloc[0]
+
+
+def test_failed_refetch_keeps_the_stored_history():
+    source = FakeSource()
+    cache = HistoryCache(":memory:", fetch=source)
+    stored = cache.get_history("AAA", datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+    # Reaching further back forces a full refetch, which then fails
+    source.fail = True
+    hist = cache.get_history("AAA", datetime(2023, 12, 1), datetime(2024, 2, 1))
+
+    assert len(source.calls) == 2
+    pd.testing.assert_frame_equal(hist, stored)
+    assert cache.coverage("AAA")[0] == datetime(2024, 1, 1)
@@ -0,0 +1,40 @@
+import numpy as np
+
+from holdings import Holdings
+
+PORTFOLIO = [
+    {"ticker": "AMPY", "shares": 133, "purchase_price": 5.49},
+    {"ticker": "UNH", "shares": 4, "purchase_price": 319.76},
+    {"ticker": "AMPY", "shares": 72, "purchase_price": 6.23},
+    {"ticker": "ZIM", "shares": 15, "purchase_price": 17.63},
+]
+
+
+def test_each_ticker_appears_once_in_symbols():
+    holdings = Holdings.from_records(PORTFOLIO)
+
+    assert list(holdings.symbols) == ["AMPY", "UNH", "ZIM"]
+    assert list(holdings.symbols[holdings.codes]) == [h["ticker"] for h in PORTFOLIO]
+
+
+def test_revalue_matches_per_lot_arithmetic():
+    holdings = Holdings.from_records(PORTFOLIO)
+
+    df = holdings.revalue({"AMPY": 6.0, "UNH": 300.0})
+
+    np.testing.assert_allclose(df["Current Value"][:3], [798.0, 1200.0, 432.0])
+    np.testing.assert_allclose(df["Profit/Loss"][0], 133 * (6.0 - 5.49))
+    assert np.isnan(df.loc[3, "Current Value"])  # ZIM has no price
+
+
+def test_rollup_uses_weighted_average_cost():
+    holdings = Holdings.from_records(PORTFOLIO)
+
+    rollup = holdings.rollup({"AMPY": 6.0}).set_index("Ticker")
+
+    assert rollup.loc["AMPY", "Lots"] == 2
+    assert rollup.loc["AMPY", "Shares"] == 205
+    np.testing.assert_allclose(
+        rollup.loc["AMPY", "Average Cost"], (133 * 5.49 + 72 * 6.23) / 205
+    )
+    np.testing.assert_allclose(rollup.loc["AMPY", "Current Value"], 205 * 6.0)
@@ -0,0 +1,92 @@
+import io
+import json
+import logging
+import pstats
+
+import market_data
+from cli import main
+from fetch_pool import PROVIDER_LIMITS, fetch_concurrently
+from instrumentation import Metrics, configure_json_log, get_metrics, logger
+from Stocks_Performance import get_stock_performance
+from synthetic_provider import SyntheticProvider
+from ttl_cache import TTLCache
+
+
+def test_snapshot_summarizes_timings_and_hit_ratios():
+    metrics = Metrics()
+    metrics.observe("stage.fetch", 0.2)
+    metrics.observe("stage.fetch", 0.4)
+    metrics.increment("cache.calendar.hit", 3)
+    metrics.increment("cache.calendar.miss")
+
+    snap = metrics.snapshot()
+
+    assert snap["timings"]["stage.fetch"] == {
+        "count": 2,
+        "total_s": 0.6,
+        "mean_s": 0.3,
+        "max_s": 0.4,
+    }
+    assert snap["cache_hit_ratio"] == {"cache.calendar": 0.75}
+
+
+def test_fetch_and_cache_paths_report_metrics(tmp_path, monkeypatch, fresh_fetch_pool):
+    monkeypatch.setitem(PROVIDER_LIMITS, "test", {"max_workers": 2})
+    metrics = get_metrics()
+    metrics.reset()
+    stream = io.StringIO()
+    configure_json_log(stream)
+    attempts = {}
+
+    def flaky(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        if item == "B" and attempts[item] == 1:
+            raise RuntimeError("429 Too Many Requests")
+        if item == "C":
+            raise ValueError("unknown symbol")
+        return item
+
+    try:
+        fetch_concurrently(flaky, ["A", "B", "C"], provider="test", max_workers=2)
+        cache = TTLCache(str(tmp_path / "calendar.sqlite"))
+        cache.set("A", 1)
+        cache.get("A")
+        cache.get("B")
+    finally:
+        logger.handlers = []
+        logger.setLevel(logging.NOTSET)
+
+    counters = metrics.snapshot()["counters"]
+    assert counters["fetch.retries"] == 1
+    assert counters["fetch.errors"] == 1
+    assert metrics.snapshot()["cache_hit_ratio"]["cache.calendar"] == 0.5
+
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    latencies = [
+        e for e in events if e["event"] == "fetch.item" and e["provider"] == "test"
+    ]
+    assert {e["item"] for e in latencies} == {"A", "B", "C"}
+    assert all(e["seconds"] >= 0 for e in latencies)
+
+
+def test_stages_are_timed():
+    metrics = get_metrics()
+    metrics.reset()
+    previous = market_data.set_provider(SyntheticProvider(today="2025-06-13"))
+    try:
+        get_stock_performance(["AAA", "BBB"])
+    finally:
+        market_data.set_provider(previous)
+
+    timings = metrics.snapshot()["timings"]
+    assert {"stage.fetch", "stage.compute", "download.batch"} <= set(timings)
+    assert metrics.snapshot()["counters"]["download.bytes"] > 0
+
+
+def test_profile_mode_writes_stats(tmp_path, capsys):
+    path = str(tmp_path / "run.prof")
+
+    main(["--profile", path, "--metrics", "interest", "--plain"])
+
+    assert pstats.Stats(path).total_calls > 0
+    assert "Profile written to" in capsys.readouterr().out
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+import market_data
+from fx import fx_rates
+from holdings import Holdings
+from live_pnl import LivePnL, poll_prices, run_feed
+from portfolio_analysis import analyze_portfolio
+from synthetic_provider import SyntheticProvider
+from synthetic_provider import synthetic_portfolio, synthetic_ticks
+
+
+def _recomputed_totals(holdings, prices):
+    df = holdings.revalue(prices)
+    initial = df["Initial Value"].sum()
+    current = df["Current Value"].sum()
+    return {
+        "Initial Value": initial,
+        "Current Value": current,
+        "Profit/Loss": df["Profit/Loss"].sum(),
+        "Return %": (current - initial) / initial * 100,
+    }
+
+
+def test_running_totals_match_full_revaluation():
+    holdings = Holdings.from_records(synthetic_portfolio(200, seed=3))
+    start = {symbol: 100.0 for symbol in holdings.symbols[:-5]}
+    engine = LivePnL(holdings, start)
+
+    changed = run_feed(engine, synthetic_ticks(start, 5000, seed=1))
+    engine.on_tick(holdings.symbols[0], None)
+
+    prices = dict(zip(engine.symbols, engine.prices))
+    expected = _recomputed_totals(holdings, prices)
+    assert changed > 0
+    for key, value in engine.totals.items():
+        assert value == pytest.approx(expected[key], rel=1e-9)
+
+
+def test_subscribers_see_only_changed_rows():
+    engine = LivePnL(
+        [
+            {"ticker": "AAA", "shares": 10, "purchase_price": 5.0},
+            {"ticker": "AAA", "shares": 10, "purchase_price": 7.0},
+            {"ticker": "BBB", "shares": 1, "purchase_price": 50.0},
+        ]
+    )
+    seen = []
+    unsubscribe = engine.subscribe(lambda row, totals: seen.append((row, totals)))
+
+    assert engine.on_tick("AAA", 8.0)
+    assert not engine.on_tick("AAA", 8.0)
+    assert not engine.on_tick("ZZZ", 1.0)
+    unsubscribe()
+    engine.on_tick("BBB", 40.0)
+
+    assert len(seen) == 1
+    row, totals = seen[0]
+    assert row["Ticker"] == "AAA" and row["Average Cost"] == 6.0
+    assert row["Profit/Loss"] == 40.0
+    assert totals["Profit/Loss"] == 40.0 and totals["Initial Value"] == 170.0
+
+
+def test_poll_prices_applies_each_poll():
+    engine = LivePnL([{"ticker": "AAA", "shares": 2, "purchase_price": 10.0}])
+    quotes = iter([{"AAA": 11.0}, {"AAA": 12.0}])
+
+    poll_prices(engine, interval=0, iterations=2, fetch=lambda symbols: next(quotes))
+
+    assert engine.ticks == 2
+    assert np.isclose(engine.totals["Current Value"], 24.0)
+
+
+def test_mixed_currency_book_totals_in_base_currency():
+    book = [
+        {"ticker": "AAA", "shares": 10, "purchase_price": 5.0},
+        {"ticker": "VUAG.L", "shares": 4, "purchase_price": 80.0},
+    ]
+    fx_rates.clear()
+    previous = market_data.set_provider(SyntheticProvider())
+    try:
+        quotes = market_data.fetch_last_prices(["AAA", "VUAG.L"])
+        engine = LivePnL(book, quotes, base_currency="USD")
+        expected = analyze_portfolio(book, max_workers=2, base_currency="USD")
+    finally:
+        market_data.set_provider(previous)
+        fx_rates.clear()
+
+    assert engine.base_currency == "USD"
+    totals = engine.totals
+    for column in ("Initial Value", "Current Value", "Profit/Loss"):
+        assert totals[column] == pytest.approx(expected[column].sum(), rel=1e-3)
+    snapshot = engine.snapshot().set_index("Ticker")
+    assert snapshot.loc["VUAG.L", "Current Price"] == pytest.approx(
+        expected.loc[1, "Current Price"], rel=1e-3
+    )
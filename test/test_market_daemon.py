@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+import pytest
+
+import market_data
+from fx import fx_rates
+from market_daemon import MarketDataDaemon
+from portfolio_analysis import analyze_portfolio
+from synthetic_provider import SyntheticProvider
+
+PORTFOLIO = [
+    {"ticker": "AAA", "shares": 10, "purchase_price": 50.0},
+    {"ticker": "BBB", "shares": 5, "purchase_price": 80.0},
+    {"ticker": "AAA", "shares": 2, "purchase_price": 60.0},
+]
+
+
+async def _get(path, port=None, unix_path=None):
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split()[1]), json.loads(body)
+
+
+def _run(scenario):
+    provider = SyntheticProvider()
+    previous = market_data.set_provider(provider)
+    try:
+        return asyncio.run(scenario(provider))
+    finally:
+        market_data.set_provider(previous)
+
+
+def test_views_are_served_from_memory():
+    async def scenario(provider):
+        daemon = MarketDataDaemon(PORTFOLIO, watchlist=["CCC"])
+        server = await daemon.serve(port=0)
+        port = server.sockets[0].getsockname()[1]
+        assert (await _get("/portfolio", port))[0] == 503
+
+        daemon.start()
+        await daemon.ready()
+        requests = provider.requests
+        portfolio = await _get("/portfolio", port)
+        performance = await _get("/performance", port)
+        earnings = await _get("/earnings", port)
+        missing = await _get("/nope", port)
+
+        daemon.stop()
+        server.close()
+        await server.wait_closed()
+        return (
+            daemon,
+            requests,
+            provider.requests,
+            portfolio,
+            performance,
+            earnings,
+            missing,
+        )
+
+    daemon, before, after, portfolio, performance, earnings, missing = _run(scenario)
+
+    assert after == before
+    assert portfolio[0] == 200
+    assert [row["Ticker"] for row in portfolio[1]["rows"]] == ["AAA", "BBB"]
+    assert portfolio[1]["totals"] == daemon.book.totals
+    assert {row["Symbol"] for row in performance[1]} == {"AAA", "BBB", "CCC"}
+    dates = [row["Earnings Date"] for row in earnings[1]]
+    assert len(dates) == 3 and dates == sorted(dates)
+    assert missing[0] == 404
+
+
+def test_datasets_refresh_on_their_own_schedules(tmp_path):
+    unix_path = str(tmp_path / "daemon.sock")
+
+    async def scenario(provider):
+        daemon = MarketDataDaemon(PORTFOLIO, max_age={"quotes": 0.05})
+        server = await daemon.serve(unix_path=unix_path)
+        daemon.start()
+        await daemon.ready()
+        await asyncio.sleep(0.3)
+        status = await _get("/status", unix_path=unix_path)
+        daemon.stop()
+        server.close()
+        await server.wait_closed()
+        return status
+
+    code, status = _run(scenario)
+
+    assert code == 200
+    assert status["quotes"]["refreshes"] >= 3
+    assert status["bars"]["refreshes"] == 1
+    assert status["calendars"]["refreshes"] == 1
+
+
+def test_portfolio_is_totalled_in_the_base_currency_and_errors_are_500():
+    book = PORTFOLIO + [{"ticker": "VUAG.L", "shares": 4, "purchase_price": 80.0}]
+
+    async def scenario(provider):
+        daemon = MarketDataDaemon(book)
+        server = await daemon.serve(port=0)
+        port = server.sockets[0].getsockname()[1]
+        daemon.start()
+        await daemon.ready()
+        portfolio = await _get("/portfolio", port)
+
+        def broken():
+            raise RuntimeError("view failed")
+
+        daemon.routes["/portfolio"] = broken
+        failed = await _get("/portfolio", port)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"\r\n\r\n")
+        malformed = (await reader.read()).split()[1]
+        writer.close()
+
+        daemon.stop()
+        server.close()
+        await server.wait_closed()
+        expected = analyze_portfolio(book, max_workers=2, base_currency="USD")
+        return portfolio, failed, malformed, expected
+
+    fx_rates.clear()
+    try:
+        portfolio, failed, malformed, expected = _run(scenario)
+    finally:
+        fx_rates.clear()
+
+    assert portfolio[1]["currency"] == "USD"
+    totals = portfolio[1]["totals"]
+    for column in ("Initial Value", "Current Value"):
+        assert totals[column] == pytest.approx(expected[column].sum(), rel=1e-3)
+    assert failed == (500, {"error": "view failed"})
+    assert malformed == b"400"
@@ -0,0 +1,170 @@
+import math
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import market_data
+from fetch_pool import PROVIDER_LIMITS
+from market_data import (
+    DOWNLOAD_TIMEOUT,
+    YahooProvider,
+    chunked,
+    download_histories,
+    fetch_last_prices,
+    split_download,
+)
+from portfolio_analysis import fetch_prices
+from synthetic_provider import SyntheticProvider, synthetic_symbols
+
+SYMBOLS = synthetic_symbols(23)
+
+pytestmark = pytest.mark.usefixtures("fresh_fetch_pool")
+
+
+class RejectingProvider(SyntheticProvider):
+    """Synthetic data where any download including a rejected symbol fails"""
+
+    name = "rejecting"
+
+    def __init__(self, rejected, **kwargs):
+        super().__init__(**kwargs)
+        self.rejected = set(rejected)
+        self.downloads = []
+
+    def download(self, symbols, *args, **kwargs):
+        self.downloads.append(list(symbols))
+        if self.rejected & set(symbols):
+            self._wait()
+            raise ValueError("Batch rejected")
+        return super().download(symbols, *args, **kwargs)
+
+
+class SlowProvider(SyntheticProvider):
+    """Synthetic data whose downloads outlast the fetch layer's timeout"""
+
+    name = "slow"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.threads = []
+
+    def download(self, *args, **kwargs):
+        self.threads.append(threading.current_thread())
+        time.sleep(0.05)
+        return super().download(*args, **kwargs)
+
+
+@pytest.fixture
+def use_provider():
+    previous = market_data.get_provider()
+    yield market_data.set_provider
+    market_data.set_provider(previous)
+
+
+def test_chunks_keep_order_and_drop_duplicates():
+    assert chunked(["A", "B", "A", "C", "D", "B", "E"], 2) == [
+        ["A", "B"],
+        ["C", "D"],
+        ["E"],
+    ]
+    assert chunked([], 10) == []
+
+
+@pytest.mark.parametrize("batch_size", [1, 5, 10, 50])
+def test_one_download_per_batch(batch_size):
+    provider = SyntheticProvider(today="2025-06-13", missing=["SYM0004"])
+
+    histories = download_histories(
+        SYMBOLS + SYMBOLS[:5], period="1mo", batch_size=batch_size, provider=provider
+    )
+
+    assert provider.requests == math.ceil(len(SYMBOLS) / batch_size)
+    assert sorted(histories) == sorted(set(SYMBOLS) - {"SYM0004"})
+    expected = provider.history("SYM0007", period="1mo").tz_localize(None)
+    pd.testing.assert_series_equal(
+        histories["SYM0007"]["Close"], expected["Close"], check_names=False
+    )
+
+
+def test_split_download_fans_out_per_symbol():
+    provider = SyntheticProvider(today="2025-06-13")
+    data = provider.download(["AAA", "BBB"], period="5d")
+    data.loc[:, ("BBB", slice(None))] = float("nan")
+
+    histories = split_download(data, ["AAA", "BBB", "CCC"])
+
+    assert list(histories) == ["AAA"]
+    # Exchange-local timestamps become naive dates
+    assert data.index.tz is not None
+    assert histories["AAA"].index.tz is None
+    assert list(histories["AAA"].columns) == list(data["AAA"].columns)
+    # A single-symbol download comes back without the ticker level
+    single = split_download(data["AAA"], ["AAA"])
+    assert list(single) == ["AAA"]
+    assert split_download(pd.DataFrame(), ["AAA"]) == {}
+
+
+def test_failed_batch_leaves_only_its_symbols_out():
+    provider = RejectingProvider(["SYM0012"], today="2025-06-13")
+
+    prices = fetch_last_prices(SYMBOLS, batch_size=10, provider=provider)
+
+    assert len(provider.downloads) == 3
+    assert sorted(prices) == SYMBOLS[:10] + SYMBOLS[20:]
+
+
+def test_prices_fall_back_per_symbol_when_a_batch_fails(use_provider):
+    provider = RejectingProvider(["SYM0012"], today="2025-06-13")
+    use_provider(provider)
+
+    prices, errors = fetch_prices(SYMBOLS, max_workers=4, batch_size=10)
+
+    assert errors == {}
+    assert all(price is not None for price in prices)
+    # Three batch downloads, then one info lookup per symbol of the failed batch
+    assert provider.requests == 3 + 10
+    info = provider.info("SYM0015")
+    assert prices[15] == (info.get("currentPrice") or info.get("regularMarketPrice"))
+
+
+def test_downloads_are_never_abandoned_mid_flight(monkeypatch):
+    monkeypatch.setitem(
+        PROVIDER_LIMITS, "slow", {"timeout": 0.01, "hedge_after": 0.005}
+    )
+    provider = SlowProvider(today="2025-06-13")
+
+    histories = download_histories(
+        SYMBOLS, period="5d", batch_size=10, provider=provider
+    )
+
+    assert len(histories) == len(SYMBOLS)
+    assert provider.threads == [threading.current_thread()] * 3
+
+
+def test_yahoo_downloads_do_not_overlap(monkeypatch):
+    running, overlaps, timeouts = [], [], []
+
+    class FakeYF:
+        @staticmethod
+        def download(symbols, timeout=None, **kwargs):
+            running.append(symbols)
+            overlaps.append(len(running))
+            timeouts.append(timeout)
+            time.sleep(0.02)
+            running.remove(symbols)
+            return pd.DataFrame()
+
+    monkeypatch.setattr(YahooProvider, "_yf", staticmethod(lambda: FakeYF))
+    threads = [
+        threading.Thread(target=YahooProvider().download, args=([symbol],))
+        for symbol in SYMBOLS[:4]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == [1, 1, 1, 1]
+    assert timeouts == [DOWNLOAD_TIMEOUT] * 4
@@ -0,0 +1,101 @@
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from option_payoff_diagrams import (
+    _halfway_values,
+    plot_payoffs,
+    render_payoffs,
+    single_leg_strategies,
+)
+from option_strategies import (
+    Leg,
+    iron_condor,
+    long_call,
+    pack_strategies,
+    payoff,
+    straddle,
+    value_before_expiry,
+)
+
+# Built without expiries, so there is no halfway-to-expiration curve
+HELPER_STRATEGIES = {
+    "Long Call": long_call(100, 5.0),
+    "Straddle": straddle(100, 5.0, 4.5),
+    "Iron Condor": iron_condor(80, 90, 110, 120, [0.5, 1.5, 1.6, 0.4]),
+}
+
+
+def _strategies(strikes):
+    strategies = {}
+    for strike in strikes:
+        for name, legs in single_leg_strategies(strike=strike).items():
+            strategies[f"{name} {strike}"] = legs
+    return strategies
+
+
+def test_pdf_report_has_one_page_per_grid(tmp_path):
+    path = str(tmp_path / "report.pdf")
+
+    files = render_payoffs(_strategies([90, 100, 110]), path, grid=(2, 2))
+
+    assert files == [path]
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data.startswith(b"%PDF")
+    assert data.count(b"/Type /Page ") == 3
+
+
+def test_image_pages_are_numbered_and_parallel_output_matches(tmp_path):
+    strategies = _strategies([95, 100, 105])
+
+    serial = render_payoffs(strategies, str(tmp_path / "a.png"), grid=(2, 3))
+    parallel = render_payoffs(
+        strategies, str(tmp_path / "b.svg"), grid=(2, 3), processes=2
+    )
+
+    assert [os.path.basename(f) for f in serial] == ["a-001.png", "a-002.png"]
+    assert [os.path.basename(f) for f in parallel] == ["b-001.svg", "b-002.svg"]
+    with open(serial[0], "rb") as f:
+        assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+    assert all(os.path.getsize(f) > 0 for f in serial + parallel)
+
+
+def test_strategies_without_expiries_and_empty_input(tmp_path):
+    path = str(tmp_path / "helpers.png")
+
+    assert render_payoffs(HELPER_STRATEGIES, path) == [path]
+    assert os.path.getsize(path) > 0
+    assert render_payoffs({}, str(tmp_path / "empty.pdf")) == []
+
+
+def test_plot_payoffs_handles_helper_built_strategies(monkeypatch):
+    shown = []
+    monkeypatch.setattr(plt, "show", lambda: shown.append(plt.gcf()))
+
+    plot_payoffs(HELPER_STRATEGIES)
+    plot_payoffs({})
+
+    assert len(shown) == len(HELPER_STRATEGIES)
+    assert [len(figure.axes[0].lines) for figure in shown] == [3, 3, 3]
+    plt.close("all")
+
+
+def test_halfway_curve_uses_each_strategys_own_expiry():
+    prices = np.array([90.0, 100.0, 110.0])
+    strategies = [
+        [Leg("call", 100, 5.0, expiry=0.1)],
+        [Leg("call", 100, 5.0, expiry=1.0)],
+        long_call(100, 5.0),
+    ]
+    packed = pack_strategies(strategies)
+
+    halfway = _halfway_values(packed, prices, 0.3, 0.04)
+
+    for i, legs in enumerate(strategies[:2]):
+        expected = value_before_expiry([legs], prices, legs[0].expiry / 2, 0.3, 0.04)
+        np.testing.assert_allclose(halfway[i], expected[0])
+    # The short-dated call still has time value, not its expiry payoff
+    assert (halfway[0] > payoff(packed, prices)[0]).all()
+    np.testing.assert_allclose(halfway[2], payoff(packed, prices)[2])
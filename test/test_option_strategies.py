@@ -0,0 +1,38 @@
+import numpy as np
+
+from option_strategies import (
+    Leg,
+    iron_condor,
+    payoff,
+    straddle,
+    strategy_stats,
+    vertical_spread,
+)
+
+PRICES = np.linspace(0, 300, 30001)
+
+
+def test_payoff_matches_single_leg_formulas():
+    legs = [[Leg("call", 100, 10, "long")], [Leg("put", 100, 8, "short")]]
+
+    curves = payoff(legs, PRICES)
+
+    np.testing.assert_allclose(curves[0], np.maximum(PRICES - 100, 0) - 10)
+    np.testing.assert_allclose(curves[1], -(np.maximum(100 - PRICES, 0) - 8))
+
+
+def test_stats_agree_with_dense_grid():
+    strategies = [
+        vertical_spread("call", 90, 110, 12, 4),
+        iron_condor(80, 90, 110, 120, (1, 3, 3, 1)),
+        straddle(100, 10, 8, side="short"),
+    ]
+
+    stats = strategy_stats(strategies)
+    curves = payoff(strategies, PRICES)
+
+    np.testing.assert_allclose(stats["max_profit"], curves.max(axis=1))
+    np.testing.assert_allclose(stats["max_loss"][:2], curves[:2].min(axis=1))
+    assert stats["max_loss"][2] == -np.inf  # short call side is unbounded
+    breakevens = [b[~np.isnan(b)].tolist() for b in stats["breakevens"]]
+    assert breakevens == [[98.0], [86.0, 114.0], [82.0, 118.0]]
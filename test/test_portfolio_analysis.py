@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_data
+from portfolio_analysis import (
+    PRICED_COLUMNS,
+    STATUS_ERROR,
+    STATUS_NO_PRICE,
+    STATUS_OK,
+    _export_frame,
+    analyze_portfolio,
+    export_portfolio,
+    render_results,
+)
+from synthetic_provider import SyntheticProvider, synthetic_portfolio
+
+PORTFOLIO = [
+    {"ticker": "AAA", "shares": 10, "purchase_price": 5.0},
+    {"ticker": "GONE", "shares": 4, "purchase_price": 20.0},
+    {"ticker": "BBB", "shares": 2, "purchase_price": 50.0},
+]
+
+
+class FailingProvider(SyntheticProvider):
+    """Synthetic data where requests for BROKEN fail on the server"""
+
+    def _check(self, symbols):
+        if "BROKEN" in symbols:
+            raise RuntimeError("HTTP Error 500: Internal Server Error")
+
+    def download(self, symbols, *args, **kwargs):
+        self._check(symbols)
+        return super().download(symbols, *args, **kwargs)
+
+    def info(self, symbol):
+        self._check([symbol])
+        return super().info(symbol)
+
+
+def _analyze(portfolio=PORTFOLIO, **kwargs):
+    previous = market_data.set_provider(FailingProvider(missing=["GONE"]))
+    try:
+        return analyze_portfolio(portfolio, **kwargs)
+    finally:
+        market_data.set_provider(previous)
+
+
+def test_results_are_typed_with_a_status_column():
+    results = _analyze(max_workers=2)
+
+    for column in PRICED_COLUMNS + ["Initial Value", "Shares"]:
+        assert results[column].dtype == np.float64
+    assert list(results["Status"]) == [STATUS_OK, STATUS_NO_PRICE, STATUS_OK]
+    assert results.loc[1, PRICED_COLUMNS].isna().all()
+
+
+@pytest.mark.parametrize(
+    "options", [{}, {"max_workers": 2}, {"batch_size": 2}], ids=str
+)
+def test_failed_lookups_and_missing_prices_are_told_apart(options):
+    portfolio = PORTFOLIO + [{"ticker": "BROKEN", "shares": 1, "purchase_price": 1.0}]
+
+    results = _analyze(portfolio, **options)
+
+    assert list(results["Status"]) == [
+        STATUS_OK,
+        STATUS_NO_PRICE,
+        STATUS_OK,
+        STATUS_ERROR,
+    ]
+
+
+def test_totals_and_rendering():
+    results = _analyze(max_workers=2)
+
+    table = _export_frame(results)
+
+    assert list(table["Ticker"])[-2:] == ["GONE", "TOTAL"]
+    total = table.iloc[-1]
+    assert total["Initial Value"] == round(results["Initial Value"].sum(), 2)
+    assert total["Profit/Loss"] == round(results["Profit/Loss"].sum(), 2)
+
+    shown = render_results(table)
+    assert shown.loc[2, "Current Price"] == "N/A"
+    assert shown.loc[3, "Current Price"] == ""
+    assert shown.loc[0, "Current Price"] == table.loc[0, "Current Price"]
+
+
+def test_csv_export_renders_missing_prices(tmp_path):
+    path = str(tmp_path / "portfolio.csv")
+
+    export_portfolio(_analyze(max_workers=2), path)
+
+    exported = pd.read_csv(path, keep_default_na=False)
+    assert exported.loc[2, "Current Value"] == "N/A"
+    assert exported.loc[2, "Status"] == STATUS_NO_PRICE
+
+
+def _read_back(path):
+    if path.endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        rows = list(load_workbook(path, read_only=True)["Portfolio"].values)
+        return pd.DataFrame(rows[1:], columns=rows[0])
+    if path.endswith(".csv"):
+        return pd.read_csv(path, keep_default_na=False)
+    return pd.read_parquet(path)
+
+
+@pytest.mark.parametrize("extension", ["xlsx", "csv", "parquet"])
+def test_streaming_exports_read_back(tmp_path, extension):
+    if extension == "parquet":
+        pytest.importorskip("pyarrow")
+    results = _analyze(PORTFOLIO + synthetic_portfolio(200), batch_size=50)
+    table = _export_frame(results)
+    path = str(tmp_path / f"portfolio.{extension}")
+
+    export_portfolio(results, path)
+    exported = _read_back(path)
+
+    assert list(exported.columns) == list(table.columns)
+    assert len(exported) == len(results) + 1
+    assert list(exported["Ticker"]) == list(table["Ticker"])
+    np.testing.assert_allclose(
+        exported["Initial Value"].astype(float), table["Initial Value"]
+    )
+    priced = (table["Status"] == STATUS_OK).to_numpy()
+    for column in PRICED_COLUMNS:
+        np.testing.assert_allclose(
+            exported.loc[priced, column].astype(float), table.loc[priced, column]
+        )
+
+    gone = exported.index[exported["Ticker"] == "GONE"][0]
+    if extension == "parquet":
+        assert exported.loc[gone, PRICED_COLUMNS].isna().all()
+        assert exported["Current Price"].dtype == np.float64
+    else:
+        assert (exported.loc[gone, PRICED_COLUMNS] == "N/A").all()
+    assert exported.loc[gone, "Status"] == STATUS_NO_PRICE
+
+
+def test_excel_export_formats_header_and_total_rows(tmp_path):
+    from openpyxl import load_workbook
+
+    path = str(tmp_path / "portfolio.xlsx")
+
+    export_portfolio(_analyze(max_workers=2), path)
+
+    sheet = load_workbook(path)["Portfolio"]
+    header, total = sheet[1], sheet[sheet.max_row]
+    assert all(cell.font.bold for cell in header)
+    assert header[0].fill.start_color.rgb.endswith("366092")
+    assert total[0].value == "TOTAL"
+    assert all(cell.font.bold for cell in total)
+    assert not sheet[2][0].font.bold
+    assert sheet.column_dimensions["A"].width > 0
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_panel import PricePanel
+from synthetic_provider import SyntheticProvider, synthetic_symbols
+
+
+def _history(dates, closes):
+    index = pd.DatetimeIndex(pd.to_datetime(dates), name="Date")
+    return pd.DataFrame({"Open": closes, "Close": closes}, index=index)
+
+
+HISTORIES = {
+    "AAA": _history(["2024-01-02", "2024-01-03", "2024-01-05"], [10.0, 11.0, 12.0]),
+    "BBB": _history(["2024-01-03", "2024-01-04"], [20.0, 21.0]),
+}
+
+
+def test_histories_align_on_shared_dates():
+    panel = PricePanel.from_histories(HISTORIES)
+
+    assert panel.symbols == ["AAA", "BBB"]
+    assert panel.shape == (2, 4)
+    assert panel.values.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(
+        panel.mask, [[True, True, False, True], [False, True, True, False]]
+    )
+    np.testing.assert_array_equal(panel.last(), [12.0, 21.0])
+    np.testing.assert_array_equal(panel.filled()[1], [np.nan, 20.0, 21.0, 21.0])
+    np.testing.assert_array_equal(
+        panel.filled(backward=True)[1], [20.0, 20.0, 21.0, 21.0]
+    )
+    assert list(panel.to_frame()["AAA"].dropna()) == [10.0, 11.0, 12.0]
+
+
+def test_rows_columns_and_windows_are_views():
+    panel = PricePanel.from_histories(HISTORIES)
+
+    assert np.shares_memory(panel.row("BBB"), panel.values)
+    np.testing.assert_array_equal(panel.column("2024-01-03"), [11.0, 20.0])
+    assert np.shares_memory(panel.column("2024-01-03"), panel.values)
+    with pytest.raises(KeyError):
+        panel.column("2024-01-06")
+
+    window = panel.window("2024-01-03", "2024-01-04")
+    assert window.shape == (2, 2)
+    assert np.shares_memory(window.values, panel.values)
+    np.testing.assert_array_equal(window.last(), [11.0, 21.0])
+
+
+def test_float32_panel_is_smaller_than_the_frames():
+    provider = SyntheticProvider()
+    symbols = synthetic_symbols(20)
+    histories = {s: provider.history(s, period="2y") for s in symbols}
+
+    panel = PricePanel.from_histories(histories, dtype=np.float32)
+
+    assert panel.values.dtype == np.float32
+    frames = sum(h.memory_usage(index=True).sum() for h in histories.values())
+    assert panel.nbytes * 4 < frames
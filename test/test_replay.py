@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pytest
+
+import market_data
+from Earnings_Reports import get_upcoming_earnings
+from history_cache import HistoryCache
+from portfolio_analysis import analyze_portfolio
+from replay import RecordingProvider, ReplayProvider
+from Stocks_Performance import get_stock_performance
+from synthetic_provider import SyntheticProvider, synthetic_portfolio, synthetic_symbols
+from ttl_cache import TTLCache
+
+AS_OF = datetime(2025, 6, 13, 16, 0)
+
+
+def _run_entry_points(symbols, portfolio):
+    return (
+        get_stock_performance(symbols),
+        analyze_portfolio(portfolio, max_workers=4),
+        get_upcoming_earnings(symbols, max_workers=4),
+    )
+
+
+def test_replay_reproduces_recorded_run_without_network(tmp_path):
+    symbols = synthetic_symbols(6)
+    portfolio = synthetic_portfolio(8)
+    archive = tmp_path / "snapshot.pkl.gz"
+
+    live = SyntheticProvider(today=AS_OF)
+    previous = market_data.set_provider(RecordingProvider(live, archive, as_of=AS_OF))
+    try:
+        recorded = _run_entry_points(symbols, portfolio)
+        market_data.get_provider().save()
+
+        market_data.set_provider(ReplayProvider(archive))
+        requests = live.requests
+        replayed = _run_entry_points(symbols, portfolio)
+    finally:
+        market_data.set_provider(previous)
+
+    assert live.requests == requests
+    assert recorded[0].equals(replayed[0])
+    assert recorded[1].equals(replayed[1])
+    assert recorded[2].equals(replayed[2])
+
+
+def test_replay_rejects_unrecorded_requests(tmp_path):
+    archive = tmp_path / "snapshot.pkl.gz"
+    with RecordingProvider(SyntheticProvider(today=AS_OF), archive, as_of=AS_OF) as p:
+        p.history("ABC", period="1mo")
+
+    replay = ReplayProvider(archive)
+    assert replay.history("ABC", period="5d").index[-1] == datetime(2025, 6, 13)
+    with pytest.raises(LookupError):
+        replay.info("ABC")
+    with pytest.raises(LookupError):
+        replay.history("XYZ", period="5d")
+
+
+def test_warm_caches_are_bypassed_while_recording_and_replaying(tmp_path):
+    symbols = synthetic_symbols(6)
+    archive = tmp_path / "snapshot.pkl.gz"
+    history = HistoryCache(str(tmp_path / "history.sqlite"))
+    calendars = TTLCache(str(tmp_path / "calendar.sqlite"))
+
+    def run():
+        return (
+            get_stock_performance(symbols, cache=history),
+            get_upcoming_earnings(symbols, max_workers=4, cache=calendars),
+        )
+
+    live = SyntheticProvider(today=AS_OF)
+    previous = market_data.set_provider(live)
+    try:
+        # Warm both caches first, as an earlier run on the same machine would
+        run()
+        calendars.set_many({symbols[0]: {}})
+        history.invalidate(symbols[1])
+
+        market_data.set_provider(RecordingProvider(live, archive, as_of=AS_OF))
+        recorded = run()
+        market_data.get_provider().save()
+
+        market_data.set_provider(ReplayProvider(archive))
+        replayed = run()
+    finally:
+        market_data.set_provider(previous)
+
+    # Every symbol reached the archive despite the warm caches, and neither
+    # run wrote to them
+    assert len(recorded[1]) == len(replayed[1]) == len(symbols)
+    assert recorded[0].equals(replayed[0])
+    assert recorded[1].equals(replayed[1])
+    assert calendars.get(symbols[0]) == {}
+    assert history.coverage(symbols[1]) is None
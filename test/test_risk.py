@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_data
+from risk import (
+    historical_var,
+    monte_carlo_pnl,
+    parametric_var,
+    portfolio_risk,
+    returns_matrix,
+)
+from synthetic_provider import SyntheticProvider, synthetic_portfolio
+
+COV = np.array([[4e-4, 1e-4], [1e-4, 2.25e-4]])
+EXPOSURES = np.array([60_000.0, 40_000.0])
+
+
+def test_returns_matrix_keeps_common_dates():
+    dates = pd.to_datetime(["2025-01-02", "2025-01-03", "2025-01-06", "2025-01-07"])
+    histories = {
+        "AAA": pd.DataFrame({"Close": [10.0, 11.0, 11.0, 12.1]}, index=dates),
+        "BBB": pd.DataFrame({"Close": [20.0, 25.0]}, index=dates[2:]),
+    }
+
+    symbols, out_dates, returns = returns_matrix(histories)
+
+    assert symbols == ["AAA", "BBB"]
+    assert list(out_dates) == [dates[3]]
+    assert np.allclose(returns, [[0.1, 0.25]])
+
+
+def test_monte_carlo_agrees_with_parametric_var():
+    pnl = monte_carlo_pnl(EXPOSURES, COV, n_paths=400_000, chunk_size=30_000, seed=7)
+    mc_var, mc_cvar = historical_var(pnl, 0.99)
+    var, cvar = parametric_var(EXPOSURES, COV, 0.99)
+
+    # Log-normal P&L has a slightly thinner loss tail than the normal approximation
+    assert mc_var == pytest.approx(var, rel=0.03)
+    assert mc_cvar == pytest.approx(cvar, rel=0.03)
+
+
+def test_monte_carlo_is_independent_of_process_count():
+    serial = monte_carlo_pnl(EXPOSURES, COV, n_paths=5_000, chunk_size=1_000, seed=3)
+    pooled = monte_carlo_pnl(
+        EXPOSURES, COV, n_paths=5_000, chunk_size=1_000, seed=3, processes=2
+    )
+
+    assert np.array_equal(serial, pooled)
+
+
+def test_portfolio_risk_offline():
+    previous = market_data.set_provider(SyntheticProvider(today=datetime(2025, 6, 13)))
+    try:
+        result = portfolio_risk(synthetic_portfolio(20), n_paths=20_000, seed=1)
+    finally:
+        market_data.set_provider(previous)
+
+    assert result["covariance"].shape == (len(result["symbols"]),) * 2
+    for method in ("historical", "parametric", "monte_carlo"):
+        var, cvar = result[method]
+        assert 0 < var <= cvar
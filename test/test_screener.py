@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import market_data
+from screener import ScreenerIndex, build_index
+from Stocks_Performance import get_stock_performance
+from synthetic_provider import SyntheticProvider, synthetic_symbols
+
+SYMBOLS = synthetic_symbols(40)
+
+
+@pytest.fixture
+def index(tmp_path):
+    previous = market_data.set_provider(SyntheticProvider(missing=["SYM0007"]))
+    try:
+        path = build_index(SYMBOLS, str(tmp_path / "screener.npy"))
+        performance = get_stock_performance(SYMBOLS, numeric=True)
+    finally:
+        market_data.set_provider(previous)
+    return ScreenerIndex(path), performance.set_index("Symbol")
+
+
+def test_index_matches_performance_table(index):
+    index, performance = index
+
+    assert isinstance(index.table, np.memmap)
+    assert len(index) == 39
+    rows = index.lookup(["SYM0003", "NOPE", "SYM0001"]).set_index("Symbol")
+    assert list(rows.index) == ["SYM0001", "SYM0003"]
+    for column in ["Current Price", "1m", "3m", "YTD", "1y", "2y"]:
+        np.testing.assert_allclose(
+            rows[column], performance.loc[rows.index, column], equal_nan=True
+        )
+    assert (rows["From High %"] <= 0).all()
+    assert (rows["52w Low"] <= rows["Current Price"]).all()
+
+
+def test_query_ranks_and_filters(index):
+    index, performance = index
+
+    top = index.query("3m", n=5, filters={"From High %": (-15, None)})
+
+    expected = performance[performance["3m"].notna()].copy()
+    high = index.lookup(list(expected.index)).set_index("Symbol")["From High %"]
+    expected = expected[high.reindex(expected.index) >= -15]
+    assert list(top["Symbol"]) == list(expected["3m"].nlargest(5).index)
+    worst = index.query("3m", n=None, ascending=True)
+    assert list(worst["3m"]) == sorted(performance["3m"].dropna())
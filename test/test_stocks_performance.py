@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from Stocks_Performance import (
+    TIME_PERIODS,
+    build_close_matrix,
+    calculate_price_change,
+    compute_horizon_returns,
+    format_performance,
+)
+
+
+def _history(start, periods, seed):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, periods=periods)
+    return pd.DataFrame(
+        {"Close": 100 + rng.normal(0, 1, periods).cumsum()}, index=index
+    )
+
+
+def _mask_based_changes(hist, current_price, end_date):
+    """The original per-horizon boolean-mask calculation"""
+    changes = {}
+    for name, days in TIME_PERIODS.items():
+        past = hist[hist.index <= end_date - timedelta(days=days)]
+        changes[name] = (
+            calculate_price_change(current_price, past.iloc[-1]["Close"])
+            if not past.empty
+            else np.nan
+        )
+    ytd = hist[hist.index >= datetime(end_date.year, 1, 1)]
+    changes["YTD"] = (
+        calculate_price_change(current_price, ytd.iloc[0]["Close"])
+        if not ytd.empty
+        else np.nan
+    )
+    return changes
+
+
+def test_matches_mask_based_calculation():
+    end_date = datetime(2025, 6, 13, 16)
+    histories = {
+        "OLD": _history("2022-01-03", 900, seed=1),
+        "NEW": _history("2025-02-03", 95, seed=2),  # listed this year
+    }
+    current = {"OLD": 101.5, "NEW": 97.25}
+
+    symbols, dates, closes = build_close_matrix(histories)
+    result = compute_horizon_returns(
+        symbols, dates, closes, [current[s] for s in symbols], end_date
+    )
+
+    assert list(result.dtypes.unique()) == [np.float64]
+    for symbol, hist in histories.items():
+        expected = _mask_based_changes(hist, current[symbol], end_date)
+        np.testing.assert_allclose(
+            result.loc[symbol, list(expected)].to_numpy(),
+            list(expected.values()),
+        )
+
+
+def test_format_performance_renders_strings():
+    df = pd.DataFrame(
+        {"Symbol": ["A"], "Current Price": [10.0], "1d": [1.234], "2y": [np.nan]}
+    )
+
+    formatted = format_performance(df)
+
+    assert formatted.loc[0, "1d"] == "1.23%"
+    assert formatted.loc[0, "2y"] == "N/A"
+    assert formatted.loc[0, "Current Price"] == 10.0